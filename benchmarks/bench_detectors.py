@@ -0,0 +1,151 @@
+"""Compare compiled detectors with plain ``re.findall`` over the original patterns.
+
+With ``--rules``, time a user rule engine holding that many keyword IOCs
+(plus a few regex rules) instead, to check that scan cost stays flat as rule
+packs grow. With ``--blocklist``, time building a blocklist of that many IPs,
+domains and hashes and scanning the log against it.
+
+Usage:
+    python benchmarks/bench_detectors.py --size-mb 256
+    python benchmarks/bench_detectors.py --file /var/log/big.log --detect ipv4,email
+    python benchmarks/bench_detectors.py --size-mb 64 --rules 10,1000,20000
+    python benchmarks/bench_detectors.py --size-mb 64 --blocklist 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from grpx.blocklist import IOCSet, blocklist_path, build_blocklist
+from grpx.detectors import get_detectors, resolve_detectors
+from grpx.file_stream import iter_line_blocks
+from grpx.rules import Rule, RuleEngine
+
+# The detector regexes before literal prefilters and octet validation.
+_PLAIN = {
+    "ipv4": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
+    "email": re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b"),
+    "url": re.compile(r"https?://[^\s]+"),
+}
+
+
+def _generate(path: Path, size_mb: int) -> None:
+    rng = random.Random(1)
+    target = size_mb << 20
+    written = 0
+    with path.open("w", encoding="utf-8") as fh:
+        while written < target:
+            lines = []
+            for _ in range(10000):
+                line = (
+                    f"2024-05-01T12:{rng.randrange(60):02d}:{rng.randrange(60):02d}Z INFO "
+                    f"req={rng.randrange(10**9)} src=10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)} "
+                    f"path=/api/v1/items/{rng.randrange(10**6)} latency={rng.randrange(2000)}ms"
+                )
+                roll = rng.random()
+                if roll < 0.005:
+                    line += f" user=u{rng.randrange(1000)}@example.com ref=https://example.com/{rng.randrange(100)}"
+                elif roll < 0.01:
+                    line += f" agent=build/{rng.randrange(300)}.{rng.randrange(300)}.{rng.randrange(300)}.{rng.randrange(999)}"
+                elif roll < 0.012:
+                    line += f" peer=2001:db8::{rng.randrange(1 << 16):x} net=10.{rng.randrange(256)}.0.0/16"
+                lines.append(line + "\n")
+            chunk = "".join(lines)
+            fh.write(chunk)
+            written += len(chunk)
+
+
+def _time(path: Path, size: int, find) -> tuple[float, int]:
+    started = time.perf_counter()
+    count = 0
+    with path.open("rb") as fh:
+        for block in iter_line_blocks(fh):
+            count += len(find(block.decode("utf-8", errors="ignore")))
+    elapsed = time.perf_counter() - started
+    print(f"  {count} matches in {elapsed:.2f}s ({size / elapsed / (1 << 20):.1f} MiB/s)")
+    return elapsed, count
+
+
+def _rule_engine(count: int) -> RuleEngine:
+    rng = random.Random(2)
+    domains = tuple(f"{rng.randrange(16**8):08x}.example" for _ in range(count))
+    return RuleEngine(
+        [
+            Rule("c2", keywords=domains, case_sensitive=False),
+            Rule("api-key", regex=r"api_key=[A-Za-z0-9]{32}"),
+            Rule("ua", regex=r"agent=build/\d+\.\d+\.\d+\.9\d\d\b"),
+        ]
+    )
+
+
+def _scan_count(engine: RuleEngine):
+    return lambda text: [match for matches in engine.scan(text).values() for match in matches]
+
+
+def _time_blocklist(path: Path, size: int, count: int, directory: Path) -> None:
+    rng = random.Random(3)
+    feed = directory / "feed.txt"
+    with feed.open("w", encoding="utf-8") as fh:
+        for at in range(count):
+            kind = at % 3
+            if kind == 0:
+                fh.write(f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}\n")
+            elif kind == 1:
+                fh.write(f"{rng.randrange(16**8):08x}.example\n")
+            else:
+                fh.write(f"{rng.randrange(16**32):032x}\n")
+    started = time.perf_counter()
+    stats = build_blocklist([feed], blocklist_dir=directory)
+    print(f"blocklist: {stats['iocs']} IOCs, {stats['bytes'] >> 20} MiB, built in {time.perf_counter() - started:.2f}s")
+    ioc_set = IOCSet(blocklist_path(stats["name"], directory))
+    try:
+        _time(path, size, lambda text: ioc_set.scan(text).get(ioc_set.name, []))
+    finally:
+        ioc_set.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Existing log to scan (default: generate one)")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the generated log")
+    parser.add_argument("--detect", default="all,ipv6,cidr", help="Detectors to compare")
+    parser.add_argument("--rules", help="Comma-separated keyword counts for the rule engine benchmark")
+    parser.add_argument("--blocklist", type=int, metavar="N", help="Benchmark a blocklist of N IOCs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = Path(tmp) / "bench.log"
+            print(f"Generating {args.size_mb} MiB log at {path}")
+            _generate(path, args.size_mb)
+        size = path.stat().st_size
+
+        if args.blocklist:
+            _time_blocklist(path, size, args.blocklist, Path(tmp))
+            return
+
+        if args.rules:
+            for count in (int(part) for part in args.rules.split(",")):
+                print(f"rule engine with {count} keywords")
+                _time(path, size, _scan_count(_rule_engine(count)))
+            return
+
+        for name, detector in get_detectors(resolve_detectors(args.detect)).items():
+            print(f"{name} (prefilter literal: {detector.literal!r})")
+            if name in _PLAIN:
+                print("  re.findall:")
+                plain_time, plain_count = _time(path, size, _PLAIN[name].findall)
+            print("  compiled:")
+            compiled_time, compiled_count = _time(path, size, detector.findall)
+            if name in _PLAIN:
+                print(f"  speedup: {plain_time / compiled_time:.2f}x, rejected: {plain_count - compiled_count}")
+
+
+if __name__ == "__main__":
+    main()
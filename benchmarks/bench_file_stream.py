@@ -0,0 +1,74 @@
+"""Compare the mmap/bytes and text-mode FileStreamProcessor paths.
+
+Usage:
+    python benchmarks/bench_file_stream.py --size-mb 5120 --include "ERROR"
+    python benchmarks/bench_file_stream.py --file /var/log/big.log --include "timeout"
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from grpx.file_stream import FileStreamProcessor
+
+_LEVELS = ["INFO"] * 90 + ["WARN"] * 8 + ["ERROR"] * 2
+
+
+def _generate(path: Path, size_mb: int) -> None:
+    rng = random.Random(1)
+    target = size_mb << 20
+    written = 0
+    with path.open("w", encoding="utf-8") as fh:
+        while written < target:
+            lines = [
+                f"2024-05-01T12:{rng.randrange(60):02d}:{rng.randrange(60):02d}Z {rng.choice(_LEVELS)} "
+                f"req={rng.randrange(10**9)} src=10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)} "
+                f"path=/api/v1/items/{rng.randrange(10**6)} latency={rng.randrange(2000)}ms\n"
+                for _ in range(10000)
+            ]
+            chunk = "".join(lines)
+            fh.write(chunk)
+            written += len(chunk)
+
+
+def _time(processor: FileStreamProcessor, size: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    count = sum(1 for _ in processor.iter_lines())
+    elapsed = time.perf_counter() - started
+    print(f"  {count} lines in {elapsed:.2f}s ({size / elapsed / (1 << 20):.1f} MiB/s)")
+    return elapsed, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Existing log to scan (default: generate one)")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the generated log")
+    parser.add_argument("--include", default="ERROR")
+    parser.add_argument("--exclude")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = Path(tmp) / "bench.log"
+            print(f"Generating {args.size_mb} MiB log at {path}")
+            _generate(path, args.size_mb)
+        size = path.stat().st_size
+
+        print("text mode:")
+        text_time, text_count = _time(
+            FileStreamProcessor(path, include=args.include, exclude=args.exclude, use_mmap=False), size
+        )
+        print("mmap/bytes:")
+        mmap_time, mmap_count = _time(FileStreamProcessor(path, include=args.include, exclude=args.exclude), size)
+
+        assert text_count == mmap_count, "paths disagree"
+        print(f"speedup: {text_time / mmap_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
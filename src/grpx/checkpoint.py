@@ -0,0 +1,179 @@
+"""Persisted byte-offset checkpoints so repeated scans only read newly appended data."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable
+
+from grpx.config import CONFIG_DIR
+
+CHECKPOINT_FILE = CONFIG_DIR / "checkpoints.sqlite3"
+
+# Bytes hashed from the start of a file to recognise it after it has grown.
+HEAD_BYTES = 4096
+_TAIL_STEP = 64 << 10
+# Bump when the layout of stored state changes; checkpoints of another version are discarded.
+STATE_VERSION = 1
+# What a state loader raises for state it cannot use.
+_BAD_STATE = (ValueError, KeyError, TypeError, AttributeError)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    head_len INTEGER NOT NULL,
+    head_hash TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    state BLOB,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (path, kind)
+);
+"""
+
+
+@dataclass
+class Checkpoint:
+    """One resumable scan: process ``[start, end)`` and then :meth:`commit`.
+
+    ``start`` is where the last finished scan of the same kind stopped (0 when the
+    file is new, was rotated, truncated or rewritten) and ``state`` is the
+    aggregate it stored. ``end`` is just past the last complete line, so a line
+    that is still being written is left for the next run.
+    """
+
+    store: CheckpointStore
+    path: str
+    kind: str
+    inode: int
+    head_len: int
+    head_hash: str
+    start: int
+    end: int
+    state: Any = None
+
+    def commit(self, state: Any = None) -> None:
+        self.store._save(self, state)
+
+
+class CheckpointStore:
+    """SQLite table of ``(path, scan kind) -> offset, aggregate state``.
+
+    A file is recognised by its inode and a hash of its first bytes (up to
+    :data:`HEAD_BYTES`, as many as existed at the last scan); its size must not
+    have dropped below the stored offset. Aggregate state is stored as plain
+    JSON tagged with :data:`STATE_VERSION`, so a checkpoint written by another
+    grpx version is recognised and dropped rather than misread.
+    """
+
+    def __init__(self, path: Path = CHECKPOINT_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def begin(self, file_path: Path, kind: str, load: Callable[[Any], Any] | None = None) -> Checkpoint:
+        """Return the unscanned window of ``file_path`` for scans of ``kind``.
+
+        ``load`` turns the stored plain state back into the caller's aggregate.
+        When the state cannot be decoded, has another :data:`STATE_VERSION` or
+        ``load`` rejects it, the checkpoint is ignored and the scan starts at 0.
+        """
+        key = str(file_path.resolve())
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inode, head_len, head_hash, offset, state FROM checkpoints WHERE path = ? AND kind = ?",
+                (key, kind),
+            ).fetchone()
+
+        with file_path.open("rb") as fh:
+            info = os.fstat(fh.fileno())
+            size = info.st_size
+            start, state = 0, None
+            if row is not None:
+                inode, head_len, head_hash, offset, blob = row
+                if inode == info.st_ino and offset <= size and _head_hash(fh, head_len) == head_hash:
+                    try:
+                        state = _load_state(blob, load)
+                    except _BAD_STATE:
+                        state = None
+                    else:
+                        start = offset
+            head_len = min(size, HEAD_BYTES)
+            end = _last_line_end(fh, start, size)
+            return Checkpoint(
+                store=self,
+                path=key,
+                kind=kind,
+                inode=info.st_ino,
+                head_len=head_len,
+                head_hash=_head_hash(fh, head_len),
+                start=start,
+                end=end,
+                state=state,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _save(self, checkpoint: Checkpoint, state: Any) -> None:
+        blob = json.dumps({"version": STATE_VERSION, "state": state}) if state is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(path, kind, inode, head_len, head_hash, offset, state, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    checkpoint.path,
+                    checkpoint.kind,
+                    checkpoint.inode,
+                    checkpoint.head_len,
+                    checkpoint.head_hash,
+                    checkpoint.end,
+                    blob,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+
+def _load_state(blob: str | bytes | None, load: Callable[[Any], Any] | None) -> Any:
+    if blob is None:
+        return None
+    stored = json.loads(blob)
+    if stored.get("version") != STATE_VERSION:
+        raise ValueError(f"checkpoint state version {stored.get('version')!r} is not {STATE_VERSION}")
+    return load(stored["state"]) if load is not None else stored["state"]
+
+
+def _head_hash(fh: BinaryIO, length: int) -> str:
+    fh.seek(0)
+    return hashlib.sha256(fh.read(length)).hexdigest()
+
+
+def _last_line_end(fh: BinaryIO, start: int, size: int) -> int:
+    """Offset just past the last newline in ``[start, size)``, or ``start`` if there is none."""
+    pos = size
+    while pos > start:
+        step = min(_TAIL_STEP, pos - start)
+        fh.seek(pos - step)
+        newline = fh.read(step).rfind(b"\n")
+        if newline >= 0:
+            return pos - step + newline + 1
+        pos -= step
+    return start
@@ -4,23 +4,98 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
+import tempfile
+from contextlib import ExitStack
 from getpass import getpass
+from pathlib import Path
+from typing import Iterator
 
+from grpx.blocklist import DEFAULT_BLOCKLIST, build_blocklist, clear_blocklists, list_blocklists
+from grpx.checkpoint import CheckpointStore
+from grpx.compression import detect_compression
 from grpx.config import ConfigManager
-from grpx.detectors import available_detectors, run_detector
+from grpx.detectors import (
+    available_detectors,
+    iter_detections,
+    iter_detector,
+    iter_file_set_detections,
+    load_errors,
+    resolve_detectors,
+)
 from grpx.executor import PromptExecutor
-from grpx.providers import ProviderError
+from grpx.file_set import expand_paths
+from grpx.file_stream import FileStreamProcessor
+from grpx.index import LogIndex, clear_indexes, list_indexes
+from grpx.providers import ProviderError, ResponseCache
 from grpx.providers.factory import build_provider
-from grpx.threat_intel import ThreatIntelService
+from grpx.records import FORMATS, merge_group_counts
+from grpx.threat_intel import ThreatIntelCache, ThreatIntelService
 
 
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="grpx", description="AI-powered multi-provider CLI platform")
-    parser.add_argument("-f", "--file", help="File path for prompt processing")
+    parser.add_argument(
+        "-f",
+        "--file",
+        nargs="+",
+        action="extend",
+        metavar="PATH",
+        help="Input files, directories or glob patterns (quote globs; '**' matches any depth)",
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="Scan directories given to --file recursively"
+    )
     parser.add_argument("-p", "--prompt", help="Natural language prompt")
     parser.add_argument("--include", help="Optional include regex for streamed lines")
     parser.add_argument("--exclude", help="Optional exclude regex for streamed lines")
-    parser.add_argument("--detect", metavar="NAME", help="Run rule-based detector by name")
+    parser.add_argument(
+        "--detect",
+        metavar="NAME[,NAME...]",
+        help="Run detectors, user rules or blocklists by name in one pass (comma-separated, 'all' or 'rules')",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Scan the file with N worker processes (default: execution.workers)",
+    )
+
+    parser.add_argument(
+        "--format",
+        default="auto",
+        choices=["auto", *FORMATS],
+        help="Log format for --group-by and --where (default: detected from the first line)",
+    )
+    parser.add_argument(
+        "--where",
+        metavar="EXPR",
+        help='Keep parsed records matching EXPR, e.g. \'status>=500 and client in 10.0.0.0/8 and path~"admin"\'',
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="FIELD[,FIELD...]",
+        help="Parse records and print count, errors and error rate per group, e.g. host,minute",
+    )
+
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep reading FILE as it grows, like tail -F, printing new filtered lines or --detect matches",
+    )
+
+    parser.add_argument(
+        "--map-reduce",
+        action="store_true",
+        help="With content sharing enabled, analyse the whole file in parallel chunks and combine the answers",
+    )
+
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local LLM response cache")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Only scan data appended since the last --resume run (checkpoints in ~/.grpx/checkpoints.sqlite3)",
+    )
 
     subparsers = parser.add_subparsers(dest="command")
 
@@ -34,6 +109,7 @@ def _build_parser() -> argparse.ArgumentParser:
     ti_cmd = subparsers.add_parser("threat-intel", help="Threat intelligence operations")
     ti_cmd.add_argument("--lookup", metavar="IP", help="Lookup IP directly without subcommand")
     ti_cmd.add_argument("--full", action="store_true", help="Show full provider responses")
+    _add_cache_flags(ti_cmd)
     ti_sub = ti_cmd.add_subparsers(dest="ti_command")
 
     ti_setup = ti_sub.add_parser("setup", help="Store threat-intel API keys")
@@ -42,12 +118,51 @@ def _build_parser() -> argparse.ArgumentParser:
     ti_setup.add_argument("--ipinfo-key")
 
     ti_lookup = ti_sub.add_parser("lookup", help="Lookup IP address across providers")
-    ti_lookup.add_argument("--ip", required=True)
+    ti_target = ti_lookup.add_mutually_exclusive_group(required=True)
+    ti_target.add_argument("--ip")
+    ti_target.add_argument(
+        "--from-file",
+        metavar="PATH",
+        help="Bulk mode: enrich every IPv4 found in PATH ('-' for stdin), printed as JSON Lines",
+    )
     ti_lookup.add_argument("--full", action="store_true", help="Show full provider responses")
+    _add_cache_flags(ti_lookup)
+
+    ti_cache = ti_sub.add_parser("cache", help="Inspect or clear the threat-intel result cache")
+    ti_cache.add_argument("action", choices=["stats", "clear"])
+
+    index_cmd = subparsers.add_parser("index", help="Build or inspect trigram indexes that speed up repeat queries")
+    index_sub = index_cmd.add_subparsers(dest="index_command")
+    index_build = index_sub.add_parser("build", help="Index files, or index only what was appended since the last build")
+    index_build.add_argument("paths", nargs="+", metavar="PATH", help="Files, directories or glob patterns")
+    index_build.add_argument("-r", "--recursive", action="store_true", help="Include files in subdirectories")
+    index_build.add_argument("--workers", type=int, metavar="N", help="Index with N worker processes")
+    index_sub.add_parser("stats", help="List indexed files and index sizes")
+    index_sub.add_parser("clear", help="Delete all indexes")
+
+    blocklist_cmd = subparsers.add_parser("blocklist", help="Build or inspect local IOC blocklists used as detectors")
+    blocklist_sub = blocklist_cmd.add_subparsers(dest="blocklist_command")
+    blocklist_build = blocklist_sub.add_parser("build", help="Build a blocklist from feed files, one IOC per line")
+    blocklist_build.add_argument(
+        "feeds", nargs="+", metavar="FEED", help="Feed files (IPs, CIDRs, domains, URLs, hashes)"
+    )
+    blocklist_build.add_argument(
+        "--name", default=DEFAULT_BLOCKLIST, help=f"Blocklist and detector name (default: {DEFAULT_BLOCKLIST})"
+    )
+    blocklist_build.add_argument(
+        "--append", action="store_true", help="Add to the existing blocklist instead of replacing it"
+    )
+    blocklist_sub.add_parser("stats", help="List blocklists with IOC counts and sizes")
+    blocklist_sub.add_parser("clear", help="Delete all blocklists")
 
     return parser
 
 
+def _add_cache_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the local result cache")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached results but store fresh ones")
+
+
 def _run_setup(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
     config = config_mgr.load()
     provider = args.provider or input("Provider (ollama/openai/claude/openrouter): ").strip().lower()
@@ -87,49 +202,272 @@ def _run_threat_intel_setup(args: argparse.Namespace, config_mgr: ConfigManager)
     return 0
 
 
+def _iter_input_ips(source: str) -> Iterator[str]:
+    if source != "-":
+        yield from iter_detector("ipv4", file_path=source)
+        return
+    for line in sys.stdin:
+        yield from iter_detector("ipv4", text=line)
+
+
+def _run_threat_intel_bulk(args: argparse.Namespace, service: ThreatIntelService) -> int:
+    if not service.configured():
+        print("No threat intel providers are configured. Run: grpx threat-intel setup", file=sys.stderr)
+        return 1
+    for ip, results in service.lookup_many(_iter_input_ips(args.from_file), full=args.full):
+        print(json.dumps({"ip": ip, "results": results}), flush=True)
+    return 0
+
+
 def _run_threat_intel_lookup(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
     config = config_mgr.load()
-    service = ThreatIntelService(config)
+    cache = None
+    if config["threat_intel"]["cache"]["enabled"] and not args.no_cache:
+        cache = ThreatIntelCache.from_config(config)
+    service = ThreatIntelService(config, cache=cache, refresh=args.refresh)
     try:
+        if getattr(args, "from_file", None):
+            return _run_threat_intel_bulk(args, service)
         results = service.lookup_ip(args.ip, full=args.full)
     except Exception as exc:  # pragma: no cover - network/provider dependent
         print(f"Threat intel lookup failed: {exc}")
         return 1
+    finally:
+        # The service first: its lookups may still be writing to the cache.
+        service.close()
+        if cache is not None:
+            cache.close()
 
     if not results:
         print("No threat intel providers are configured. Run: grpx threat-intel setup")
         return 1
 
     print(json.dumps(results, indent=2))
+    failed = all(isinstance(entry, dict) and "error" in entry for entry in results.values())
+    return 1 if failed else 0
+
+
+def _run_threat_intel_cache(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
+    cache = ThreatIntelCache.from_config(config_mgr.load())
+    try:
+        if args.action == "clear":
+            cache.clear()
+            print("Threat intel cache cleared.")
+        else:
+            print(json.dumps(cache.stats(), indent=2))
+    finally:
+        cache.close()
     return 0
 
 
-def _run_detector(args: argparse.Namespace) -> int:
+def _input_paths(args: argparse.Namespace) -> list[str]:
+    paths = [str(path) for path in expand_paths(args.file, recursive=args.recursive)]
+    if args.resume and len(paths) > 1:
+        raise ValueError("--resume works on a single file")
+    return paths
+
+
+def _run_index(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
+    if args.index_command == "clear":
+        print(f"Removed {clear_indexes()} indexes.")
+        return 0
+    if args.index_command == "stats":
+        print(json.dumps(list_indexes(), indent=2))
+        return 0
+    workers = args.workers or config_mgr.load()["execution"]["workers"]
+    for path in expand_paths(args.paths, recursive=args.recursive):
+        if detect_compression(path) is not None:
+            print(f"{path}: skipped, compressed files are not indexed")
+            continue
+        index = LogIndex(path)
+        try:
+            result = index.update(workers=workers)
+        finally:
+            index.close()
+        action = "rebuilt" if result["rebuilt"] else "updated"
+        print(f"{path}: {action}, {result['new_bytes']} new bytes in {result['new_blocks']} blocks")
+    return 0
+
+
+def _run_blocklist(args: argparse.Namespace) -> int:
+    if args.blocklist_command == "clear":
+        print(f"Removed {clear_blocklists()} blocklists.")
+        return 0
+    if args.blocklist_command == "stats":
+        print(json.dumps(list_blocklists(), indent=2))
+        return 0
+    stats = build_blocklist([Path(feed) for feed in args.feeds], name=args.name, append=args.append)
+    print(
+        f"{stats['name']}: {stats['iocs']} IOCs and {stats['networks']} IPv4 ranges ({stats['bytes']} bytes)"
+        + (f", {stats['skipped']} IPv6 networks skipped" if stats["skipped"] else "")
+    )
+    return 0
+
+
+def _resolve_detectors(spec: str) -> list[str]:
+    names = resolve_detectors(spec)
+    # Only set once user rules were needed; a broken pack never stops the built-in detectors.
+    for error in load_errors():
+        print(f"Skipped: {error}", file=sys.stderr)
+    return names
+
+
+def _run_detector(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
     if not args.file:
         raise ValueError("--detect requires --file")
-    matches = run_detector(args.detect, file_path=args.file)
-    print("\n".join(matches))
-    print(f"Matches: {len(matches)}")
+    names = _resolve_detectors(args.detect)
+    workers = args.workers or config_mgr.load()["execution"]["workers"]
+    paths = _input_paths(args)
+    if len(paths) > 1:
+        detections = iter_file_set_detections(names, [Path(path) for path in paths], workers=workers)
+        return _print_file_set_detections(names, detections)
+    checkpoints = CheckpointStore() if args.resume else None
+    try:
+        detections = iter_detections(names, file_path=paths[0], workers=workers, checkpoints=checkpoints)
+        return _print_detections(names, detections)
+    finally:
+        if checkpoints is not None:
+            checkpoints.close()
+
+
+def _print_detections(names: list[str], detections: Iterator[tuple[str, str]]) -> int:
+    if len(names) == 1:
+        count = 0
+        for _, match in detections:
+            print(match)
+            count += 1
+        print(f"Matches: {count}")
+        return 0
+
+    # Matches arrive interleaved; spool them per detector so the grouped report
+    # does not hold every match in memory.
+    with ExitStack() as stack:
+        spools = {name: stack.enter_context(tempfile.TemporaryFile("w+", encoding="utf-8")) for name in names}
+        counts = dict.fromkeys(names, 0)
+        for name, match in detections:
+            spools[name].write(match + "\n")
+            counts[name] += 1
+
+        for name in names:
+            print(f"[{name}]")
+            spools[name].seek(0)
+            for line in spools[name]:
+                print(line, end="")
+            print(f"Matches: {counts[name]}")
+        print(f"Total matches: {sum(counts.values())}")
+    return 0
+
+
+def _print_file_set_detections(names: list[str], detections: Iterator[tuple[str, str, str]]) -> int:
+    """Print ``path:match`` lines (``path:[name] match`` for several detectors), then per-file and total counts."""
+    per_file: dict[str, dict[str, int]] = {}
+    for path, name, match in detections:
+        print(f"{path}:{match}" if len(names) == 1 else f"{path}:[{name}] {match}")
+        counts = per_file.setdefault(path, dict.fromkeys(names, 0))
+        counts[name] += 1
+
+    totals = dict.fromkeys(names, 0)
+    for path, counts in per_file.items():
+        print(f"{path}: " + " ".join(f"{name}={count}" for name, count in counts.items()))
+        for name, count in counts.items():
+            totals[name] += count
+    if len(names) > 1:
+        print("Matches per detector: " + " ".join(f"{name}={count}" for name, count in totals.items()))
+    print(f"Total matches: {sum(totals.values())} in {len(per_file)} files")
+    return 0
+
+
+def _run_group_by(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
+    if not args.file:
+        raise ValueError("--group-by requires --file")
+    keys = [key.strip() for key in args.group_by.split(",") if key.strip()]
+    workers = args.workers or config_mgr.load()["execution"]["workers"]
+    groups: dict[tuple, list[int]] = {}
+    for path in _input_paths(args):
+        processor = FileStreamProcessor(Path(path), include=args.include, exclude=args.exclude, workers=workers)
+        merge_group_counts(groups, processor.group_counts(keys, args.format, args.where))
+
+    for key in sorted(groups, key=lambda values: tuple("" if value is None else str(value) for value in values)):
+        count, errors = groups[key]
+        row = dict(zip(keys, key))
+        row.update(count=count, errors=errors, error_rate=round(errors / count, 4))
+        print(json.dumps(row))
+    return 0
+
+
+def _run_where(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
+    if not args.file:
+        raise ValueError("--where requires --file")
+    workers = args.workers or config_mgr.load()["execution"]["workers"]
+    paths = _input_paths(args)
+    for path in paths:
+        processor = FileStreamProcessor(Path(path), include=args.include, exclude=args.exclude, workers=workers)
+        for line in processor.iter_where(args.where, args.format):
+            print(line if len(paths) == 1 else f"{path}:{line}")
+    return 0
+
+
+def _run_follow(args: argparse.Namespace) -> int:
+    if not args.file:
+        raise ValueError("--follow requires --file")
+    if len(args.file) > 1:
+        raise ValueError("--follow works on a single file")
+    names = _resolve_detectors(args.detect) if args.detect else []
+    processor = FileStreamProcessor(Path(args.file[0]), include=args.include, exclude=args.exclude)
+    try:
+        for line in processor.follow():
+            if not names:
+                print(line, flush=True)
+                continue
+            for name, match in iter_detections(names, text=line):
+                print(match if len(names) == 1 else f"[{name}] {match}", flush=True)
+    except KeyboardInterrupt:
+        pass
     return 0
 
 
 def _run_prompt(args: argparse.Namespace, config_mgr: ConfigManager) -> int:
     config = config_mgr.load()
     provider = build_provider(config)
-    executor = PromptExecutor(provider, allow_content_to_ai=config["execution"]["allow_content_to_ai"])
+    execution = config["execution"]
+    use_cache = execution["cache"]["enabled"] and not args.no_cache
+    cache = ResponseCache(max_bytes=int(execution["cache"]["max_mb"]) << 20) if use_cache else None
+    checkpoints = CheckpointStore() if args.resume else None
+    executor = PromptExecutor(
+        provider,
+        allow_content_to_ai=execution["allow_content_to_ai"],
+        chunk_tokens=execution["chunk_tokens"],
+        parallelism=execution["parallelism"],
+        use_cache=use_cache,
+        cache=cache,
+        checkpoints=checkpoints,
+    )
+    printed = False
     try:
-        result = executor.apply_to_file(
-            file_path=args.file,
+        tokens = executor.stream_file(
+            file_path=_input_paths(args),
             prompt=args.prompt,
             include=args.include,
             exclude=args.exclude,
-            max_lines=config["execution"]["max_lines"],
+            max_lines=execution["max_lines"],
+            workers=args.workers or execution["workers"],
+            map_reduce=args.map_reduce or execution["map_reduce"],
         )
+        for token in tokens:
+            print(token, end="", flush=True)
+            printed = True
     except ProviderError as exc:
+        if printed:
+            print()
         print(f"LLM request failed: {exc}")
         return 1
+    finally:
+        if cache is not None:
+            cache.close()
+        if checkpoints is not None:
+            checkpoints.close()
 
-    print(result)
+    print()
     return 0
 
 
@@ -149,10 +487,36 @@ def main(argv: list[str] | None = None) -> int:
             return _run_threat_intel_setup(args, config_mgr)
         if args.ti_command == "lookup":
             return _run_threat_intel_lookup(args, config_mgr)
-        parser.error("threat-intel requires a subcommand: setup or lookup (or use --lookup)")
+        if args.ti_command == "cache":
+            return _run_threat_intel_cache(args, config_mgr)
+        parser.error("threat-intel requires a subcommand: setup, lookup or cache (or use --lookup)")
+
+    if args.command == "index":
+        if args.index_command is None:
+            parser.error("index requires a subcommand: build, stats or clear")
+        return _run_index(args, config_mgr)
+
+    if args.command == "blocklist":
+        if args.blocklist_command is None:
+            parser.error("blocklist requires a subcommand: build, stats or clear")
+        return _run_blocklist(args)
+
+    if args.where and (args.follow or args.detect or args.prompt):
+        parser.error("--where works with --group-by or on its own, not with --follow, --detect or --prompt")
+
+    if args.follow:
+        if args.prompt:
+            parser.error("--follow cannot be combined with --prompt")
+        return _run_follow(args)
 
     if args.detect:
-        return _run_detector(args)
+        return _run_detector(args, config_mgr)
+
+    if args.group_by:
+        return _run_group_by(args, config_mgr)
+
+    if args.where:
+        return _run_where(args, config_mgr)
 
     if args.file and args.prompt:
         return _run_prompt(args, config_mgr)
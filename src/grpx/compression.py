@@ -0,0 +1,271 @@
+"""Transparent decompression of gzip, bzip2, xz and zstd input for the scanners.
+
+Files are recognised by their magic bytes, not their extension. A single
+stream is decompressed on the fly. A file made of several independent
+members (pigz/bgzip gzip, pbzip2, concatenated xz streams or zstd frames) can
+be split at member boundaries and decompressed and scanned in a process pool.
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import mmap
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Generator, Iterator, TypeVar
+
+from grpx.parallel import ordered_map
+
+T = TypeVar("T")
+
+# Compressed bytes per pool task: small enough that a task's decompressed output
+# stays bounded in memory, large enough to amortize process round trips.
+DEFAULT_TASK_SIZE = 4 << 20
+_READ_SIZE = 1 << 20
+
+_MAGIC = {
+    "gzip": b"\x1f\x8b\x08",
+    "bzip2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+
+class CompressionError(RuntimeError):
+    """Raised when compressed input cannot be decoded."""
+
+
+# What the stdlib decompressors raise on corrupt input; zstd adds its module's ZstdError.
+_DECODE_ERRORS: tuple[type[Exception], ...] = (OSError, EOFError, ValueError, zlib.error, lzma.LZMAError)
+# Largest window a zstd frame may declare (log2), per RFC 8878.
+_ZSTD_MAX_WINDOW_LOG = 31
+
+
+def detect_compression(path: Path) -> str | None:
+    """Return ``gzip``, ``bzip2``, ``xz`` or ``zstd`` for compressed files, else ``None``."""
+    try:
+        with path.open("rb") as fh:
+            head = fh.read(10)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    for name, magic in _MAGIC.items():
+        if head.startswith(magic) and _plausible_member(name, head):
+            return name
+    return None
+
+
+def open_decompressed(path: Path, compression: str | None) -> BinaryIO:
+    """Open ``path`` for reading decompressed bytes, across all members."""
+    if compression is None:
+        return path.open("rb")
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    if compression == "bzip2":
+        return bz2.open(path, "rb")
+    if compression == "xz":
+        return lzma.open(path, "rb")
+    if compression == "zstd":
+        return _zstd_module().open(path, "rb")
+    raise ValueError(f"Unsupported compression '{compression}'")
+
+
+def member_ranges(path: Path, compression: str, task_size: int | None = None) -> list[tuple[int, int]]:
+    """Group candidate member starts into compressed byte ranges of about ``task_size``.
+
+    ``task_size`` defaults to :data:`DEFAULT_TASK_SIZE`. Candidates are found by magic bytes, so a range may start at a false positive
+    inside compressed data; :func:`map_decompressed` detects and repairs that.
+    """
+    magic = _MAGIC[compression]
+    task_size = task_size or DEFAULT_TASK_SIZE
+    with path.open("rb") as fh:
+        size = fh.seek(0, 2)
+        if size == 0:
+            return []
+        bounds = [0]
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = task_size
+            while pos < size:
+                found = mm.find(magic, pos)
+                while found >= 0 and not _plausible_member(compression, mm[found : found + 10]):
+                    found = mm.find(magic, found + 1)
+                if found < 0:
+                    break
+                bounds.append(found)
+                pos = found + task_size
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def map_decompressed(
+    path: Path,
+    compression: str,
+    ranges: list[tuple[int, int]],
+    fn: Callable[..., T],
+    args: tuple[Any, ...],
+    workers: int,
+) -> Iterator[T]:
+    """Yield ``fn(data, *args)`` over the whole decompressed stream, in order.
+
+    Each pool task decompresses the members starting in one of ``ranges`` (see
+    :func:`member_ranges`) and applies ``fn`` to the complete lines in the output.
+    The partial lines at either end are stitched with the neighbouring task's in
+    this process, so ``fn`` only ever sees whole lines. A task that started on a
+    false member boundary, or a range no task covered, is decompressed here instead.
+    """
+    tasks = ((str(path), compression, start, end, fn, args) for start, end in ranges)
+    expected = 0
+    carry = b""
+    for (start, _), outcome in zip(ranges, ordered_map(_decompress_task, tasks, workers)):
+        if start > expected:
+            outcome_here = _split_output(*_decompress_members(path, compression, expected, start), fn, args)
+            expected, carry = yield from _stitch(carry, outcome_here, fn, args)
+        if start != expected or outcome is None:
+            continue
+        expected, carry = yield from _stitch(carry, outcome, fn, args)
+    size = path.stat().st_size
+    if expected < size:
+        outcome_here = _split_output(*_decompress_members(path, compression, expected, size), fn, args)
+        _, carry = yield from _stitch(carry, outcome_here, fn, args)
+    if carry:
+        yield fn(carry, *args)
+
+
+def _stitch(
+    carry: bytes, outcome: tuple[int, bytes, T | None, bytes], fn: Callable[..., T], args: tuple[Any, ...]
+) -> Generator[T, None, tuple[int, bytes]]:
+    """Yield the results of one task; return its stop offset and the new partial line."""
+    stop, head, result, tail = outcome
+    if result is None:
+        return stop, carry + head
+    yield fn(carry + head, *args)
+    yield result
+    return stop, tail
+
+
+def _decompress_task(
+    path: str, compression: str, start: int, end: int, fn: Callable[..., T], args: tuple[Any, ...]
+) -> tuple[int, bytes, T | None, bytes] | None:
+    """Process-pool entry point: decompress whole members from ``start`` and apply ``fn``.
+
+    Returns ``None`` when ``start`` turns out not to be a member boundary.
+    """
+    try:
+        stop, data = _decompress_members(Path(path), compression, start, end)
+    except CompressionError:
+        return None
+    return _split_output(stop, data, fn, args)
+
+
+def _split_output(
+    stop: int, data: bytes, fn: Callable[..., T], args: tuple[Any, ...]
+) -> tuple[int, bytes, T | None, bytes]:
+    """Split decompressed output at its first and last newline and apply ``fn`` to the middle.
+
+    Returns ``(stop, head, result, tail)``; ``result`` is ``None`` when ``data``
+    holds no newline, in which case ``head`` is all of it.
+    """
+    first = data.find(b"\n")
+    if first < 0:
+        return stop, data, None, b""
+    last = data.rfind(b"\n")
+    return stop, data[: first + 1], fn(data[first + 1 : last + 1], *args), data[last + 1 :]
+
+
+def _decompress_members(path: Path, compression: str, start: int, end: int) -> tuple[int, bytes]:
+    """Decompress consecutive members from ``start`` until one ends at or past ``end``.
+
+    Returns the offset after the last member read and the decompressed bytes.
+    """
+    errors = _DECODE_ERRORS + ((_zstd_module().ZstdError,) if compression == "zstd" else ())
+    out: list[bytes] = []
+    with path.open("rb") as fh:
+        fh.seek(start)
+        pos = start
+        decompressor = None
+        pending = b""
+        while True:
+            if not pending:
+                if decompressor is None and pos >= end:
+                    break
+                pending = fh.read(_READ_SIZE)
+                if not pending:
+                    if decompressor is not None:
+                        raise CompressionError(f"{path}: truncated {compression} member at offset {pos}")
+                    break
+            if decompressor is None:
+                # Some writers pad between or after members with NUL bytes.
+                stripped = pending.lstrip(b"\0")
+                pos += len(pending) - len(stripped)
+                pending = stripped
+                if not pending:
+                    continue
+                decompressor = _new_decompressor(compression)
+            try:
+                out.append(decompressor.decompress(pending))
+            except errors as exc:
+                raise CompressionError(f"{path}: invalid {compression} data at offset {pos}: {exc}") from exc
+            if decompressor.eof:
+                unused = decompressor.unused_data
+                pos += len(pending) - len(unused)
+                pending = unused
+                decompressor = None
+            else:
+                pos += len(pending)
+                pending = b""
+    return pos, b"".join(out)
+
+
+def _new_decompressor(compression: str) -> Any:
+    if compression == "gzip":
+        return zlib.decompressobj(wbits=31)
+    if compression == "bzip2":
+        return bz2.BZ2Decompressor()
+    if compression == "xz":
+        return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    return _zstd_module().ZstdDecompressor()
+
+
+def _plausible_member(compression: str, head: bytes) -> bool:
+    """Cheap header sanity checks that weed out most magic-byte false positives."""
+    if compression == "gzip":
+        return len(head) >= 10 and head[3] & 0xE0 == 0
+    if compression == "bzip2":
+        return len(head) >= 10 and head[3:4] in b"123456789" and head[4:10] == b"\x31\x41\x59\x26\x53\x59"
+    if compression == "zstd":
+        # Frame header descriptor: the reserved bit is clear, and unless the frame is a
+        # single segment a window descriptor follows whose size the format allows.
+        if len(head) < 6 or head[4] & 0x08:
+            return False
+        return bool(head[4] & 0x20) or 10 + (head[5] >> 3) <= _ZSTD_MAX_WINDOW_LOG
+    return True
+
+
+def _zstd_module() -> Any:
+    """Return a module exposing ``open``, ``ZstdDecompressor`` and ``ZstdError`` (stdlib on 3.14+, else ``zstandard``)."""
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise CompressionError("Reading .zst input requires the 'zstandard' package: pip install grpx[zstd]") from exc
+    return _ZstandardShim(zstandard)
+
+
+class _ZstandardShim:
+    """Adapt the third-party ``zstandard`` package to the ``compression.zstd`` API used here."""
+
+    def __init__(self, module: Any) -> None:
+        self._module = module
+        self.ZstdError = module.ZstdError
+
+    def open(self, path: Path, mode: str = "rb") -> BinaryIO:
+        return self._module.open(path, mode)
+
+    def ZstdDecompressor(self) -> Any:  # noqa: N802 - mirrors compression.zstd
+        return self._module.ZstdDecompressor().decompressobj()
@@ -23,10 +23,48 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "virustotal_api_key": "",
         "abuseipdb_api_key": "",
         "ipinfo_api_key": "",
+        "timeout": 30,
+        "concurrency": {
+            "virustotal": 4,
+            "abuseipdb": 4,
+            "ipinfo": 4,
+        },
+        "rate_limits": {
+            "virustotal": {"per_minute": 4, "per_day": 500},
+            "abuseipdb": {"per_minute": 60, "per_day": 1000},
+            "ipinfo": {"per_minute": 0, "per_day": 0},
+        },
+        "retry": {
+            "max_retries": 5,
+            "base_delay": 1.0,
+            "max_delay": 60.0,
+        },
+        "cache": {
+            "enabled": True,
+            "max_entries": 100000,
+            "negative_ttl": 300,
+            "ttl": {
+                "virustotal": 86400,
+                "abuseipdb": 21600,
+                "ipinfo": 604800,
+            },
+        },
+    },
+    "http": {
+        "pool_size": 4,
+        "connect_timeout": 10,
     },
     "execution": {
         "allow_content_to_ai": False,
         "max_lines": 10000,
+        "workers": 1,
+        "map_reduce": False,
+        "chunk_tokens": 3000,
+        "parallelism": 4,
+        "cache": {
+            "enabled": True,
+            "max_mb": 256,
+        },
     },
 }
 
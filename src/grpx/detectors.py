@@ -1,31 +1,530 @@
-"""Built-in rule based detectors."""
+"""Built-in rule based detectors and the registry of user rules.
+
+Each detector is compiled once into a :class:`Detector`: its regex, the
+literal every match must contain (found by walking the parsed pattern) and an
+optional validator for matches a regex cannot check cheaply. When the literal
+is rare in a block, only the lines containing it are handed to the regex.
+
+User rules from ``~/.grpx/rules/`` and plugins (see :mod:`grpx.rules`) and
+blocklists from ``~/.grpx/blocklists/`` (see :mod:`grpx.blocklist`) are added
+to the registry on first use. Rules share one engine, so a block is scanned
+once for all requested rules.
+"""
 
 from __future__ import annotations
 
+import ipaddress
+import json
 import re
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from grpx.checkpoint import CheckpointStore
+from grpx.compression import detect_compression, map_decompressed, member_ranges, open_decompressed
+from grpx.file_set import Piece, plan_file_tasks
+from grpx.file_stream import DEFAULT_CHUNK_SIZE, clip_ranges, iter_line_blocks
+from grpx.index import INDEX_DIR, LogIndex
+from grpx.parallel import line_aligned_ranges, ordered_map
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - Python 3.10
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+# Below one literal hit per this many lines, the regex runs only on the lines
+# holding the literal; above it, one pass over the whole block is cheaper. The
+# density is estimated from the head of each block.
+_SPARSE_LINES_PER_HIT = 4
+_DENSITY_SAMPLE = 64 << 10
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IPV4 = rf"{_OCTET}(?:\.{_OCTET}){{3}}"
+_HEX = r"[0-9A-Fa-f]{1,4}"
+# Full eight-group form, six groups plus an embedded IPv4, or anything with '::'
+# (tight enough to skip timestamps and MAC addresses; the validator does the rest).
+_IPV6 = (
+    rf"(?:(?:{_HEX}:){{7}}{_HEX}|(?:{_HEX}:){{6}}{_IPV4}"
+    rf"|[0-9A-Fa-f:]*::(?:(?:{_HEX}:)*{_IPV4}|[0-9A-Fa-f:]*))"
+)
+
+
+@dataclass(frozen=True)
+class Detector:
+    """A compiled detector.
+
+    ``literal`` is a substring every match contains (``None`` if the pattern
+    has none); ``validate`` rejects regex matches that are not real values.
+    Detectors with ``default`` unset run only when named explicitly. User
+    rules and blocklists have no ``pattern`` of their own and are matched by
+    an ``engine`` (a :class:`grpx.rules.RuleEngine` shared by all rules, or a
+    :class:`grpx.blocklist.IOCSet`) whose ``scan`` returns matches per name.
+    """
+
+    name: str
+    pattern: re.Pattern[str] | None
+    literal: str | None = None
+    validate: Callable[[str], bool] | None = None
+    default: bool = True
+    engine: Any = None
+
+    def findall(self, text: str) -> list[str]:
+        """Return every match in ``text`` (whole lines; matches never span a newline)."""
+        if self.engine is not None:
+            return self.engine.scan(text).get(self.name, [])
+        literal = self.literal
+        sample = text[:_DENSITY_SAMPLE]
+        if literal is None or sample.count(literal) * _SPARSE_LINES_PER_HIT > sample.count("\n") + 1:
+            found = self.pattern.findall(text)
+        else:
+            found = self._findall_sparse(text, literal)
+        if self.validate is not None:
+            found = list(filter(self.validate, found))
+        return found
+
+    def _findall_sparse(self, text: str, literal: str) -> list[str]:
+        """Run the regex only on the lines that contain ``literal``."""
+        found: list[str] = []
+        findall = self.pattern.findall
+        find = text.find
+        pos = 0
+        while True:
+            hit = find(literal, pos)
+            if hit < 0:
+                return found
+            newline = text.rfind("\n", pos, hit)
+            start = newline + 1 if newline >= 0 else pos
+            end = find("\n", hit)
+            if end < 0:
+                end = len(text)
+            found.extend(findall(text, start, end))
+            pos = end + 1
+
+
+def compile_detector(
+    name: str, pattern: str, validate: Callable[[str], bool] | None = None, default: bool = True
+) -> Detector:
+    """Compile ``pattern`` (without capturing groups) into a :class:`Detector` with its prefilter literal.
+
+    Patterns that start with a literal get none: the regex engine already skips
+    ahead to its literal prefix.
+    """
+    compiled = re.compile(pattern)
+    literals = [] if _literal_prefix(compiled) else required_literals(compiled)
+    # Punctuation is rarer in logs than letters, so prefer literals holding some.
+    literal = max(literals, key=lambda text: (not text.isalnum(), len(text))) if literals else None
+    return Detector(name, compiled, literal, validate, default)
+
+
+def _literal_prefix(pattern: re.Pattern[str]) -> bool:
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:  # noqa: BLE001
+        return False
+    return len(parsed) > 0 and parsed[0][0] is _sre_parse.LITERAL
+
+
+def required_literals(pattern: re.Pattern[str]) -> list[str]:
+    """Return literal runs that every match of ``pattern`` contains.
+
+    Only the mandatory top-level sequence (and groups or repeats it must pass
+    through) is inspected; branches and optional parts contribute nothing.
+    """
+    if pattern.flags & re.IGNORECASE:
+        return []
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:  # noqa: BLE001 - unparsable here means "no prefilter", never an error
+        return []
+    return _sequence_literals(parsed)
+
+
+def _sequence_literals(items: Any) -> list[str]:
+    literals: list[str] = []
+    run: list[str] = []
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            literals.append("".join(run))
+            run = []
+        if op is _sre_parse.SUBPATTERN:
+            # A scoped (?i:...) group matches other cases than its literals spell.
+            if not av[1] & re.IGNORECASE:
+                literals.extend(_sequence_literals(av[-1]))
+        elif op in _REPEATS and av[0] >= 1:
+            literals.extend(_sequence_literals(av[2]))
+    if run:
+        literals.append("".join(run))
+    return literals
+
 
+_REPEATS = tuple(
+    getattr(_sre_parse, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_sre_parse, name)
+)
 
-_DETECTORS: dict[str, re.Pattern[str]] = {
-    "ipv4": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
-    "email": re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b"),
-    "url": re.compile(r"https?://[^\s]+"),
+
+def _valid_ipv6(text: str) -> bool:
+    if text == "::":
+        return False
+    try:
+        ipaddress.IPv6Address(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _valid_network(text: str) -> bool:
+    try:
+        ipaddress.ip_network(text, strict=False)
+    except ValueError:
+        return False
+    return True
+
+
+_DETECTORS: dict[str, Detector] = {
+    detector.name: detector
+    for detector in (
+        # Octets are range-checked, and an address inside a longer dotted run
+        # (a version number such as 1.2.3.4.5) is not reported.
+        compile_detector("ipv4", rf"(?<![\w.]){_IPV4}(?!\w|\.\d)"),
+        compile_detector("email", r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b"),
+        compile_detector("url", r"https?://[^\s]+"),
+        compile_detector("ipv6", rf"(?<![\w:.]){_IPV6}(?![\w:]|\.\d)", _valid_ipv6, default=False),
+        compile_detector(
+            "cidr", rf"(?<![\w:.])(?:{_IPV4}|{_IPV6})/\d{{1,3}}(?![\w/]|\.\d)", _valid_network, default=False
+        ),
+    )
 }
 
 
+_registry: dict[str, Detector] | None = None
+_rule_names: list[str] = []
+_load_errors: list[str] = []
+
+
+def reload_detectors(
+    rules_dir: Path | None = None, plugins: bool = True, blocklist_dir: Path | None = None
+) -> list[str]:
+    """Reload user rules and blocklists and return their names.
+
+    Rules come from ``rules_dir`` (default ``~/.grpx/rules``) and, with
+    ``plugins``, entry points; blocklists from ``blocklist_dir`` (default
+    ``~/.grpx/blocklists``). A pack, plugin or blocklist that cannot be loaded
+    is skipped and reported by :func:`load_errors`; it never hides the others.
+    """
+    global _registry, _rule_names, _load_errors
+    from grpx.blocklist import blocklist_detectors
+    from grpx.rules import compile_rules, load_rules
+
+    errors: list[str] = []
+    registry = dict(_DETECTORS)
+    rules = compile_rules(load_rules(rules_dir, plugins, errors), errors)
+    for added in (rules, blocklist_detectors(blocklist_dir, errors)):
+        for name in sorted(set(added) & set(registry)):
+            errors.append(f"Rule or blocklist name '{name}' is already in use")
+            del added[name]
+        registry.update(added)
+    _registry, _rule_names, _load_errors = registry, sorted(rules), errors
+    return sorted(set(registry) - set(_DETECTORS))
+
+
+def load_errors() -> list[str]:
+    """Rule packs, plugins and blocklists the last :func:`reload_detectors` skipped, one message each."""
+    return list(_load_errors)
+
+
+def _all_detectors() -> dict[str, Detector]:
+    if _registry is None:
+        reload_detectors()
+    return _registry
+
+
 def available_detectors() -> list[str]:
-    return sorted(_DETECTORS)
+    """Names of the built-in detectors, user rules and blocklists."""
+    return sorted(_all_detectors())
 
 
-def run_detector(name: str, file_path: str | None = None, text: str | None = None) -> list[str]:
-    if name not in _DETECTORS:
-        raise ValueError(f"Unknown detector '{name}'. Available: {', '.join(available_detectors())}")
+def default_detectors() -> list[str]:
+    """Detectors run by ``all`` and by the summarizer; ``ipv6``, ``cidr`` and user rules must be named."""
+    return sorted(name for name, detector in _DETECTORS.items() if detector.default)
+
+
+def get_detectors(names: list[str] | None = None) -> dict[str, Detector]:
+    """Return compiled detectors for ``names`` (default: :func:`default_detectors`)."""
+    if not names:
+        return {name: _DETECTORS[name] for name in default_detectors()}
+    # Built-in names never need the user rules and blocklists loaded.
+    return {name: _DETECTORS[name] if name in _DETECTORS else _all_detectors()[name] for name in names}
+
+
+def detector_patterns(names: list[str] | None = None) -> dict[str, re.Pattern[str]]:
+    """Return the regexes for ``names`` (default: :func:`default_detectors`).
+
+    Validated detectors' regexes may match more than the detector reports.
+    User rules have no single regex and are left out.
+    """
+    return {name: detector.pattern for name, detector in get_detectors(names).items() if detector.pattern is not None}
+
+
+def resolve_detectors(spec: str) -> list[str]:
+    """Parse a ``--detect`` value such as ``ipv4,email`` or ``all`` into detector names.
+
+    ``all`` means the default detectors; it can be combined with optional ones
+    (``all,ipv6``). ``rules`` stands for every loaded user rule.
+    """
+    names = [part.strip() for part in spec.split(",") if part.strip()]
+    if "all" in names:
+        names = [*default_detectors(), *(name for name in names if name != "all")]
+    if "rules" in names:
+        _all_detectors()
+        at = names.index("rules")
+        names[at : at + 1] = _rule_names
+        names = [name for name in names if name != "rules"]
+    unknown = _unknown_names(names)
+    if unknown or not names:
+        raise _unknown_detector(", ".join(unknown) or spec)
+    return list(dict.fromkeys(names))
+
+
+def iter_detections(
+    names: list[str],
+    file_path: str | None = None,
+    text: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+    checkpoints: CheckpointStore | None = None,
+    index_dir: Path | None = INDEX_DIR,
+) -> Iterator[tuple[str, str]]:
+    """Yield ``(detector, match)`` pairs for several detectors in a single pass.
+
+    Files are consumed in line-aligned blocks so memory stays bounded by
+    ``chunk_size`` (plus the longest line) regardless of file size. Detector
+    patterns never match across newlines, so matches spanning a raw chunk edge
+    are carried into the next block instead of being split. Each block is read
+    and decoded once and every requested pattern runs over it, which keeps the
+    results identical to separate runs (a URL still reports its embedded IP).
+
+    With ``workers > 1`` the file is split into line-aligned byte ranges that are
+    scanned in a process pool; matches are still yielded in file order.
+
+    With ``checkpoints`` only the part of the file appended since the last
+    completed scan with the same detectors is read; cumulative per-detector match
+    counts are stored alongside the new offset once the iterator is exhausted.
+
+    gzip, bzip2, xz and zstd files are decompressed on the fly. Files made of
+    several independent members are decompressed and scanned in the process
+    pool; checkpoints do not apply to compressed files.
+
+    When the file has a :class:`grpx.index.LogIndex` in ``index_dir`` and every
+    detector contains a literal (``url`` does), only candidate blocks are read.
+    """
+    names = _check_names(names)
 
     if file_path:
-        content = Path(file_path).read_text(encoding="utf-8", errors="ignore")
-    elif text is not None:
-        content = text
-    else:
-        raise ValueError("Either file_path or text must be provided")
+        compression = detect_compression(Path(file_path))
+        if compression is not None:
+            return _iter_compressed_matches(names, Path(file_path), compression, chunk_size, workers)
+        if checkpoints is not None:
+            return _iter_resumable_matches(names, Path(file_path), chunk_size, workers, checkpoints, index_dir)
+        return _iter_file_range(names, Path(file_path), chunk_size, workers, index_dir=index_dir)
+    if text is not None:
+        return _iter_block_matches(names, text)
+    raise ValueError("Either file_path or text must be provided")
+
+
+def iter_file_set_detections(
+    names: list[str],
+    paths: list[Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> Iterator[tuple[str, str, str]]:
+    """Yield ``(path, detector, match)`` for every file in ``paths``.
+
+    Files are scheduled biggest first (see :func:`grpx.file_set.plan_file_tasks`)
+    on one pool of ``workers`` processes: large files are split into ranges and
+    small files share a task. Each file's matches are yielded together and in
+    file order.
+    """
+    names = _check_names(names)
+    tasks = plan_file_tasks(paths, workers)
+    if workers <= 1:
+        for task in tasks:
+            for path, start, end in task:
+                for name, match in _iter_piece_matches(names, path, start, end, chunk_size):
+                    yield path, name, match
+        return
+    for results in ordered_map(_detect_pieces, ((names, task, chunk_size) for task in tasks), workers):
+        for path, matches in results:
+            for name, match in matches:
+                yield path, name, match
+
+
+def iter_detector(
+    name: str,
+    file_path: str | None = None,
+    text: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> Iterator[str]:
+    """Yield matches for a single detector lazily; see :func:`iter_detections`."""
+    detections = iter_detections([name], file_path=file_path, text=text, chunk_size=chunk_size, workers=workers)
+    return (match for _, match in detections)
+
+
+def _check_names(names: list[str]) -> list[str]:
+    unknown = _unknown_names(names)
+    if unknown:
+        raise _unknown_detector(unknown[0])
+    return list(names)
+
+
+def _unknown_names(names: list[str]) -> list[str]:
+    # User rules and blocklists are only loaded when a name is not built in.
+    candidates = [name for name in names if name not in _DETECTORS]
+    return [name for name in candidates if name not in _all_detectors()]
+
+
+def _unknown_detector(label: str) -> ValueError:
+    message = f"Unknown detector '{label}'. Available: {', '.join(available_detectors())}"
+    if _load_errors:
+        message += f". Skipped: {'; '.join(_load_errors)}"
+    return ValueError(message)
+
+
+def _iter_file_range(
+    names: list[str],
+    path: Path,
+    chunk_size: int,
+    workers: int,
+    start: int = 0,
+    end: int | None = None,
+    index_dir: Path | None = None,
+) -> Iterator[tuple[str, str]]:
+    candidates = _candidate_ranges(names, path, start, end, index_dir)
+    if candidates is not None:
+        return (
+            detection for lo, hi in candidates for detection in _iter_file_matches(names, path, chunk_size, lo, hi)
+        )
+    if workers > 1:
+        ranges = line_aligned_ranges(path, workers, start=start, end=end)
+        if len(ranges) > 1:
+            return _iter_parallel_matches(names, str(path), ranges, chunk_size, workers)
+    return _iter_file_matches(names, path, chunk_size, start, end)
 
-    return _DETECTORS[name].findall(content)
+
+def _candidate_ranges(
+    names: list[str], path: Path, start: int, end: int | None, index_dir: Path | None
+) -> list[tuple[int, int | None]] | None:
+    index = LogIndex.find(path, index_dir) if index_dir is not None else None
+    if index is None:
+        return None
+    patterns = detector_patterns(names)
+    if len(patterns) < len(names):
+        index.close()
+        return None
+    try:
+        plan = index.candidate_ranges(patterns.values())
+    finally:
+        index.close()
+    return None if plan is None else clip_ranges(*plan, start, end)
+
+
+def _iter_resumable_matches(
+    names: list[str],
+    path: Path,
+    chunk_size: int,
+    workers: int,
+    checkpoints: CheckpointStore,
+    index_dir: Path | None = None,
+) -> Iterator[tuple[str, str]]:
+    checkpoint = checkpoints.begin(
+        path, json.dumps(["detect", sorted(names)]), load=lambda state: {name: int(state[name]) for name in names}
+    )
+    counts = checkpoint.state or dict.fromkeys(names, 0)
+    detections = _iter_file_range(names, path, chunk_size, workers, checkpoint.start, checkpoint.end, index_dir)
+    for name, match in detections:
+        counts[name] += 1
+        yield name, match
+    checkpoint.commit(counts)
+
+
+def _iter_compressed_matches(
+    names: list[str], path: Path, compression: str, chunk_size: int, workers: int
+) -> Iterator[tuple[str, str]]:
+    ranges = member_ranges(path, compression) if workers > 1 else []
+    if len(ranges) > 1:
+        for matches in map_decompressed(path, compression, ranges, _detect_block, (names,), workers):
+            yield from matches
+        return
+    with open_decompressed(path, compression) as fh:
+        for block in iter_line_blocks(fh, chunk_size):
+            yield from _iter_block_matches(names, block.decode("utf-8", errors="ignore"))
+
+
+def _iter_block_matches(names: list[str], block: str) -> Iterator[tuple[str, str]]:
+    detectors = get_detectors(names)
+    # User rules share an engine: scan the block with it once for all of them.
+    scans: dict[int, dict[str, list[str]]] = {}
+    for name in names:
+        detector = detectors[name]
+        if detector.engine is None:
+            found = detector.findall(block)
+        else:
+            key = id(detector.engine)
+            if key not in scans:
+                scans[key] = detector.engine.scan(block)
+            found = scans[key].get(name, [])
+        for match in found:
+            yield name, match
+
+
+def _iter_file_matches(
+    names: list[str], path: Path, chunk_size: int, start: int = 0, end: int | None = None
+) -> Iterator[tuple[str, str]]:
+    with path.open("rb") as fh:
+        fh.seek(start)
+        limit = None if end is None else end - start
+        for block in iter_line_blocks(fh, chunk_size, limit=limit):
+            yield from _iter_block_matches(names, block.decode("utf-8", errors="ignore"))
+
+
+def _iter_parallel_matches(
+    names: list[str], file_path: str, ranges: list[tuple[int, int]], chunk_size: int, workers: int
+) -> Iterator[tuple[str, str]]:
+    tasks = ((names, file_path, start, end, chunk_size) for start, end in ranges)
+    for matches in ordered_map(_detect_range, tasks, workers):
+        yield from matches
+
+
+def _detect_range(
+    names: list[str], file_path: str, start: int, end: int, chunk_size: int
+) -> list[tuple[str, str]]:
+    """Process-pool entry point: run detectors over a line-aligned byte range."""
+    return list(_iter_file_matches(names, Path(file_path), chunk_size, start, end))
+
+
+def _iter_piece_matches(
+    names: list[str], path: str, start: int, end: int | None, chunk_size: int
+) -> Iterator[tuple[str, str]]:
+    compression = detect_compression(Path(path))
+    if compression is not None:
+        return _iter_compressed_matches(names, Path(path), compression, chunk_size, workers=1)
+    return _iter_file_matches(names, Path(path), chunk_size, start, end)
+
+
+def _detect_pieces(
+    names: list[str], pieces: list[Piece], chunk_size: int
+) -> list[tuple[str, list[tuple[str, str]]]]:
+    """Process-pool entry point: run detectors over the files and ranges of one scheduled task."""
+    return [(path, list(_iter_piece_matches(names, path, start, end, chunk_size))) for path, start, end in pieces]
+
+
+def _detect_block(data: bytes, names: list[str]) -> list[tuple[str, str]]:
+    """Process-pool entry point: run detectors over a block of whole decompressed lines."""
+    return list(_iter_block_matches(names, data.decode("utf-8", errors="ignore")))
+
+
+def run_detector(name: str, file_path: str | None = None, text: str | None = None) -> list[str]:
+    return list(iter_detector(name, file_path=file_path, text=text))
@@ -3,28 +3,159 @@
 from __future__ import annotations
 
 import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator
 
-from grpx.file_stream import FileStreamProcessor
-from grpx.providers import BaseProvider
+from grpx.checkpoint import CheckpointStore
+from grpx.file_stream import FileStreamProcessor, iter_file_set_lines, summarize_files
+from grpx.providers import BaseProvider, CachingProvider, ResponseCache
+
+# Rough characters-per-token ratio used to budget chunks without a tokenizer.
+CHARS_PER_TOKEN = 4
+# File names spelled out when a prompt covers several files.
+_LABEL_FILES = 3
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def iter_token_chunks(lines: Iterable[str], token_budget: int) -> Iterator[str]:
+    """Group consecutive lines into chunks that stay within ``token_budget`` tokens."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    chunk: list[str] = []
+    size = 0
+    for line in lines:
+        line = line[:max_chars]
+        if chunk and size + len(line) + 1 > max_chars:
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        yield "\n".join(chunk)
+
+
+def _files_label(paths: list[str]) -> str:
+    if len(paths) == 1:
+        return paths[0]
+    shown = ", ".join(paths[:_LABEL_FILES])
+    more = len(paths) - _LABEL_FILES
+    return f"{len(paths)} files ({shown}, and {more} more)" if more > 0 else f"{len(paths)} files ({shown})"
+
+
+def _pack_partials(partials: list[str], token_budget: int) -> list[list[str]]:
+    """Pack partial answers into groups within ``token_budget``.
+
+    Every group holds at least two partials (when available) so each reduce round
+    strictly shrinks the number of answers, even if individual answers are large.
+    """
+    groups: list[list[str]] = []
+    group: list[str] = []
+    size = 0
+    for partial in partials:
+        tokens = estimate_tokens(partial)
+        if len(group) >= 2 and size + tokens > token_budget:
+            groups.append(group)
+            group, size = [], 0
+        group.append(partial)
+        size += tokens
+    if group:
+        if len(group) == 1 and groups:
+            groups[-1].append(group[0])
+        else:
+            groups.append(group)
+    return groups
 
 
 class PromptExecutor:
     """Execute prompt workflows with local-first file processing."""
 
-    def __init__(self, provider: BaseProvider, allow_content_to_ai: bool = False) -> None:
+    def __init__(
+        self,
+        provider: BaseProvider,
+        allow_content_to_ai: bool = False,
+        chunk_tokens: int = 3000,
+        parallelism: int = 4,
+        use_cache: bool = True,
+        cache: ResponseCache | None = None,
+        checkpoints: CheckpointStore | None = None,
+    ) -> None:
+        """Responses are cached on disk by default; pass ``use_cache=False`` to always call the provider.
+
+        With ``checkpoints`` files are resumed: only data appended since the last
+        run is read, and privacy-mode summaries accumulate across runs.
+        """
+        if use_cache:
+            provider = CachingProvider(provider, cache or ResponseCache())
         self.provider = provider
         self.allow_content_to_ai = allow_content_to_ai
+        self.chunk_tokens = chunk_tokens
+        self.parallelism = max(1, parallelism)
+        self.checkpoints = checkpoints
 
     def apply_to_file(
         self,
-        file_path: str,
+        file_path: str | list[str],
+        prompt: str,
+        include: str | None = None,
+        exclude: str | None = None,
+        max_lines: int = 5000,
+        workers: int = 1,
+        map_reduce: bool = False,
+    ) -> str:
+        model_input = self.build_model_input(file_path, prompt, include, exclude, max_lines, workers, map_reduce)
+        return self.provider.generate(model_input)
+
+    def stream_file(
+        self,
+        file_path: str | list[str],
         prompt: str,
         include: str | None = None,
         exclude: str | None = None,
         max_lines: int = 5000,
+        workers: int = 1,
+        map_reduce: bool = False,
+    ) -> Iterator[str]:
+        """Like :meth:`apply_to_file` but yield the answer as the provider streams it."""
+        model_input = self.build_model_input(file_path, prompt, include, exclude, max_lines, workers, map_reduce)
+        return self.provider.stream(model_input)
+
+    def build_model_input(
+        self,
+        file_path: str | list[str],
+        prompt: str,
+        include: str | None = None,
+        exclude: str | None = None,
+        max_lines: int = 5000,
+        workers: int = 1,
+        map_reduce: bool = False,
     ) -> str:
-        processor = FileStreamProcessor(Path(file_path), include=include, exclude=exclude)
+        """Return the final provider input for a file, or for a list of files.
+
+        Several files are read as one stream (biggest first, on one worker pool);
+        the summary reports per-file line and severity counts next to the
+        combined statistics, and shared lines are prefixed with their path.
+        In map-reduce mode (content sharing only) the whole filtered stream is
+        analysed chunk by chunk first; the returned input is the reduce prompt.
+        ``max_lines`` only caps the plain content excerpt: the privacy-mode summary
+        always covers the whole file.
+        """
+        if not isinstance(file_path, str):
+            if not file_path:
+                raise ValueError("No files found to read")
+            if len(file_path) > 1:
+                return self._file_set_input(file_path, prompt, include, exclude, max_lines, workers, map_reduce)
+            file_path = file_path[0]
+        processor = FileStreamProcessor(
+            Path(file_path), include=include, exclude=exclude, workers=workers, checkpoints=self.checkpoints
+        )
+
+        if self.allow_content_to_ai and map_reduce:
+            return self._map_reduce_input(file_path, prompt, processor.iter_lines())
 
         if self.allow_content_to_ai:
             lines = []
@@ -39,7 +170,7 @@ class PromptExecutor:
                 + "\n".join(lines)
             )
         else:
-            summary = processor.summarize(max_lines=max_lines)
+            summary = processor.summarize()
             model_input = (
                 f"User prompt:\n{prompt}\n\n"
                 f"File: {file_path}\n"
@@ -47,5 +178,91 @@ class PromptExecutor:
                 f"{json.dumps(summary, indent=2)}\n"
                 "Provide recommendations based on this metadata only."
             )
+        return model_input
 
-        return self.provider.generate(model_input)
+    def _file_set_input(
+        self,
+        file_paths: list[str],
+        prompt: str,
+        include: str | None,
+        exclude: str | None,
+        max_lines: int,
+        workers: int,
+        map_reduce: bool,
+    ) -> str:
+        label = _files_label(file_paths)
+        paths = [Path(path) for path in file_paths]
+        if self.allow_content_to_ai:
+            lines = (f"{path}: {line}" for path, line in iter_file_set_lines(paths, include, exclude, workers))
+            if map_reduce:
+                return self._map_reduce_input(label, prompt, lines)
+            return (
+                f"User prompt:\n{prompt}\n\n"
+                f"Files: {label}\n"
+                "Content excerpt follows, one line per entry prefixed with its file:\n"
+                + "\n".join(islice(lines, max_lines))
+            )
+        summary = summarize_files(paths, include, exclude, workers)
+        return (
+            f"User prompt:\n{prompt}\n\n"
+            f"Files: {label}\n"
+            "Local analysis summary across all files (raw content not shared):\n"
+            f"{json.dumps(summary, indent=2)}\n"
+            "Provide recommendations based on this metadata only."
+        )
+
+    def _map_reduce_input(self, file_path: str, prompt: str, lines: Iterable[str]) -> str:
+        chunks = iter_token_chunks(lines, self.chunk_tokens)
+        first = next(chunks, "")
+        second = next(chunks, None)
+        if second is None:
+            return f"User prompt:\n{prompt}\n\nFile: {file_path}\nContent follows:\n{first}"
+
+        def _all_chunks() -> Iterator[str]:
+            yield first
+            yield second
+            yield from chunks
+
+        map_inputs = (
+            f"User prompt:\n{prompt}\n\n"
+            f"File: {file_path} (part {idx})\n"
+            "This is one part of a larger file. Report only findings from this part that are "
+            "relevant to the prompt, concisely, citing concrete values.\n"
+            f"Content follows:\n{chunk}"
+            for idx, chunk in enumerate(_all_chunks(), start=1)
+        )
+        partials = list(self._generate_ordered(map_inputs))
+
+        # Reduce hierarchically until the partial answers fit in one request.
+        while True:
+            labelled = [f"[part {idx}]\n{text.strip()}" for idx, text in enumerate(partials, start=1)]
+            groups = _pack_partials(labelled, self.chunk_tokens)
+            reduce_inputs = [self._reduce_input(file_path, prompt, "\n\n".join(group)) for group in groups]
+            if len(reduce_inputs) == 1:
+                return reduce_inputs[0]
+            partials = list(self._generate_ordered(reduce_inputs))
+
+    @staticmethod
+    def _reduce_input(file_path: str, prompt: str, partials: str) -> str:
+        return (
+            f"User prompt:\n{prompt}\n\n"
+            f"File: {file_path}\n"
+            "The file was analysed in consecutive parts. Partial findings follow, one block per part:\n"
+            f"{partials}\n\n"
+            "Combine them into a single answer to the prompt, merging duplicates and keeping concrete details."
+        )
+
+    def _generate_ordered(self, inputs: Iterable[str]) -> Iterator[str]:
+        """Call the provider for each input with bounded parallelism, yielding in input order."""
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="grpx-map") as pool:
+            pending: deque[Future[str]] = deque()
+            try:
+                for model_input in inputs:
+                    pending.append(pool.submit(self.provider.generate, model_input))
+                    if len(pending) >= 2 * self.parallelism:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
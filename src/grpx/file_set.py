@@ -0,0 +1,85 @@
+"""Expand file, glob and directory arguments and schedule file sets on the process pool."""
+
+from __future__ import annotations
+
+import glob
+from pathlib import Path
+from typing import Iterable
+
+from grpx.compression import detect_compression
+from grpx.parallel import DEFAULT_RANGE_SIZE, line_aligned_ranges
+
+# One unit of work: a file path and a line-aligned byte range, or ``None`` for
+# the whole file (compressed files cannot be split by byte offset).
+Piece = tuple[str, int, "int | None"]
+
+# Small files are packed into tasks of at least total/(workers * this) bytes, so
+# there are enough tasks to balance the pool without one task per tiny file.
+_TASKS_PER_WORKER = 4
+
+
+def expand_paths(specs: Iterable[str], recursive: bool = False) -> list[Path]:
+    """Resolve ``-f`` arguments into a de-duplicated list of files.
+
+    A directory contributes the files directly inside it, or every file below it
+    with ``recursive``. Glob patterns are expanded (``**`` matches any depth).
+    Plain paths are kept as given so a missing file is reported when it is opened.
+    Raises :class:`ValueError` when nothing is left, e.g. for an empty directory.
+    """
+    specs = list(specs)
+    paths: dict[Path, None] = {}
+    for spec in specs:
+        if glob.has_magic(spec):
+            matches = [Path(match) for match in sorted(glob.glob(spec, recursive=True))]
+            if not matches:
+                raise ValueError(f"No files match '{spec}'")
+            for match in matches:
+                if match.is_dir():
+                    paths.update(dict.fromkeys(_walk(match, recursive)))
+                elif match.is_file():
+                    paths[match] = None
+        elif Path(spec).is_dir():
+            paths.update(dict.fromkeys(_walk(Path(spec), recursive)))
+        else:
+            paths[Path(spec)] = None
+    if not paths:
+        hint = "" if recursive else " (use -r for subdirectories)"
+        raise ValueError(f"No files found under {', '.join(specs)}{hint}")
+    return list(paths)
+
+
+def _walk(directory: Path, recursive: bool) -> list[Path]:
+    entries = directory.rglob("*") if recursive else directory.iterdir()
+    return sorted(path for path in entries if path.is_file())
+
+
+def plan_file_tasks(
+    paths: Iterable[Path], workers: int, range_size: int = DEFAULT_RANGE_SIZE
+) -> list[list[Piece]]:
+    """Group files into pool tasks, biggest first, so the pool finishes evenly.
+
+    Files larger than ``range_size`` are split into line-aligned ranges, one per
+    task; smaller files are packed together so a directory of thousands of small
+    logs costs a few dozen tasks rather than one per file. Every file's pieces
+    are consecutive and in file order, so results taken in task order are grouped
+    per file.
+    """
+    sizes = {path: path.stat().st_size for path in paths}
+    total = sum(sizes.values())
+    target = max(1, min(range_size, total // max(1, workers * _TASKS_PER_WORKER)))
+    tasks: list[list[Piece]] = []
+    batch: list[Piece] = []
+    batch_size = 0
+    for path in sorted(sizes, key=lambda item: (-sizes[item], str(item))):
+        size = sizes[path]
+        if size > range_size and detect_compression(path) is None:
+            tasks.extend([(str(path), start, end)] for start, end in line_aligned_ranges(path, 1, range_size))
+            continue
+        batch.append((str(path), 0, None))
+        batch_size += size
+        if batch_size >= target:
+            tasks.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        tasks.append(batch)
+    return tasks
@@ -2,40 +2,709 @@
 
 from __future__ import annotations
 
+import json
+import mmap
 import re
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterable, Iterator
+
+from grpx.checkpoint import CheckpointStore
+from grpx.compression import detect_compression, map_decompressed, member_ranges, open_decompressed
+from grpx.file_set import Piece, plan_file_tasks
+from grpx.follow import DEFAULT_POLL_INTERVAL, FileFollower
+from grpx.index import INDEX_DIR, LogIndex
+from grpx.parallel import line_aligned_ranges, ordered_map
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+if TYPE_CHECKING:
+    from grpx.records import RecordBatch
+    from grpx.summary import LogSummarizer
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Per-file entries listed in a multi-file summary, largest files first.
+MAX_SUMMARY_FILES = 100
+
+_REPEATS = tuple(
+    getattr(_sre_parse, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_sre_parse, name)
+)
+# ASCII letters that Unicode IGNORECASE also matches against non-ASCII characters (K, ſ, İ, ı).
+_FOLDS_BEYOND_ASCII = frozenset("iksIKS")
+
+
+def iter_line_blocks(
+    fh: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE, limit: int | None = None
+) -> Iterator[bytes]:
+    """Yield fixed-size binary chunks of ``fh`` trimmed to whole lines.
+
+    Each block ends on a newline (except possibly the last one), so patterns that
+    never span a line boundary can be applied to blocks independently. When
+    ``limit`` is given, at most that many bytes are read from the current position.
+    """
+    carry = b""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        chunk = fh.read(chunk_size if remaining is None else min(chunk_size, remaining))
+        if not chunk:
+            break
+        if remaining is not None:
+            remaining -= len(chunk)
+        buffer = carry + chunk
+        cut = buffer.rfind(b"\n")
+        if cut < 0:
+            carry = buffer
+            continue
+        carry = buffer[cut + 1 :]
+        yield buffer[: cut + 1]
+    if carry:
+        yield carry
 
 
 class FileStreamProcessor:
     """Stream files line-by-line and filter locally without LLM uploads."""
 
-    def __init__(self, file_path: Path, include: str | None = None, exclude: str | None = None) -> None:
+    def __init__(
+        self,
+        file_path: Path,
+        include: str | None = None,
+        exclude: str | None = None,
+        workers: int = 1,
+        use_mmap: bool = True,
+        checkpoints: CheckpointStore | None = None,
+        index_dir: Path | None = INDEX_DIR,
+    ) -> None:
+        """With ``checkpoints``, :meth:`iter_lines` and :meth:`summarize` resume after the last finished scan.
+
+        gzip, bzip2, xz and zstd files are decompressed transparently; they are
+        always read whole, so checkpoints do not apply to them. When the file has
+        a :class:`grpx.index.LogIndex` in ``index_dir``, include filters only read
+        the blocks the index names as candidates (pass ``None`` to never use one).
+        """
         self.file_path = file_path
+        self.compression = detect_compression(file_path)
         self.include = re.compile(include) if include else None
         self.exclude = re.compile(exclude) if exclude else None
+        self.workers = workers
+        self.use_mmap = use_mmap
+        self.checkpoints = checkpoints
+        self.index_dir = index_dir
+        self._include_bytes = _bytes_pattern(self.include)
+        self._exclude_bytes = _bytes_pattern(self.exclude)
 
     def iter_lines(self) -> Iterable[str]:
-        with self.file_path.open("r", encoding="utf-8", errors="ignore") as fh:
-            for line in fh:
-                candidate = line.rstrip("\n")
-                if self.include and not self.include.search(candidate):
-                    continue
-                if self.exclude and self.exclude.search(candidate):
-                    continue
+        if self.checkpoints is not None and self.compression is None:
+            return self._iter_lines_resumable()
+        return self._iter_lines(0, None)
+
+    def _iter_lines(self, start: int, end: int | None) -> Iterable[str]:
+        if self.compression is not None:
+            return self._iter_decompressed()
+        candidates = self._candidate_ranges(start, end)
+        if candidates is not None:
+            return self._iter_candidates(candidates)
+        if self.workers > 1:
+            ranges = line_aligned_ranges(self.file_path, self.workers, start=start, end=end)
+            if len(ranges) > 1:
+                return self._iter_lines_parallel(ranges)
+        return self.iter_range(start, end)
+
+    def _candidate_ranges(self, start: int, end: int | None) -> list[tuple[int, int | None]] | None:
+        """Byte ranges of ``[start, end)`` that the file's index says may match, or ``None`` to scan it all."""
+        if self.include is None or self.index_dir is None:
+            return None
+        index = LogIndex.find(self.file_path, self.index_dir)
+        if index is None:
+            return None
+        try:
+            plan = index.candidate_ranges([self.include])
+        finally:
+            index.close()
+        if plan is None:
+            return None
+        ranges, indexed_end = plan
+        return clip_ranges(ranges, indexed_end, start, end)
+
+    def _iter_candidates(self, ranges: list[tuple[int, int | None]]) -> Iterator[str]:
+        for start, end in ranges:
+            yield from self.iter_range(start, end)
+
+    def _iter_lines_resumable(self) -> Iterator[str]:
+        """Yield lines appended since the last fully consumed scan; record the new offset at the end."""
+        checkpoint = self.checkpoints.begin(self.file_path, self._scan_kind("lines"))
+        yield from self._iter_lines(checkpoint.start, checkpoint.end)
+        checkpoint.commit()
+
+    def _scan_kind(self, kind: str) -> str:
+        return json.dumps([kind, *self._patterns()])
+
+    def iter_range(self, start: int, end: int | None) -> Iterator[str]:
+        """Yield filtered lines whose first byte lies in ``[start, end)``."""
+        if self.compression is not None:
+            raise ValueError(f"Byte ranges of {self.compression}-compressed files cannot be read directly")
+        if self._can_use_mmap():
+            return self._iter_range_mmap(start, end)
+        return self._iter_range_text(start, end)
+
+    def _can_use_mmap(self) -> bool:
+        return self.use_mmap and self.file_path.is_file() and self._can_filter_bytes()
+
+    def _can_filter_bytes(self) -> bool:
+        if self.include and self._include_bytes is None:
+            return False
+        if self.exclude and self._exclude_bytes is None:
+            return False
+        return True
+
+    def _iter_range_mmap(self, start: int, end: int | None) -> Iterator[str]:
+        """Filter lines on the raw mapped buffer and decode only the survivors."""
+        with self.file_path.open("rb") as fh:
+            size = fh.seek(0, 2)
+            if size == 0:
+                return
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from self._iter_buffer(mm, start, size if end is None else min(end, size))
+
+    def _iter_buffer(self, buffer: bytes | mmap.mmap, start: int, end: int) -> Iterator[str]:
+        """Yield filtered lines starting in ``buffer[start:end]`` using the bytes patterns.
+
+        With an include pattern the regex engine scans the whole buffer for the
+        next candidate, so lines that cannot match are never sliced or decoded.
+        """
+        size = len(buffer)
+        include = self._include_bytes
+        exclude = self._exclude_bytes
+        pos = start
+        while pos < end:
+            if include is not None:
+                match = include.search(buffer, pos, end)
+                if match is None:
+                    return
+                newline = buffer.rfind(b"\n", pos, match.start())
+                line_start = newline + 1 if newline >= 0 else pos
+                line_end = buffer.find(b"\n", match.start())
+            else:
+                line_start = pos
+                line_end = buffer.find(b"\n", pos)
+            if line_end < 0:
+                line_end = size
+            pos = line_end + 1
+
+            raw = buffer[line_start:line_end].rstrip(b"\r")
+            crosses_line = include is not None and match.end() > line_start + len(raw)
+            if crosses_line and not include.search(raw):
+                continue
+            if exclude is not None and exclude.search(raw):
+                continue
+            yield raw.decode("utf-8", errors="ignore")
+
+    def _iter_block(self, block: bytes) -> Iterator[str]:
+        """Yield filtered lines of an in-memory block of whole lines."""
+        if self._can_filter_bytes():
+            yield from self._iter_buffer(block, 0, len(block))
+            return
+        lines = block.split(b"\n")
+        if block.endswith(b"\n"):
+            lines.pop()
+        for raw in lines:
+            candidate = raw.rstrip(b"\r").decode("utf-8", errors="ignore")
+            if self._matches(candidate):
                 yield candidate
 
-    def summarize(self, max_lines: int = 5000) -> dict[str, int]:
-        total = 0
-        errors = 0
-        warnings = 0
-        for idx, line in enumerate(self.iter_lines()):
-            if idx >= max_lines:
-                break
-            total += 1
-            lowered = line.lower()
-            if "error" in lowered:
-                errors += 1
-            if "warn" in lowered:
-                warnings += 1
-        return {"line_count": total, "error_lines": errors, "warning_lines": warnings}
+    def _iter_decompressed(self) -> Iterator[str]:
+        """Yield filtered lines of a compressed file, decompressing independent members in parallel."""
+        ranges = member_ranges(self.file_path, self.compression) if self.workers > 1 else []
+        if len(ranges) > 1:
+            args = (str(self.file_path), *self._patterns())
+            for lines in map_decompressed(self.file_path, self.compression, ranges, _filter_block, args, self.workers):
+                yield from lines
+            return
+        with open_decompressed(self.file_path, self.compression) as fh:
+            for block in iter_line_blocks(fh):
+                yield from self._iter_block(block)
+
+    def _patterns(self) -> tuple[str | None, str | None]:
+        include = self.include.pattern if self.include else None
+        exclude = self.exclude.pattern if self.exclude else None
+        return include, exclude
+
+    def _iter_range_text(self, start: int, end: int | None) -> Iterator[str]:
+        with self.file_path.open("rb") as fh:
+            fh.seek(start)
+            pos = start
+            for raw in fh:
+                if end is not None and pos >= end:
+                    break
+                pos += len(raw)
+                candidate = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+                if self._matches(candidate):
+                    yield candidate
+
+    def _matches(self, line: str) -> bool:
+        if self.include and not self.include.search(line):
+            return False
+        if self.exclude and self.exclude.search(line):
+            return False
+        return True
+
+    def follow(
+        self,
+        from_start: bool = False,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        idle_timeout: float | None = None,
+    ) -> Iterator[str]:
+        """Yield filtered lines as they are appended to the file, like ``tail -F``.
+
+        Only new bytes are read and filtered; rotation, truncation and a missing
+        file are handled by :class:`grpx.follow.FileFollower`. Runs until the
+        consumer stops or, if ``idle_timeout`` is given, the file stays quiet that long.
+        """
+        if self.compression is not None:
+            raise ValueError(f"Cannot follow {self.compression}-compressed file {self.file_path}")
+        follower = FileFollower(self.file_path, from_start=from_start, poll_interval=poll_interval)
+        for block in follower.iter_blocks(idle_timeout):
+            yield from self._iter_block(block)
+
+    def _iter_lines_parallel(self, ranges: list[tuple[int, int]]) -> Iterator[str]:
+        include, exclude = self._patterns()
+        tasks = ((str(self.file_path), include, exclude, start, end) for start, end in ranges)
+        for lines in ordered_map(_filter_range, tasks, self.workers):
+            yield from lines
+
+    def summarize(self, max_lines: int | None = None, top_k: int = 20) -> dict[str, Any]:
+        """Summarize the filtered lines without keeping their content.
+
+        The whole file is covered by default; all statistics live in fixed-memory
+        sketches (see :class:`grpx.summary.LogSummarizer`). With ``workers > 1``
+        line-aligned byte ranges are summarized in a process pool and merged.
+        With ``checkpoints`` only the bytes appended since the last summary are
+        read and merged into the stored statistics. ``max_lines`` limits the
+        summary to the first lines of the file instead (and ignores checkpoints).
+        Compressed files are summarized whole, per member in parallel when possible.
+        """
+        # Imported here: grpx.summary depends on grpx.detectors, which imports this module.
+        from grpx.summary import LogSummarizer
+
+        if max_lines is not None:
+            summarizer = LogSummarizer(top_k=top_k)
+            summarizer.feed(islice(self._iter_lines(0, None), max_lines))
+            return summarizer.result()
+
+        if self.compression is not None:
+            return self._summarize_decompressed(top_k)
+
+        checkpoint = None
+        start, end = 0, None
+        if self.checkpoints is not None:
+            kind = self._scan_kind(f"summary:{top_k}")
+            checkpoint = self.checkpoints.begin(self.file_path, kind, load=LogSummarizer.from_state)
+            start, end = checkpoint.start, checkpoint.end
+
+        parts: Iterable[LogSummarizer]
+        ranges = line_aligned_ranges(self.file_path, self.workers, start=start, end=end) if self.workers > 1 else []
+        if len(ranges) > 1:
+            include, exclude = self._patterns()
+            tasks = ((str(self.file_path), include, exclude, lo, hi, top_k) for lo, hi in ranges)
+            parts = ordered_map(_summarize_range, tasks, self.workers)
+        else:
+            part = LogSummarizer(top_k=top_k, seed=start)
+            part.feed(self.iter_range(start, end))
+            parts = [part]
+
+        summarizer = checkpoint.state if checkpoint is not None else None
+        for part in parts:
+            if summarizer is None:
+                summarizer = part
+            else:
+                summarizer.merge(part)
+
+        if checkpoint is not None:
+            checkpoint.commit(summarizer.to_state())
+        return summarizer.result()
+
+    def iter_records(
+        self,
+        format: str = "auto",
+        batch_size: int | None = None,
+        where: str | None = None,
+        keep_lines: bool = False,
+    ) -> Iterator[RecordBatch]:
+        """Yield the filtered lines parsed into columnar batches (see :mod:`grpx.records`).
+
+        Each batch holds at most ``batch_size`` records. ``where`` is a
+        :mod:`grpx.query` expression; only matching records are kept, and empty
+        batches are skipped. With ``workers > 1`` line-aligned byte ranges are
+        parsed in a process pool; batches still arrive in file order.
+        """
+        from grpx.records import RecordParser
+        from grpx.summary import BATCH_LINES
+
+        batch_size = batch_size or BATCH_LINES
+        format = self._record_format(format)
+        scanner = self._query_scanner(where)
+        ranges = self._record_ranges()
+        if len(ranges) > 1:
+            include, exclude = scanner._patterns()
+            tasks = (
+                (str(self.file_path), include, exclude, lo, hi, format, batch_size, where, keep_lines)
+                for lo, hi in ranges
+            )
+            for batches in ordered_map(_parse_range, tasks, self.workers):
+                yield from batches
+            return
+        lines = _require_literals(scanner._iter_lines(0, None), where)
+        yield from select_records(RecordParser(format, keep_lines).iter_batches(lines, batch_size), where)
+
+    def iter_where(self, where: str, format: str = "auto") -> Iterator[str]:
+        """Yield the lines whose parsed records match the query ``where``, in file order."""
+        for batch in self.iter_records(format, where=where, keep_lines=True):
+            yield from batch.lines
+
+    def group_counts(
+        self, keys: list[str], format: str = "auto", where: str | None = None
+    ) -> dict[tuple[Any, ...], list[int]]:
+        """Count records and error-level records per combination of the ``keys`` columns.
+
+        Ranges are counted in the worker processes, so only the per-group counts
+        cross process boundaries. ``where`` restricts the count to matching records.
+        """
+        from grpx.records import group_counts, merge_group_counts
+
+        format = self._record_format(format)
+        ranges = self._record_ranges()
+        if len(ranges) <= 1:
+            return group_counts(self.iter_records(format, where=where), keys)
+        include, exclude = self._query_scanner(where)._patterns()
+        tasks = ((str(self.file_path), include, exclude, lo, hi, format, keys, where) for lo, hi in ranges)
+        groups: dict[tuple[Any, ...], list[int]] = {}
+        for part in ordered_map(_group_range, tasks, self.workers):
+            merge_group_counts(groups, part)
+        return groups
+
+    def _query_scanner(self, where: str | None) -> FileStreamProcessor:
+        """Return a processor whose include pattern is the query's longest required literal.
+
+        Lines without it are skipped on the raw bytes (and, with an index, whole
+        blocks are), so they are never decoded or parsed. An explicit ``include``
+        is kept as it is.
+        """
+        from grpx.query import compile_query
+
+        if where is None or self.include is not None:
+            return self
+        literals = compile_query(where).literals
+        if not literals:
+            return self
+        exclude = self.exclude.pattern if self.exclude else None
+        return FileStreamProcessor(
+            self.file_path,
+            include=re.escape(literals[0]),
+            exclude=exclude,
+            workers=self.workers,
+            use_mmap=self.use_mmap,
+            index_dir=self.index_dir,
+        )
+
+    def _record_ranges(self) -> list[tuple[int, int]]:
+        if self.workers <= 1 or self.compression is not None:
+            return []
+        return line_aligned_ranges(self.file_path, self.workers)
+
+    def _record_format(self, format: str) -> str:
+        """Resolve ``auto`` once from the first non-empty line, so every worker parses alike."""
+        from grpx.records import detect_format
+
+        if format != "auto":
+            return format
+        with open_decompressed(self.file_path, self.compression) as fh:
+            for raw in islice(fh, 1000):
+                line = raw.decode("utf-8", errors="ignore").strip()
+                if line:
+                    return detect_format(line)
+        return "kv"
+
+    def _summarize_decompressed(self, top_k: int) -> dict[str, Any]:
+        from grpx.summary import LogSummarizer
+
+        summarizer = LogSummarizer(top_k=top_k)
+        ranges = member_ranges(self.file_path, self.compression) if self.workers > 1 else []
+        if len(ranges) > 1:
+            args = (str(self.file_path), *self._patterns(), top_k)
+            for part in map_decompressed(self.file_path, self.compression, ranges, _summarize_block, args, self.workers):
+                summarizer.merge(part)
+        else:
+            summarizer.feed(self._iter_decompressed())
+        return summarizer.result()
+
+
+def clip_ranges(
+    ranges: list[tuple[int, int]], indexed_end: int, start: int, end: int | None
+) -> list[tuple[int, int | None]]:
+    """Restrict index candidate ranges to ``[start, end)`` and add the unindexed tail."""
+    clipped: list[tuple[int, int | None]] = []
+    for lo, hi in ranges:
+        lo, hi = max(lo, start), hi if end is None else min(hi, end)
+        if lo < hi:
+            clipped.append((lo, hi))
+    tail = max(start, indexed_end)
+    if end is None or tail < end:
+        clipped.append((tail, end))
+    return clipped
+
+
+def select_records(batches: Iterable[RecordBatch], where: str | None) -> Iterator[RecordBatch]:
+    """Yield the records of ``batches`` matching the query ``where`` (all of them for ``None``)."""
+    from grpx.query import compile_query
+
+    if where is None:
+        yield from batches
+        return
+    query = compile_query(where)
+    for batch in batches:
+        selected = query.filter(batch)
+        if selected.num_rows:
+            yield selected
+
+
+def _require_literals(lines: Iterable[str], where: str | None) -> Iterable[str]:
+    """Drop lines missing any substring the query ``where`` requires, before they are parsed."""
+    from grpx.query import compile_query
+
+    literals = compile_query(where).literals if where else []
+    if not literals:
+        return lines
+    return (line for line in lines if all(literal in line for literal in literals))
+
+
+def iter_file_set_lines(
+    paths: list[Path], include: str | None = None, exclude: str | None = None, workers: int = 1
+) -> Iterator[tuple[str, str]]:
+    """Yield ``(path, line)`` for the filtered lines of every file, scheduled biggest first.
+
+    All files share one pool of ``workers`` processes; see
+    :func:`grpx.file_set.plan_file_tasks`. Each file's lines stay together and in order.
+    """
+    tasks = plan_file_tasks(paths, workers)
+    if workers <= 1:
+        for task in tasks:
+            for path, start, end in task:
+                processor = FileStreamProcessor(Path(path), include=include, exclude=exclude)
+                for line in processor._iter_lines(start, end):
+                    yield path, line
+        return
+    for results in ordered_map(_filter_pieces, ((task, include, exclude) for task in tasks), workers):
+        for path, lines in results:
+            for line in lines:
+                yield path, line
+
+
+def summarize_files(
+    paths: list[Path], include: str | None = None, exclude: str | None = None, workers: int = 1, top_k: int = 20
+) -> dict[str, Any]:
+    """Summarize a set of files as one stream, with line and severity counts per file.
+
+    ``total`` is the merged :class:`grpx.summary.LogSummarizer` result; ``files``
+    lists the :data:`MAX_SUMMARY_FILES` files with the most filtered lines.
+    """
+    from grpx.summary import LogSummarizer
+
+    tasks = plan_file_tasks(paths, workers)
+    args = ((task, include, exclude, top_k) for task in tasks)
+    if workers > 1:
+        results: Iterable[list[tuple[str, LogSummarizer]]] = ordered_map(_summarize_pieces, args, workers)
+    else:
+        results = (_summarize_pieces(*task_args) for task_args in args)
+
+    total = LogSummarizer(top_k=top_k)
+    files: dict[str, dict[str, Any]] = {}
+    for parts in results:
+        for path, part in parts:
+            entry = files.setdefault(path, {"path": path, "line_count": 0, "severity": {}})
+            entry["line_count"] += part.line_count
+            for level, count in part.severity.items():
+                entry["severity"][level] = entry["severity"].get(level, 0) + count
+            total.merge(part)
+
+    listed = sorted(files.values(), key=lambda entry: (-entry["line_count"], entry["path"]))
+    return {"file_count": len(files), "files": listed[:MAX_SUMMARY_FILES], "total": total.result()}
+
+
+def _bytes_pattern(pattern: re.Pattern[str] | None) -> re.Pattern[bytes] | None:
+    """Compile a ``bytes`` pattern for the mmap path that selects the same lines, if one exists.
+
+    Only an allow-list of constructs is translated: ASCII literals and
+    non-negated classes of them, ``.*``, groups, alternation, repeats,
+    lookarounds and ``^`` (per line under ``re.MULTILINE``). Each of these
+    consumes one ASCII byte where the text pattern consumes one ASCII
+    character, and UTF-8 never reuses ASCII bytes inside multibyte characters.
+    ``\\w``, ``\\d``, ``\\s``, ``\\b`` and ``i``/``k``/``s`` under
+    IGNORECASE can match non-ASCII characters, so they are only accepted under
+    ``re.ASCII``. A lone ``.`` and negated classes match one character but one
+    byte, and ``\\A``, ``\\Z`` and ``$`` would anchor to the buffer, so those
+    and anything else keep the text path.
+    """
+    if pattern is None or not pattern.pattern.isascii():
+        return None
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except re.error:  # pragma: no cover - the text pattern compiled already
+        return None
+    if not _byte_safe(parsed, bool(pattern.flags & re.IGNORECASE), bool(pattern.flags & re.ASCII)):
+        return None
+    flags = (pattern.flags & ~(re.UNICODE | re.ASCII)) | re.MULTILINE
+    try:
+        return re.compile(pattern.pattern.encode("ascii"), flags)
+    except re.error:
+        return None
+
+
+def _byte_safe(items: Any, ignorecase: bool, ascii_only: bool, lookaround: bool = False) -> bool:
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            if not _byte_safe_char(av, av, ignorecase, ascii_only):
+                return False
+        elif op is _sre_parse.IN:
+            for item_op, item_av in av:
+                if item_op is _sre_parse.LITERAL:
+                    safe = _byte_safe_char(item_av, item_av, ignorecase, ascii_only)
+                elif item_op is _sre_parse.RANGE:
+                    safe = _byte_safe_char(*item_av, ignorecase, ascii_only)
+                elif item_op is _sre_parse.CATEGORY:
+                    # Under re.ASCII, \d, \w and \s are ASCII on both sides; \D, \W and \S
+                    # still match one multibyte character. In a lookaround, \s could see
+                    # the newline before the line.
+                    safe = ascii_only and (
+                        item_av in (_sre_parse.CATEGORY_DIGIT, _sre_parse.CATEGORY_WORD)
+                        or (item_av is _sre_parse.CATEGORY_SPACE and not lookaround)
+                    )
+                else:
+                    safe = False
+                if not safe:
+                    return False
+        elif op in _REPEATS:
+            low, high, item = av
+            if len(item) == 1 and item[0][0] is _sre_parse.ANY:
+                # Any run of bytes between ASCII positions is a run of whole characters.
+                if low != 0 or high != _sre_parse.MAXREPEAT:
+                    return False
+            elif not _byte_safe(item, ignorecase, ascii_only, lookaround):
+                return False
+        elif op is _sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, item = av
+            scoped_ignorecase = (ignorecase or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            if not _byte_safe(item, scoped_ignorecase, ascii_only or bool(add_flags & re.ASCII), lookaround):
+                return False
+        elif op is _sre_parse.BRANCH:
+            if not all(_byte_safe(branch, ignorecase, ascii_only, lookaround) for branch in av[1]):
+                return False
+        elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            if not _byte_safe(av[1], ignorecase, ascii_only, True):
+                return False
+        elif op is _sre_parse.AT:
+            boundary = av in (_sre_parse.AT_BOUNDARY, _sre_parse.AT_NON_BOUNDARY)
+            if av is not _sre_parse.AT_BEGINNING and not (boundary and ascii_only):
+                return False
+        else:
+            return False
+    return True
+
+
+def _byte_safe_char(low: int, high: int, ignorecase: bool, ascii_only: bool) -> bool:
+    # A newline in the pattern could match across lines in the buffer.
+    if high >= 128 or low <= 10 <= high:
+        return False
+    if ignorecase and not ascii_only:
+        return not any(low <= ord(char) <= high for char in _FOLDS_BEYOND_ASCII)
+    return True
+
+
+def _filter_range(path: str, include: str | None, exclude: str | None, start: int, end: int) -> list[str]:
+    """Process-pool entry point: filter one line-aligned byte range."""
+    return list(FileStreamProcessor(Path(path), include=include, exclude=exclude).iter_range(start, end))
+
+
+def _summarize_range(
+    path: str, include: str | None, exclude: str | None, start: int, end: int, top_k: int
+) -> LogSummarizer:
+    """Process-pool entry point: summarize one line-aligned byte range."""
+    from grpx.summary import LogSummarizer
+
+    summarizer = LogSummarizer(top_k=top_k, seed=start)
+    summarizer.feed(FileStreamProcessor(Path(path), include=include, exclude=exclude).iter_range(start, end))
+    return summarizer
+
+
+def _filter_block(data: bytes, path: str, include: str | None, exclude: str | None) -> list[str]:
+    """Process-pool entry point: filter a block of whole decompressed lines."""
+    return list(FileStreamProcessor(Path(path), include=include, exclude=exclude)._iter_block(data))
+
+
+def _summarize_block(data: bytes, path: str, include: str | None, exclude: str | None, top_k: int) -> LogSummarizer:
+    """Process-pool entry point: summarize a block of whole decompressed lines."""
+    from grpx.summary import LogSummarizer
+
+    summarizer = LogSummarizer(top_k=top_k)
+    summarizer.feed(FileStreamProcessor(Path(path), include=include, exclude=exclude)._iter_block(data))
+    return summarizer
+
+
+def _filter_pieces(pieces: list[Piece], include: str | None, exclude: str | None) -> list[tuple[str, list[str]]]:
+    """Process-pool entry point: filter the files and ranges of one scheduled task."""
+    return [
+        (path, list(FileStreamProcessor(Path(path), include=include, exclude=exclude)._iter_lines(start, end)))
+        for path, start, end in pieces
+    ]
+
+
+def _summarize_pieces(
+    pieces: list[Piece], include: str | None, exclude: str | None, top_k: int
+) -> list[tuple[str, LogSummarizer]]:
+    """Process-pool entry point: summarize the files and ranges of one scheduled task separately."""
+    from grpx.summary import LogSummarizer
+
+    parts = []
+    for path, start, end in pieces:
+        summarizer = LogSummarizer(top_k=top_k, seed=start)
+        summarizer.feed(FileStreamProcessor(Path(path), include=include, exclude=exclude)._iter_lines(start, end))
+        parts.append((path, summarizer))
+    return parts
+
+
+def _parse_range(
+    path: str,
+    include: str | None,
+    exclude: str | None,
+    start: int,
+    end: int,
+    format: str,
+    batch_size: int,
+    where: str | None,
+    keep_lines: bool,
+) -> list[RecordBatch]:
+    """Process-pool entry point: parse one line-aligned byte range into record batches."""
+    from grpx.records import RecordParser
+
+    lines = FileStreamProcessor(Path(path), include=include, exclude=exclude).iter_range(start, end)
+    lines = _require_literals(lines, where)
+    return list(select_records(RecordParser(format, keep_lines).iter_batches(lines, batch_size), where))
+
+
+def _group_range(
+    path: str,
+    include: str | None,
+    exclude: str | None,
+    start: int,
+    end: int,
+    format: str,
+    keys: list[str],
+    where: str | None,
+) -> dict[tuple[Any, ...], list[int]]:
+    """Process-pool entry point: group and count the matching records of one line-aligned byte range."""
+    from grpx.records import RecordParser, group_counts
+
+    lines = FileStreamProcessor(Path(path), include=include, exclude=exclude).iter_range(start, end)
+    lines = _require_literals(lines, where)
+    return group_counts(select_records(RecordParser(format).iter_batches(lines), where), keys)
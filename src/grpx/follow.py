@@ -0,0 +1,204 @@
+"""Follow a growing log file like ``tail -F``, surviving rotation and truncation."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+DEFAULT_READ_SIZE = 1 << 20
+# Upper bound on how long a change can go unnoticed: the polling interval without
+# inotify, and a safety re-check interval with it.
+DEFAULT_POLL_INTERVAL = 1.0
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+_IN_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes binding that wakes up on changes to one file name in a directory.
+
+    The directory is watched rather than the file, so creation of a new file
+    after rotation is seen as well as writes to the current one.
+    """
+
+    def __init__(self, path: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+        directory = os.fsencode(path.parent if str(path.parent) else ".")
+        if libc.inotify_add_watch(fd, directory, mask) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, "inotify_add_watch failed")
+        self.fd = fd
+        self.name = os.fsencode(path.name)
+
+    def wait(self, timeout: float) -> None:
+        """Block until the watched name changes or ``timeout`` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return
+            if self._drain():
+                return
+
+    def _drain(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _IN_EVENT.unpack_from(data, offset)
+                start = offset + _IN_EVENT.size
+                name = data[start : start + length].rstrip(b"\0")
+                relevant = relevant or name == self.name
+                offset = start + length
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileFollower:
+    """Yield line-aligned blocks of bytes appended to ``path``.
+
+    Like ``tail -F`` the name is followed rather than the open file: when the
+    file is rotated (replaced by a new inode) the rest of the old file is read
+    and the new one is followed from its start; when it is truncated reading
+    restarts at offset 0; when it is missing the follower waits for it to appear.
+    Waiting uses inotify on Linux and falls back to polling every
+    ``poll_interval`` seconds elsewhere, so an idle follower does not spin.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        from_start: bool = False,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        read_size: int = DEFAULT_READ_SIZE,
+    ) -> None:
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self.read_size = read_size
+        self._carry = b""
+
+    def iter_blocks(self, idle_timeout: float | None = None) -> Iterator[bytes]:
+        """Yield new data as it is written; stop after ``idle_timeout`` quiet seconds if given."""
+        watcher = _open_watcher(self.path)
+        self._carry = b""
+        fh = self._open(at_end=not self.from_start)
+        try:
+            idle_since = time.monotonic()
+            while True:
+                got_data = False
+                if fh is None:
+                    fh = self._open(at_end=False)
+                else:
+                    for block in self._read_available(fh):
+                        got_data = True
+                        yield block
+                    change = self._detect_change(fh)
+                    if change is not None:
+                        if change == "rotated":
+                            # Pick up lines written between the last read and the rename.
+                            yield from self._read_available(fh)
+                            fh.close()
+                            fh = self._open(at_end=False)
+                        else:
+                            fh.seek(0)
+                        if self._carry:
+                            yield self._carry
+                            self._carry = b""
+                        continue
+
+                now = time.monotonic()
+                if got_data:
+                    idle_since = now
+                elif idle_timeout is not None and now - idle_since >= idle_timeout:
+                    break
+                wait = self.poll_interval
+                if idle_timeout is not None:
+                    wait = min(wait, max(0.0, idle_timeout - (now - idle_since)))
+                if watcher is not None:
+                    watcher.wait(wait)
+                else:
+                    time.sleep(wait)
+            if self._carry:
+                yield self._carry
+        finally:
+            if fh is not None:
+                fh.close()
+            if watcher is not None:
+                watcher.close()
+
+    def _open(self, at_end: bool) -> BinaryIO | None:
+        try:
+            fh = self.path.open("rb")
+        except FileNotFoundError:
+            return None
+        if at_end:
+            fh.seek(0, os.SEEK_END)
+        return fh
+
+    def _read_available(self, fh: BinaryIO) -> Iterator[bytes]:
+        """Yield complete-line blocks readable right now; a trailing partial line is carried."""
+        while True:
+            chunk = fh.read(self.read_size)
+            if not chunk:
+                return
+            buffer = self._carry + chunk
+            cut = buffer.rfind(b"\n")
+            if cut < 0:
+                self._carry = buffer
+                continue
+            self._carry = buffer[cut + 1 :]
+            yield buffer[: cut + 1]
+
+    def _detect_change(self, fh: BinaryIO) -> str | None:
+        """Return ``"rotated"`` or ``"truncated"`` when the followed name no longer matches ``fh``."""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotated away without a replacement yet: keep reading the old file until one appears.
+            return None
+        opened = os.fstat(fh.fileno())
+        if (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            return "rotated"
+        if current.st_size < fh.tell():
+            return "truncated"
+        return None
+
+
+def _open_watcher(path: Path) -> _Inotify | None:
+    """Return an inotify watcher for ``path``, or ``None`` to fall back to polling."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify(path)
+    except (OSError, AttributeError):
+        # No inotify symbols in libc, watch limits reached, or an unwatchable directory.
+        return None
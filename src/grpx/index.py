@@ -0,0 +1,363 @@
+"""Persistent trigram index that narrows regex scans of large logs to candidate blocks.
+
+The file is cut into line-aligned blocks of about :data:`DEFAULT_BLOCK_SIZE`
+bytes. For every trigram of every word (ASCII ``\\w`` run, lowercased) the index
+stores the blocks containing it. A query regex is reduced to the trigrams any
+match must contain; only blocks holding all of them are read and verified with
+the regex itself, so results are always identical to a full scan.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Iterable
+
+from grpx.checkpoint import CheckpointStore
+from grpx.config import CONFIG_DIR
+from grpx.parallel import line_aligned_ranges, ordered_map
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - Python 3.10
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+INDEX_DIR = CONFIG_DIR / "index"
+DEFAULT_BLOCK_SIZE = 128 << 10
+# Above this share of indexed bytes a candidate read saves little over a
+# (parallel) full scan, so the index is not used.
+MAX_CANDIDATE_FRACTION = 0.5
+# Alternatives kept when a regex expands into several trigram sets, e.g. ``a|b|c``.
+_MAX_ALTERNATIVES = 32
+
+_WORD = re.compile(rb"\w{3,}")
+# Every overlapping three-character window inside a word, found in one C-level pass.
+_TRIGRAM = re.compile(rb"(?=(\w\w\w))")
+_SCAN_KIND = "index"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram BLOB NOT NULL,
+    segment INTEGER NOT NULL,
+    blocks BLOB NOT NULL,
+    PRIMARY KEY (trigram, segment)
+) WITHOUT ROWID;
+"""
+
+# A trigram query in disjunctive normal form: a line can only match if it
+# contains every trigram of at least one set. ``None`` means "cannot narrow".
+Query = list[frozenset[bytes]]
+
+
+class LogIndex:
+    """On-disk trigram index of one file, kept in ``index_dir``.
+
+    :meth:`update` indexes whatever was appended since the last update (the
+    whole file the first time, or after rotation, truncation or a rewrite, as
+    detected by :class:`grpx.checkpoint.CheckpointStore`). Each update adds a
+    segment of postings, so growing files never rewrite existing postings.
+    """
+
+    def __init__(self, file_path: Path, index_dir: Path = INDEX_DIR, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        self.file_path = file_path
+        self.path = index_path(file_path, index_dir)
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('path', ?)", (str(file_path.resolve()),)
+        )
+        self._conn.commit()
+        self._checkpoints = CheckpointStore(self.path)
+
+    @classmethod
+    def find(cls, file_path: Path, index_dir: Path = INDEX_DIR) -> LogIndex | None:
+        """Open the index of ``file_path`` if one has been built."""
+        if not index_path(file_path, index_dir).exists():
+            return None
+        return cls(file_path, index_dir)
+
+    def update(self, workers: int = 1) -> dict[str, int]:
+        """Index the bytes appended since the last update and return what was done."""
+        checkpoint = self._checkpoints.begin(self.file_path, _SCAN_KIND)
+        with self._lock:
+            if checkpoint.start == 0:
+                self._conn.execute("DELETE FROM blocks")
+                self._conn.execute("DELETE FROM postings")
+            else:
+                # Drop anything written after the last committed offset by an interrupted update.
+                stale = self._conn.execute(
+                    "SELECT MIN(id) FROM blocks WHERE start >= ?", (checkpoint.start,)
+                ).fetchone()[0]
+                if stale is not None:
+                    self._conn.execute("DELETE FROM blocks WHERE id >= ?", (stale,))
+                    self._conn.execute("DELETE FROM postings WHERE segment >= ?", (stale,))
+            first_id = self._conn.execute("SELECT COALESCE(MAX(id), -1) + 1 FROM blocks").fetchone()[0]
+
+            ranges = line_aligned_ranges(self.file_path, workers, start=checkpoint.start, end=checkpoint.end)
+            tasks = ((str(self.file_path), lo, hi, self.block_size) for lo, hi in ranges)
+            parts = ordered_map(_index_range, tasks, workers) if len(ranges) > 1 else (_index_range(*t) for t in tasks)
+
+            blocks: list[tuple[int, int]] = []
+            postings: dict[bytes, array[int]] = defaultdict(lambda: array("I"))
+            for part_blocks, part_postings in parts:
+                offset = first_id + len(blocks)
+                blocks.extend(part_blocks)
+                for trigram, ids in part_postings.items():
+                    postings[trigram].extend(idx + offset for idx in ids)
+
+            self._conn.executemany(
+                "INSERT INTO blocks (id, start, end) VALUES (?, ?, ?)",
+                ((first_id + idx, start, end) for idx, (start, end) in enumerate(blocks)),
+            )
+            self._conn.executemany(
+                "INSERT INTO postings (trigram, segment, blocks) VALUES (?, ?, ?)",
+                ((trigram, first_id, _encode(ids, first_id)) for trigram, ids in postings.items()),
+            )
+            self._conn.commit()
+        checkpoint.commit()
+        return {
+            "indexed_bytes": checkpoint.end,
+            "new_bytes": checkpoint.end - checkpoint.start,
+            "new_blocks": len(blocks),
+            "rebuilt": int(checkpoint.start == 0),
+        }
+
+    def candidate_ranges(self, patterns: Iterable[re.Pattern[str]]) -> tuple[list[tuple[int, int]], int] | None:
+        """Return the byte ranges that may hold a match of any pattern, and the indexed length.
+
+        Bytes past the indexed length have not been indexed and must be scanned
+        as well. Returns ``None`` when the index is stale or the patterns are too
+        unselective for the index to help.
+        """
+        query: Query | None = []
+        for pattern in patterns:
+            query = _or(query, trigram_query(pattern))
+        if not query:
+            return None
+        checkpoint = self._checkpoints.begin(self.file_path, _SCAN_KIND)
+        if checkpoint.start == 0:
+            return None
+        indexed_end = checkpoint.start
+
+        with self._lock:
+            block_ids: set[int] = set()
+            for trigrams in query:
+                block_ids |= self._blocks_with_all(trigrams)
+            if not block_ids:
+                return [], indexed_end
+            rows = self._conn.execute("SELECT id, start, end FROM blocks ORDER BY id").fetchall()
+
+        ranges: list[tuple[int, int]] = []
+        covered = 0
+        for block_id, start, end in rows:
+            if block_id not in block_ids:
+                continue
+            covered += end - start
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        if covered > MAX_CANDIDATE_FRACTION * indexed_end:
+            return None
+        return ranges, indexed_end
+
+    def _blocks_with_all(self, trigrams: frozenset[bytes]) -> set[int]:
+        lists = []
+        for trigram in trigrams:
+            ids: set[int] = set()
+            for blob, segment in self._conn.execute(
+                "SELECT blocks, segment FROM postings WHERE trigram = ?", (trigram,)
+            ):
+                ids.update(_decode(blob, segment))
+            if not ids:
+                return set()
+            lists.append(ids)
+        lists.sort(key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            result &= ids
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            blocks, indexed = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(end), 0) FROM blocks").fetchone()
+            segments = self._conn.execute("SELECT COUNT(DISTINCT segment) FROM postings").fetchone()[0]
+        return {
+            "file": str(self.file_path),
+            "index": str(self.path),
+            "indexed_bytes": indexed,
+            "blocks": blocks,
+            "segments": segments,
+            "index_bytes": sum(path.stat().st_size for path in _db_files(self.path)),
+        }
+
+    def close(self) -> None:
+        self._checkpoints.close()
+        with self._lock:
+            self._conn.close()
+
+
+def index_path(file_path: Path, index_dir: Path = INDEX_DIR) -> Path:
+    digest = hashlib.sha256(str(file_path.resolve()).encode("utf-8")).hexdigest()[:32]
+    return index_dir / f"{digest}.sqlite3"
+
+
+def list_indexes(index_dir: Path = INDEX_DIR) -> list[dict[str, Any]]:
+    """Return :meth:`LogIndex.stats` for every index in ``index_dir``."""
+    results = []
+    for path in sorted(index_dir.glob("*.sqlite3")):
+        with sqlite3.connect(str(path)) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'path'").fetchone()
+        if row is None:
+            continue
+        index = LogIndex(Path(row[0]), index_dir)
+        try:
+            results.append(index.stats())
+        finally:
+            index.close()
+    return results
+
+
+def clear_indexes(index_dir: Path = INDEX_DIR) -> int:
+    """Delete every index in ``index_dir`` and return how many were removed."""
+    removed = 0
+    for path in index_dir.glob("*.sqlite3"):
+        for part in _db_files(path):
+            part.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def _db_files(path: Path) -> list[Path]:
+    return [part for part in (path, Path(f"{path}-wal"), Path(f"{path}-shm")) if part.exists()]
+
+
+def trigram_query(pattern: re.Pattern[str]) -> Query | None:
+    """Reduce ``pattern`` to the lowercased word trigrams any match must contain.
+
+    The analysis is conservative: anything it does not understand (character
+    classes, lookarounds, optional parts) simply adds no requirement.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:  # noqa: BLE001 - unparsable here means "cannot narrow", never an error
+        return None
+    return _sequence_query(parsed, bool(pattern.flags & re.IGNORECASE), bool(pattern.flags & re.ASCII))
+
+
+def _sequence_query(items: Any, ignorecase: bool, ascii_only: bool) -> Query | None:
+    # Unicode case folding lets i, k and s match non-ASCII letters (İ, K, ſ) that the
+    # ASCII word index never sees, so they cannot be required.
+    unicode_case = ignorecase and not ascii_only
+    query: Query | None = None
+    run: list[str] = []
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            char = chr(av)
+            run.append(" " if unicode_case and char in "iksIKS" else char)
+            continue
+        query = _and(query, _literal_query("".join(run)))
+        run = []
+        if op is _sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, item = av
+            scoped_ignorecase = (ignorecase or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            query = _and(query, _sequence_query(item, scoped_ignorecase, ascii_only or bool(add_flags & re.ASCII)))
+        elif op is _sre_parse.BRANCH:
+            branches = [_sequence_query(branch, ignorecase, ascii_only) for branch in av[1]]
+            combined: Query | None = []
+            for branch in branches:
+                combined = _or(combined, branch)
+            query = _and(query, combined)
+        elif op in _REPEATS and av[0] >= 1:
+            query = _and(query, _sequence_query(av[2], ignorecase, ascii_only))
+    return _and(query, _literal_query("".join(run)))
+
+
+_REPEATS = tuple(
+    getattr(_sre_parse, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_sre_parse, name)
+)
+
+
+def _literal_query(text: str) -> Query | None:
+    # The index only holds ASCII words, and str.lower() maps some non-ASCII
+    # characters to ASCII ones (the Kelvin sign to "k"): those must not count.
+    ascii_text = "".join(char if char.isascii() else " " for char in text)
+    trigrams = frozenset(_trigrams(ascii_text.lower().encode("ascii")))
+    return [trigrams] if trigrams else None
+
+
+def _and(left: Query | None, right: Query | None) -> Query | None:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    product = [a | b for a in left for b in right]
+    if len(product) > _MAX_ALTERNATIVES:
+        # Requiring only one side is weaker but still correct.
+        return left if len(left) <= len(right) else right
+    return product
+
+
+def _or(left: Query | None, right: Query | None) -> Query | None:
+    if left is None or right is None:
+        return None
+    combined = left + right
+    return combined if len(combined) <= _MAX_ALTERNATIVES else None
+
+
+def _trigrams(lowered: bytes) -> set[bytes]:
+    """Return the word trigrams of already lowercased text."""
+    # Distinct words first: log lines repeat the same words over and over.
+    return set(_TRIGRAM.findall(b" ".join(set(_WORD.findall(lowered)))))
+
+
+def _index_range(path: str, start: int, end: int, block_size: int) -> tuple[list[tuple[int, int]], dict[bytes, list[int]]]:
+    """Process-pool entry point: index one line-aligned byte range into blocks and postings."""
+    # Imported here: grpx.file_stream uses this module to narrow its scans.
+    from grpx.file_stream import iter_line_blocks
+
+    blocks: list[tuple[int, int]] = []
+    postings: dict[bytes, list[int]] = defaultdict(list)
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        pos = start
+        for block in iter_line_blocks(fh, block_size, limit=end - start):
+            block_id = len(blocks)
+            blocks.append((pos, pos + len(block)))
+            pos += len(block)
+            for trigram in _trigrams(block.lower()):
+                postings[trigram].append(block_id)
+    return blocks, postings
+
+
+def _encode(ids: array[int], base: int) -> bytes:
+    """Delta-encode ascending block ids relative to ``base`` and compress them."""
+    deltas = array("I", (b - a for a, b in zip([base, *ids], ids)))
+    return zlib.compress(deltas.tobytes(), 1)
+
+
+def _decode(blob: bytes, base: int) -> list[int]:
+    deltas = array("I")
+    deltas.frombytes(zlib.decompress(blob))
+    return list(accumulate(deltas, initial=base))[1:]
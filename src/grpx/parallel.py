@@ -0,0 +1,67 @@
+"""Process-pool helpers for scanning large files across cores."""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Ranges are kept well below the file size so each worker returns a bounded batch
+# of results and the pool stays busy until the end of the file.
+DEFAULT_RANGE_SIZE = 32 << 20
+
+
+def line_aligned_ranges(
+    path: Path, parts: int, range_size: int = DEFAULT_RANGE_SIZE, start: int = 0, end: int | None = None
+) -> list[tuple[int, int]]:
+    """Split ``[start, end)`` of ``path`` into at least ``parts`` byte ranges that start and end on line boundaries.
+
+    ``start`` must itself be a line boundary; ``end`` defaults to the file size.
+    """
+    size = path.stat().st_size if end is None else end
+    span = size - start
+    if span <= 0:
+        return []
+    count = max(parts, -(-span // range_size))
+    step = max(1, span // count)
+
+    bounds = [start]
+    with path.open("rb") as fh:
+        for idx in range(1, count):
+            target = max(start + idx * step, bounds[-1])
+            if target >= size:
+                break
+            fh.seek(target)
+            fh.readline()
+            offset = fh.tell()
+            if offset >= size:
+                break
+            if offset > bounds[-1]:
+                bounds.append(offset)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def ordered_map(fn: Callable[..., T], tasks: Iterable[tuple[Any, ...]], workers: int) -> Iterator[T]:
+    """Run ``fn(*task)`` in a process pool and yield results in task order.
+
+    At most ``2 * workers`` tasks are in flight so results never pile up in memory
+    when the consumer is slower than the pool.
+    """
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future[T]] = deque()
+        try:
+            for task in tasks:
+                pending.append(pool.submit(fn, *task))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
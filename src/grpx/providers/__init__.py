@@ -1,6 +1,7 @@
 """LLM providers for grpx."""
 
-from .base import BaseProvider, ProviderError
+from .base import BaseProvider, HTTPProvider, ProviderError
+from .cache import CachingProvider, ResponseCache
 from .factory import build_provider
 
-__all__ = ["BaseProvider", "ProviderError", "build_provider"]
+__all__ = ["BaseProvider", "CachingProvider", "HTTPProvider", "ProviderError", "ResponseCache", "build_provider"]
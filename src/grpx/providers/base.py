@@ -2,9 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
+import http.client
 import json
 import urllib.error
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Sequence
+
+from grpx.transport import HTTPTransport, async_transport, shared_transport
+
+DEFAULT_CONCURRENCY = 8
+REQUEST_TIMEOUT = 60
 
 
 class ProviderError(RuntimeError):
@@ -14,13 +23,126 @@ class ProviderError(RuntimeError):
 class BaseProvider(ABC):
     """Interface all provider implementations must follow."""
 
-    def __init__(self, model: str) -> None:
+    label = "Provider"
+    # Request parameters that change the completion; part of the response cache key.
+    generation_params: dict = {}
+
+    def __init__(self, model: str, transport: HTTPTransport | None = None) -> None:
         self.model = model
+        self.transport = transport or shared_transport()
 
     @abstractmethod
     def generate(self, prompt: str) -> str:
         """Generate text for a prompt."""
 
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the completion incrementally as text fragments arrive.
+
+        Backends without a streaming API fall back to a single ``generate`` chunk.
+        """
+        yield self.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        """Async ``generate``; backends without a non-blocking client run it in a thread."""
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def agenerate_many(
+        self, prompts: Sequence[str], concurrency: int = DEFAULT_CONCURRENCY
+    ) -> list[str | ProviderError]:
+        """Run ``agenerate`` over ``prompts`` with at most ``concurrency`` requests in flight.
+
+        Results come back in input order; a failed prompt yields its ``ProviderError``
+        in place instead of cancelling the rest of the batch.
+        """
+        gate = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(prompt: str) -> str | ProviderError:
+            async with gate:
+                try:
+                    return await self.agenerate(prompt)
+                except ProviderError as exc:
+                    return exc
+                except Exception as exc:
+                    return ProviderError(f"{self.label} error: {exc}")
+
+        return list(await asyncio.gather(*(run(prompt) for prompt in prompts)))
+
+    def generate_many(
+        self, prompts: Sequence[str], concurrency: int = DEFAULT_CONCURRENCY
+    ) -> list[str | ProviderError]:
+        """Blocking wrapper around :meth:`agenerate_many` for synchronous callers."""
+
+        async def run() -> list[str | ProviderError]:
+            try:
+                return await self.agenerate_many(prompts, concurrency)
+            finally:
+                await async_transport(self.transport).aclose()
+
+        return asyncio.run(run())
+
+    @contextmanager
+    def _translate_errors(self) -> Iterator[None]:
+        """Re-raise transport failures as ``ProviderError`` with the provider label."""
+        try:
+            yield
+        except urllib.error.HTTPError as exc:
+            raise ProviderError(format_http_error(self.label, exc)) from exc
+        except urllib.error.URLError as exc:
+            raise ProviderError(f"{self.label} connection error: {exc.reason}") from exc
+        except (OSError, http.client.HTTPException) as exc:
+            raise ProviderError(f"{self.label} connection error: {exc}") from exc
+
+
+class HTTPProvider(BaseProvider):
+    """Base for JSON-over-HTTP backends: one request builder, sync and async senders."""
+
+    @abstractmethod
+    def _build_request(self, prompt: str, stream: bool = False) -> tuple[str, dict[str, str], bytes]:
+        """Return ``(url, headers, body)`` for a completion request."""
+
+    @abstractmethod
+    def _parse_response(self, body: dict) -> str:
+        """Extract the completion text from a non-streaming response body."""
+
+    def generate(self, prompt: str) -> str:
+        url, headers, payload = self._build_request(prompt)
+        with self._translate_errors():
+            raw = self.transport.request("POST", url, headers=headers, body=payload, timeout=REQUEST_TIMEOUT)
+            return self._parse_response(json.loads(raw.decode("utf-8")))
+
+    async def agenerate(self, prompt: str) -> str:
+        url, headers, payload = self._build_request(prompt)
+        transport = async_transport(self.transport)
+        with self._translate_errors():
+            raw = await transport.request("POST", url, headers=headers, body=payload, timeout=REQUEST_TIMEOUT)
+            return self._parse_response(json.loads(raw.decode("utf-8")))
+
+
+def iter_sse_data(lines: Iterable[bytes]) -> Iterator[str]:
+    """Yield the ``data`` payload of each server-sent event in a byte-line stream."""
+    data: list[str] = []
+    for raw in lines:
+        line = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+def iter_ndjson(lines: Iterable[bytes]) -> Iterator[dict]:
+    """Yield one decoded object per non-empty line of a newline-delimited JSON stream."""
+    for raw in lines:
+        if raw.strip():
+            yield json.loads(raw)
+
 
 def format_http_error(provider_name: str, exc: urllib.error.HTTPError) -> str:
     """Return a normalized error message with actionable billing/auth hints."""
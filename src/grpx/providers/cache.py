@@ -0,0 +1,154 @@
+"""Content-addressed on-disk cache for LLM responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from grpx.config import CONFIG_DIR
+
+from .base import BaseProvider
+
+CACHE_FILE = CONFIG_DIR / "llm_cache.sqlite3"
+DEFAULT_MAX_BYTES = 256 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+-- Running total of response bytes, kept by triggers so no write has to SUM the table.
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) SELECT 'bytes', COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+    UPDATE meta SET value = value + new.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses BEGIN
+    UPDATE meta SET value = value + new.size - old.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+    UPDATE meta SET value = value - old.size WHERE name = 'bytes';
+END;
+"""
+
+# Least recently used rows read per eviction query.
+_EVICT_BATCH = 64
+
+
+def cache_key(provider: BaseProvider, model_input: str) -> str:
+    """Hash everything that determines a completion: backend, model, parameters and input."""
+    identity = {
+        "provider": provider.label,
+        "endpoint": getattr(provider, "base_url", ""),
+        "model": provider.model,
+        "params": provider.generation_params,
+        "input": hashlib.sha256(model_input.encode("utf-8")).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite store of completions capped at ``max_bytes`` with LRU eviction."""
+
+    def __init__(self, path: Path = CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the delete trigger.
+            self._conn.execute(
+                "INSERT INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET response = excluded.response, size = excluded.size, "
+                "last_access = excluded.last_access",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+
+class CachingProvider(BaseProvider):
+    """Wrap a provider so identical requests are answered from a :class:`ResponseCache`."""
+
+    def __init__(self, inner: BaseProvider, cache: ResponseCache) -> None:
+        super().__init__(inner.model, inner.transport)
+        self.inner = inner
+        self.cache = cache
+        self.label = inner.label
+        self.generation_params = inner.generation_params
+
+    def generate(self, prompt: str) -> str:
+        key = cache_key(self.inner, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.inner.generate(prompt)
+        self.cache.put(key, response)
+        return response
+
+    async def agenerate(self, prompt: str) -> str:
+        key = cache_key(self.inner, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = await self.inner.agenerate(prompt)
+        self.cache.put(key, response)
+        return response
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        key = cache_key(self.inner, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts: list[str] = []
+        for part in self.inner.stream(prompt):
+            parts.append(part)
+            yield part
+        self.cache.put(key, "".join(parts))
@@ -3,37 +3,51 @@
 from __future__ import annotations
 
 import json
-import urllib.error
-import urllib.request
+from typing import Iterator
 
-from .base import BaseProvider, ProviderError, format_http_error
+from grpx.transport import HTTPTransport
 
+from .base import REQUEST_TIMEOUT, HTTPProvider, ProviderError, iter_sse_data
 
-class ClaudeProvider(BaseProvider):
-    def __init__(self, model: str, api_key: str) -> None:
-        super().__init__(model)
+
+class ClaudeProvider(HTTPProvider):
+    label = "Claude"
+    generation_params = {"max_tokens": 1024}
+
+    def __init__(self, model: str, api_key: str, transport: HTTPTransport | None = None) -> None:
+        super().__init__(model, transport)
         self.api_key = api_key
 
-    def generate(self, prompt: str) -> str:
+    def _build_request(self, prompt: str, stream: bool = False) -> tuple[str, dict[str, str], bytes]:
         url = "https://api.anthropic.com/v1/messages"
-        payload = json.dumps(
-            {
-                "model": self.model,
-                "max_tokens": 1024,
-                "messages": [{"role": "user", "content": prompt}],
-            }
-        ).encode("utf-8")
+        body: dict = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            **self.generation_params,
+        }
+        if stream:
+            body["stream"] = True
         headers = {
             "Content-Type": "application/json",
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
         }
-        request = urllib.request.Request(url, data=payload, headers=headers, method="POST")
-        try:
-            with urllib.request.urlopen(request, timeout=60) as response:
-                body = json.loads(response.read().decode("utf-8"))
-                return body["content"][0]["text"]
-        except urllib.error.HTTPError as exc:
-            raise ProviderError(format_http_error("Claude", exc)) from exc
-        except urllib.error.URLError as exc:
-            raise ProviderError(f"Claude connection error: {exc.reason}") from exc
+        return url, headers, json.dumps(body).encode("utf-8")
+
+    def _parse_response(self, body: dict) -> str:
+        return body["content"][0]["text"]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        url, headers, payload = self._build_request(prompt, stream=True)
+        with self._translate_errors():
+            response = self.transport.open("POST", url, headers=headers, body=payload, timeout=REQUEST_TIMEOUT)
+            with response:
+                for data in iter_sse_data(response):
+                    event = json.loads(data)
+                    kind = event.get("type")
+                    if kind == "content_block_delta" and event.get("delta", {}).get("type") == "text_delta":
+                        yield event["delta"]["text"]
+                    elif kind == "error":
+                        raise ProviderError(f"Claude error: {event.get('error', {}).get('message', 'stream error')}")
+                    elif kind == "message_stop":
+                        break
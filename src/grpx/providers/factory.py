@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from grpx.transport import shared_transport
+
 from .base import BaseProvider
 from .claude import ClaudeProvider
 from .ollama import OllamaProvider
@@ -13,17 +15,19 @@ def build_provider(config: dict) -> BaseProvider:
     provider_cfg = config["provider"]
     name = provider_cfg["name"].lower()
     model = provider_cfg["model"]
+    transport = shared_transport(config)
 
     if name == "ollama":
-        return OllamaProvider(model=model, base_url=provider_cfg["ollama_url"])
+        return OllamaProvider(model=model, base_url=provider_cfg["ollama_url"], transport=transport)
     if name == "openai":
-        return OpenAIProvider(model=model, api_key=provider_cfg["openai_api_key"])
+        return OpenAIProvider(model=model, api_key=provider_cfg["openai_api_key"], transport=transport)
     if name == "claude":
-        return ClaudeProvider(model=model, api_key=provider_cfg["claude_api_key"])
+        return ClaudeProvider(model=model, api_key=provider_cfg["claude_api_key"], transport=transport)
     if name == "openrouter":
         return OpenRouterProvider(
             model=model,
             api_key=provider_cfg["openrouter_api_key"],
             base_url=provider_cfg["openrouter_base_url"],
+            transport=transport,
         )
     raise ValueError(f"Unsupported provider: {name}")
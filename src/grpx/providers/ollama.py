@@ -3,26 +3,37 @@
 from __future__ import annotations
 
 import json
-import urllib.error
-import urllib.request
+from typing import Iterator
 
-from .base import BaseProvider, ProviderError, format_http_error
+from grpx.transport import HTTPTransport
 
+from .base import REQUEST_TIMEOUT, HTTPProvider, ProviderError, iter_ndjson
 
-class OllamaProvider(BaseProvider):
-    def __init__(self, model: str, base_url: str) -> None:
-        super().__init__(model)
+
+class OllamaProvider(HTTPProvider):
+    label = "Ollama"
+
+    def __init__(self, model: str, base_url: str, transport: HTTPTransport | None = None) -> None:
+        super().__init__(model, transport)
         self.base_url = base_url.rstrip("/")
 
-    def generate(self, prompt: str) -> str:
+    def _build_request(self, prompt: str, stream: bool = False) -> tuple[str, dict[str, str], bytes]:
         url = f"{self.base_url}/api/generate"
-        payload = json.dumps({"model": self.model, "prompt": prompt, "stream": False}).encode("utf-8")
-        request = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"}, method="POST")
-        try:
-            with urllib.request.urlopen(request, timeout=60) as response:
-                body = json.loads(response.read().decode("utf-8"))
-                return body.get("response", "")
-        except urllib.error.HTTPError as exc:
-            raise ProviderError(format_http_error("Ollama", exc)) from exc
-        except urllib.error.URLError as exc:
-            raise ProviderError(f"Ollama connection error: {exc.reason}") from exc
+        payload = json.dumps({"model": self.model, "prompt": prompt, "stream": stream}).encode("utf-8")
+        return url, {"Content-Type": "application/json"}, payload
+
+    def _parse_response(self, body: dict) -> str:
+        return body.get("response", "")
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        url, headers, payload = self._build_request(prompt, stream=True)
+        with self._translate_errors():
+            response = self.transport.open("POST", url, headers=headers, body=payload, timeout=REQUEST_TIMEOUT)
+            with response:
+                for chunk in iter_ndjson(response):
+                    if chunk.get("error"):
+                        raise ProviderError(f"Ollama error: {chunk['error']}")
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
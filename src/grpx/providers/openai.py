@@ -3,36 +3,58 @@
 from __future__ import annotations
 
 import json
-import urllib.error
-import urllib.request
+from typing import Iterator
 
-from .base import BaseProvider, ProviderError, format_http_error
+from grpx.transport import HTTPTransport
 
+from .base import REQUEST_TIMEOUT, HTTPProvider, ProviderError, iter_sse_data
 
-class OpenAIProvider(BaseProvider):
-    def __init__(self, model: str, api_key: str) -> None:
-        super().__init__(model)
+
+class OpenAIProvider(HTTPProvider):
+    label = "OpenAI"
+    generation_params = {"temperature": 0.1}
+
+    def __init__(self, model: str, api_key: str, transport: HTTPTransport | None = None) -> None:
+        super().__init__(model, transport)
         self.api_key = api_key
 
-    def generate(self, prompt: str) -> str:
+    def _build_request(self, prompt: str, stream: bool = False) -> tuple[str, dict[str, str], bytes]:
         url = "https://api.openai.com/v1/chat/completions"
-        payload = json.dumps(
-            {
-                "model": self.model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.1,
-            }
-        ).encode("utf-8")
+        body: dict = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            **self.generation_params,
+        }
+        if stream:
+            body["stream"] = True
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
-        request = urllib.request.Request(url, data=payload, headers=headers, method="POST")
-        try:
-            with urllib.request.urlopen(request, timeout=60) as response:
-                body = json.loads(response.read().decode("utf-8"))
-                return body["choices"][0]["message"]["content"]
-        except urllib.error.HTTPError as exc:
-            raise ProviderError(format_http_error("OpenAI", exc)) from exc
-        except urllib.error.URLError as exc:
-            raise ProviderError(f"OpenAI connection error: {exc.reason}") from exc
+        return url, headers, json.dumps(body).encode("utf-8")
+
+    def _parse_response(self, body: dict) -> str:
+        return body["choices"][0]["message"]["content"]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        url, headers, payload = self._build_request(prompt, stream=True)
+        with self._translate_errors():
+            response = self.transport.open("POST", url, headers=headers, body=payload, timeout=REQUEST_TIMEOUT)
+            with response:
+                yield from iter_chat_deltas(self.label, iter_sse_data(response))
+
+
+def iter_chat_deltas(label: str, events: Iterator[str]) -> Iterator[str]:
+    """Yield text deltas from OpenAI-compatible ``chat.completion.chunk`` SSE events."""
+    for data in events:
+        if data == "[DONE]":
+            break
+        chunk = json.loads(data)
+        error = chunk.get("error")
+        if error:
+            message = error.get("message", error) if isinstance(error, dict) else error
+            raise ProviderError(f"{label} error: {message}")
+        for choice in chunk.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
@@ -3,33 +3,41 @@
 from __future__ import annotations
 
 import json
-import urllib.error
-import urllib.request
+from typing import Iterator
 
-from .base import BaseProvider, ProviderError, format_http_error
+from grpx.transport import HTTPTransport
 
+from .base import REQUEST_TIMEOUT, HTTPProvider, iter_sse_data
+from .openai import iter_chat_deltas
 
-class OpenRouterProvider(BaseProvider):
-    def __init__(self, model: str, api_key: str, base_url: str) -> None:
-        super().__init__(model)
+
+class OpenRouterProvider(HTTPProvider):
+    label = "OpenRouter"
+
+    def __init__(self, model: str, api_key: str, base_url: str, transport: HTTPTransport | None = None) -> None:
+        super().__init__(model, transport)
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
 
-    def generate(self, prompt: str) -> str:
+    def _build_request(self, prompt: str, stream: bool = False) -> tuple[str, dict[str, str], bytes]:
         url = f"{self.base_url}/chat/completions"
-        payload = json.dumps({"model": self.model, "messages": [{"role": "user", "content": prompt}]}).encode("utf-8")
+        body: dict = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        if stream:
+            body["stream"] = True
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
             "HTTP-Referer": "https://github.com/grpx/grpx",
             "X-Title": "grpx",
         }
-        request = urllib.request.Request(url, data=payload, headers=headers, method="POST")
-        try:
-            with urllib.request.urlopen(request, timeout=60) as response:
-                body = json.loads(response.read().decode("utf-8"))
-                return body["choices"][0]["message"]["content"]
-        except urllib.error.HTTPError as exc:
-            raise ProviderError(format_http_error("OpenRouter", exc)) from exc
-        except urllib.error.URLError as exc:
-            raise ProviderError(f"OpenRouter connection error: {exc.reason}") from exc
+        return url, headers, json.dumps(body).encode("utf-8")
+
+    def _parse_response(self, body: dict) -> str:
+        return body["choices"][0]["message"]["content"]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        url, headers, payload = self._build_request(prompt, stream=True)
+        with self._translate_errors():
+            response = self.transport.open("POST", url, headers=headers, body=payload, timeout=REQUEST_TIMEOUT)
+            with response:
+                yield from iter_chat_deltas(self.label, iter_sse_data(response))
@@ -0,0 +1,420 @@
+"""Field-level query expressions over parsed record batches.
+
+An expression such as ``status>=500 and src_ip in 10.0.0.0/8 and msg~"timeout"``
+is parsed once into a predicate plan. ``and``/``or`` children are ordered by
+cost (equality and substring checks before numeric, CIDR and regex tests) and
+evaluated column by column on the rows still undecided, so every row stops at
+its first deciding test. Substrings every matching line must contain are
+exposed as :attr:`Query.literals` so scans can skip other lines before parsing.
+
+Grammar::
+
+    expr       := term ("or" term)*
+    term       := factor ("and" factor)*
+    factor     := "not" factor | "(" expr ")" | comparison
+    comparison := FIELD OP value | FIELD ["not"] "in" (value | "(" value ("," value)* ")")
+    OP         := "=" | "==" | "!=" | ">" | ">=" | "<" | "<=" | "~" | "!~"
+
+Values are numbers, quoted strings or bare words; ``in`` also takes CIDR
+networks. ``~`` is a regex search. A missing field fails every comparison, so
+``!=``, ``!~`` and ``not in`` (the negations) match it.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable
+
+from grpx.records import RecordBatch
+
+# Relative cost of one test per row, used to order the children of and/or.
+_COST_EQUAL = 1
+_COST_SUBSTRING = 2
+_COST_COMPARE = 3
+_COST_NETWORK = 4
+_COST_REGEX = 6
+
+# Columns computed by the parsers rather than copied from the line, so their
+# values need not appear in the raw text.
+_DERIVED_COLUMNS = frozenset({"minute", "severity", "message"})
+# Characters some formats escape or quote in the raw line (JSON, CEF, key=value).
+_UNSAFE_LITERAL = re.compile(r"[^\x20-\x7e]|[\\\"'=|/]")
+_MAX_CACHED_ADDRESSES = 1 << 16
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|>=|<=|!~|[=<>~(),])
+      | (?P<word>[^\s()=<>!~,"']+)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = frozenset({"and", "or", "not", "in"})
+_REGEX_META = frozenset(".^$*+?{}[]\\|()")
+
+
+class QueryError(ValueError):
+    """Raised for expressions that cannot be parsed."""
+
+
+@dataclass
+class _Node:
+    cost: int = field(init=False, default=0)
+
+    def select(self, batch: RecordBatch, rows: list[int]) -> list[int]:
+        """Return the subset of ``rows`` (in order) where this node is true."""
+        raise NotImplementedError
+
+    def literals(self) -> set[str]:
+        """Substrings every line matching this node contains."""
+        return set()
+
+
+@dataclass
+class _Compare(_Node):
+    name: str
+    op: str
+    test: Callable[[Any], bool] = field(repr=False)
+    literal: str | None = None
+
+    def select(self, batch: RecordBatch, rows: list[int]) -> list[int]:
+        values = batch.column(self.name)
+        test = self.test
+        return [row for row in rows if test(values[row])]
+
+    def literals(self) -> set[str]:
+        return {self.literal} if self.literal else set()
+
+
+@dataclass
+class _Not(_Node):
+    child: _Node
+
+    def __post_init__(self) -> None:
+        self.cost = self.child.cost
+
+    def select(self, batch: RecordBatch, rows: list[int]) -> list[int]:
+        matched = set(self.child.select(batch, rows))
+        return [row for row in rows if row not in matched]
+
+
+@dataclass
+class _And(_Node):
+    children: list[_Node]
+
+    def __post_init__(self) -> None:
+        self.children.sort(key=lambda child: child.cost)
+        self.cost = sum(child.cost for child in self.children)
+
+    def select(self, batch: RecordBatch, rows: list[int]) -> list[int]:
+        for child in self.children:
+            if not rows:
+                break
+            rows = child.select(batch, rows)
+        return rows
+
+    def literals(self) -> set[str]:
+        return set().union(*(child.literals() for child in self.children))
+
+
+@dataclass
+class _Or(_Node):
+    children: list[_Node]
+
+    def __post_init__(self) -> None:
+        self.children.sort(key=lambda child: child.cost)
+        self.cost = sum(child.cost for child in self.children)
+
+    def select(self, batch: RecordBatch, rows: list[int]) -> list[int]:
+        matched: set[int] = set()
+        remaining = rows
+        for child in self.children:
+            if not remaining:
+                break
+            hits = set(child.select(batch, remaining))
+            matched |= hits
+            remaining = [row for row in remaining if row not in hits]
+        return [row for row in rows if row in matched]
+
+
+class Query:
+    """A compiled query expression (see the module docstring for the syntax)."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._root = _Parser(text).parse()
+        self.literals = sorted(self._root.literals(), key=lambda literal: (-len(literal), literal))
+
+    def select(self, batch: RecordBatch) -> list[int]:
+        """Return the indices of the rows of ``batch`` that match."""
+        return self._root.select(batch, list(range(batch.num_rows)))
+
+    def mask(self, batch: RecordBatch) -> list[bool]:
+        mask = [False] * batch.num_rows
+        for row in self.select(batch):
+            mask[row] = True
+        return mask
+
+    def filter(self, batch: RecordBatch) -> RecordBatch:
+        return batch.filter(self.mask(batch))
+
+    def __repr__(self) -> str:
+        return f"Query({self.text!r})"
+
+
+@lru_cache(maxsize=64)
+def compile_query(text: str) -> Query:
+    """Parse ``text`` once; repeated calls (such as one per pool task) reuse the plan."""
+    return Query(text)
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    def _tokenize(self, text: str) -> list[tuple[str, str]]:
+        tokens = []
+        pos = 0
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if match is None or match.end() == pos:
+                if not text[pos:].strip():
+                    break
+                raise QueryError(f"Unexpected character at position {pos} in query: {text[pos:pos + 10]!r}")
+            pos = match.end()
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "word" and value.lower() in _KEYWORDS:
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value))
+        return tokens
+
+    def parse(self) -> _Node:
+        if not self.tokens:
+            raise QueryError("Empty query")
+        node = self._expr()
+        if self.pos < len(self.tokens):
+            raise QueryError(f"Unexpected '{self.tokens[self.pos][1]}' in query: {self.text}")
+        return node
+
+    def _peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self, expected: str) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise QueryError(f"Query ends early, expected {expected}: {self.text}")
+        self.pos += 1
+        return token
+
+    def _accept(self, kind: str, value: str) -> bool:
+        if self._peek() == (kind, value):
+            self.pos += 1
+            return True
+        return False
+
+    def _expr(self) -> _Node:
+        children = [self._term()]
+        while self._accept("keyword", "or"):
+            children.append(self._term())
+        return children[0] if len(children) == 1 else _Or(children)
+
+    def _term(self) -> _Node:
+        children = [self._factor()]
+        while self._accept("keyword", "and"):
+            children.append(self._factor())
+        return children[0] if len(children) == 1 else _And(children)
+
+    def _factor(self) -> _Node:
+        if self._accept("keyword", "not"):
+            return _Not(self._factor())
+        if self._accept("op", "("):
+            node = self._expr()
+            if not self._accept("op", ")"):
+                raise QueryError(f"Missing ')' in query: {self.text}")
+            return node
+        return self._comparison()
+
+    def _comparison(self) -> _Node:
+        kind, name = self._next("a field name")
+        if kind != "word":
+            raise QueryError(f"Expected a field name, got '{name}' in query: {self.text}")
+        negate = self._accept("keyword", "not")
+        if negate or self._accept("keyword", "in"):
+            if negate and not self._accept("keyword", "in"):
+                raise QueryError(f"Expected 'in' after '{name} not' in query: {self.text}")
+            node = _membership(name, self._value_list())
+            return _Not(node) if negate else node
+        kind, op = self._next("an operator")
+        if kind != "op" or op in "(),":
+            raise QueryError(f"Expected an operator after '{name}', got '{op}' in query: {self.text}")
+        return _comparison(name, op, self._value())
+
+    def _value(self) -> str | int | float:
+        kind, value = self._next("a value")
+        if kind == "string":
+            return re.sub(r"\\(.)", r"\1", value[1:-1])
+        if kind != "word":
+            raise QueryError(f"Expected a value, got '{value}' in query: {self.text}")
+        return _number(value)
+
+    def _value_list(self) -> list[str | int | float]:
+        if not self._accept("op", "("):
+            return [self._value()]
+        values = [self._value()]
+        while self._accept("op", ","):
+            values.append(self._value())
+        if not self._accept("op", ")"):
+            raise QueryError(f"Missing ')' after value list in query: {self.text}")
+        return values
+
+
+def _comparison(name: str, op: str, value: str | int | float) -> _Node:
+    if op in ("~", "!~"):
+        node = _regex(name, str(value))
+        return _Not(node) if op == "!~" else node
+    if op in ("=", "=="):
+        return _equals(name, value)
+    if op == "!=":
+        return _Not(_equals(name, value))
+    node = _Compare(name, op, _ordering(op, value))
+    node.cost = _COST_COMPARE
+    return node
+
+
+def _equals(name: str, value: str | int | float) -> _Node:
+    if isinstance(value, str):
+        node = _Compare(name, "=", lambda cell: cell is not None and _text(cell) == value, _literal(name, value))
+    else:
+        # No literal: the line may spell the same number differently (1e3, 1000.0).
+        node = _Compare(name, "=", lambda cell: _as_number(cell) == value)
+    node.cost = _COST_EQUAL
+    return node
+
+
+def _regex(name: str, pattern: str) -> _Node:
+    if not _REGEX_META.intersection(pattern):
+        # A plain literal: a substring check does the same work without the regex engine.
+        node = _Compare(name, "~", lambda cell: cell is not None and pattern in _text(cell), _literal(name, pattern))
+        node.cost = _COST_SUBSTRING
+        return node
+    try:
+        search = re.compile(pattern).search
+    except re.error as exc:
+        raise QueryError(f"Invalid regex '{pattern}' for field '{name}': {exc}") from exc
+    node = _Compare(name, "~", lambda cell: cell is not None and search(_text(cell)) is not None)
+    node.cost = _COST_REGEX
+    return node
+
+
+def _membership(name: str, values: list[str | int | float]) -> _Node:
+    networks = []
+    members: set[Any] = set()
+    for value in values:
+        if isinstance(value, str) and "/" in value:
+            try:
+                networks.append(ipaddress.ip_network(value, strict=False))
+            except ValueError as exc:
+                raise QueryError(f"Invalid network '{value}' for field '{name}'") from exc
+        else:
+            members.add(value)
+    children: list[_Node] = []
+    if members:
+        texts = {_text(member) for member in members}
+        numbers = {member for member in members if not isinstance(member, str)}
+        literal = _literal(name, values[0]) if len(values) == 1 and isinstance(values[0], str) else None
+        node = _Compare(
+            name,
+            "in",
+            lambda cell: cell is not None and (_text(cell) in texts or (numbers and _as_number(cell) in numbers)),
+            literal,
+        )
+        node.cost = _COST_EQUAL
+        children.append(node)
+    if networks:
+        node = _Compare(name, "in", _network_test(networks))
+        node.cost = _COST_NETWORK
+        children.append(node)
+    return children[0] if len(children) == 1 else _Or(children)
+
+
+def _network_test(networks: list[ipaddress.IPv4Network | ipaddress.IPv6Network]) -> Callable[[Any], bool]:
+    """Test addresses against ``networks``, remembering the answer for repeated addresses."""
+    seen: dict[str, bool] = {}
+
+    def test(cell: Any) -> bool:
+        if cell is None:
+            return False
+        text = _text(cell)
+        hit = seen.get(text)
+        if hit is None:
+            try:
+                address = ipaddress.ip_address(text)
+            except ValueError:
+                hit = False
+            else:
+                hit = any(address in network for network in networks)
+            if len(seen) >= _MAX_CACHED_ADDRESSES:
+                seen.clear()
+            seen[text] = hit
+        return hit
+
+    return test
+
+
+def _ordering(op: str, value: str | int | float) -> Callable[[Any], bool]:
+    compare: Callable[[Any, Any], bool] = {
+        ">": lambda a, b: a > b,
+        ">=": lambda a, b: a >= b,
+        "<": lambda a, b: a < b,
+        "<=": lambda a, b: a <= b,
+    }[op]
+    if isinstance(value, str):
+        # Strings compare as text, which orders ISO 8601 timestamps correctly.
+        return lambda cell: cell is not None and compare(_text(cell), value)
+
+    def test(cell: Any) -> bool:
+        number = _as_number(cell)
+        return number is not None and compare(number, value)
+
+    return test
+
+
+def _literal(name: str, value: str | None) -> str | None:
+    """Return ``value`` if it must appear verbatim in the raw line of a matching record."""
+    if not value or name in _DERIVED_COLUMNS or _UNSAFE_LITERAL.search(value):
+        return None
+    return value
+
+
+def _number(word: str) -> str | int | float:
+    try:
+        return int(word)
+    except ValueError:
+        pass
+    try:
+        return float(word)
+    except ValueError:
+        return word
+
+
+def _as_number(cell: Any) -> int | float | None:
+    if isinstance(cell, bool):
+        return None
+    if isinstance(cell, (int, float)):
+        return cell
+    if isinstance(cell, str):
+        number = _number(cell)
+        return None if isinstance(number, str) else number
+    return None
+
+
+def _text(cell: Any) -> str:
+    if isinstance(cell, bool):
+        return "true" if cell else "false"
+    return cell if isinstance(cell, str) else str(cell)
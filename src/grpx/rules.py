@@ -0,0 +1,374 @@
+"""User detector rules loaded from rule packs and plugins.
+
+Rule packs live in ``~/.grpx/rules/``: ``*.json`` files holding a list of rules
+(or ``{"rules": [...]}``) and ``*.txt`` keyword lists, one IOC per line, where
+the file name is the rule name. Installed packages can add rules through the
+``grpx.detectors`` entry point group; each entry point is a list of rules or
+a callable returning one. A rule is either a keyword list or a regex::
+
+    {"name": "c2-domains", "keywords": ["evil.example", "bad.test"]}
+    {"name": "encoded-powershell", "regex": "powershell(?:\\\\.exe)? -e(?:nc)? ", "case_sensitive": false}
+
+All rules are compiled together into one :class:`RuleEngine`: keywords and
+the required literal of each regex go into two trie-shaped regexes (case
+sensitive and insensitive), so one C-level pass finds every line worth a
+closer look regardless of how many rules there are. Regexes without a usable
+literal share one merged alternation that picks the lines each of them then
+scans. Rules match within a line.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+from grpx.config import CONFIG_DIR
+from grpx.detectors import Detector, required_literals
+
+RULES_DIR = CONFIG_DIR / "rules"
+ENTRY_POINT_GROUP = "grpx.detectors"
+# Names with a meaning of their own in --detect.
+RESERVED_NAMES = frozenset({"all", "rules"})
+
+# Shorter literals hit too many lines to be worth prefiltering on.
+_MIN_LITERAL = 3
+_NAME = re.compile(r"[A-Za-z0-9_][\w.-]*")
+
+
+class RuleError(ValueError):
+    """Raised for rule packs or plugins that cannot be loaded."""
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One user detector: a keyword list or a regex. ``source`` names the pack or plugin."""
+
+    name: str
+    keywords: tuple[str, ...] = ()
+    regex: str | None = None
+    case_sensitive: bool = True
+    source: str = ""
+
+
+def load_rules(
+    rules_dir: Path | None = None, plugins: bool = True, errors: list[str] | None = None
+) -> list[Rule]:
+    """Read every rule pack in ``rules_dir`` (default :data:`RULES_DIR`) and, with ``plugins``, entry points.
+
+    A pack or plugin that cannot be read raises :class:`RuleError`, unless
+    ``errors`` is given: then it is skipped and the error appended to it.
+    """
+    rules_dir = RULES_DIR if rules_dir is None else rules_dir
+    rules: list[Rule] = []
+    if rules_dir.is_dir():
+        for path in sorted(rules_dir.iterdir()):
+            if path.suffix in (".json", ".txt"):
+                _collect(rules, errors, _read_pack, path)
+    if plugins:
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            _collect(rules, errors, _load_plugin, entry_point)
+    return rules
+
+
+def _collect(rules: list[Rule], errors: list[str] | None, load: Callable[[Any], list[Rule]], source: Any) -> None:
+    try:
+        rules.extend(load(source))
+    except RuleError as exc:
+        if errors is None:
+            raise
+        errors.append(str(exc))
+
+
+def _read_pack(path: Path) -> list[Rule]:
+    try:
+        text = path.read_text(encoding="utf-8")
+        data = json.loads(text) if path.suffix == ".json" else None
+    except (OSError, ValueError) as exc:
+        raise RuleError(f"Cannot read rule pack {path}: {exc}") from exc
+    if data is not None:
+        return _pack_rules(data, str(path))
+    keywords = [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    return [_rule({"name": path.stem, "keywords": keywords}, str(path))]
+
+
+def _load_plugin(entry_point: Any) -> list[Rule]:
+    source = f"entry point {entry_point.name} ({entry_point.value})"
+    try:
+        data = entry_point.load()
+        if callable(data):
+            data = data()
+    except Exception as exc:  # noqa: BLE001 - any plugin failure is reported the same way
+        raise RuleError(f"Cannot load rules from {source}: {exc}") from exc
+    return _pack_rules(data, source)
+
+
+def compile_rules(rules: Iterable[Rule], errors: list[str] | None = None) -> dict[str, Detector]:
+    """Compile ``rules`` into one shared :class:`RuleEngine` and return a detector per rule.
+
+    A duplicate name raises :class:`RuleError`, or with ``errors`` drops the later rule and is recorded there.
+    """
+    kept: list[Rule] = []
+    seen: dict[str, str] = {}
+    for rule in rules:
+        if rule.name in seen:
+            message = f"Duplicate rule '{rule.name}' in {rule.source} (also in {seen[rule.name]})"
+            if errors is None:
+                raise RuleError(message)
+            errors.append(message)
+            continue
+        seen[rule.name] = rule.source
+        kept.append(rule)
+    engine = RuleEngine(kept)
+    return {rule.name: Detector(rule.name, None, default=False, engine=engine) for rule in kept}
+
+
+def _pack_rules(data: Any, source: str) -> list[Rule]:
+    if isinstance(data, dict):
+        data = data.get("rules")
+    if not isinstance(data, list):
+        raise RuleError(f"{source}: expected a list of rules or an object with a 'rules' list")
+    return [_rule(item, source) for item in data]
+
+
+def _rule(item: Any, source: str) -> Rule:
+    if not isinstance(item, dict):
+        raise RuleError(f"{source}: every rule must be an object, got {item!r}")
+    name = item.get("name")
+    if not isinstance(name, str) or not _NAME.fullmatch(name) or name in RESERVED_NAMES:
+        raise RuleError(f"{source}: invalid rule name {name!r} (letters, digits, '_', '-', '.'; not 'all' or 'rules')")
+    keywords = item.get("keywords")
+    regex = item.get("regex")
+    if (keywords is None) == (regex is None):
+        raise RuleError(f"{source}: rule '{name}' needs exactly one of 'keywords' or 'regex'")
+    if keywords is not None:
+        if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+            raise RuleError(f"{source}: 'keywords' of rule '{name}' must be a list of strings")
+        keywords = [keyword for keyword in keywords if keyword]
+        if any("\n" in keyword for keyword in keywords):
+            raise RuleError(f"{source}: keywords of rule '{name}' cannot contain newlines")
+        # IOC lists (domains, hashes, file names) are matched without regard to case by default.
+        case_sensitive = bool(item.get("case_sensitive", False))
+        return Rule(name, keywords=tuple(dict.fromkeys(keywords)), case_sensitive=case_sensitive, source=source)
+    case_sensitive = bool(item.get("case_sensitive", True))
+    try:
+        compiled = re.compile(regex, 0 if case_sensitive else re.IGNORECASE)
+    except (re.error, TypeError) as exc:
+        raise RuleError(f"{source}: invalid regex for rule '{name}': {exc}") from exc
+    if compiled.fullmatch(""):
+        raise RuleError(f"{source}: regex of rule '{name}' matches the empty string")
+    return Rule(name, regex=regex, case_sensitive=case_sensitive, source=source)
+
+
+class KeywordMatcher:
+    """Find every occurrence of many literal keywords, like Aho-Corasick, on the C regex engine.
+
+    The keywords are compiled into one trie-shaped regex, so the cost per
+    character depends on the trie's branching rather than on the number of
+    keywords. A first non-overlapping search finds the lines holding any
+    keyword; only those lines are rescanned with a lookahead to report
+    overlapping occurrences, and a hit also reports the keywords that are
+    prefixes of it.
+    """
+
+    def __init__(self, keywords: Iterable[str], case_sensitive: bool = True) -> None:
+        self.case_sensitive = case_sensitive
+        words = set(keywords if case_sensitive else (keyword.lower() for keyword in keywords))
+        self.keywords = words
+        self._pattern = _trie_pattern(words)
+        self._any = re.compile(self._pattern)
+        self._all = re.compile(f"(?=({self._pattern}))")
+        self._folded: tuple[re.Pattern[str], re.Pattern[str]] | None = None
+        self._prefixes = {
+            word: [word[:size] for size in range(1, len(word) + 1) if word[:size] in words] for word in words
+        }
+
+    def occurrences(self, text: str) -> Iterator[tuple[int, int, int, str]]:
+        """Yield ``(line_start, line_end, position, keyword)`` in text order.
+
+        ``keyword`` is the normalized (lowercased unless case sensitive) keyword
+        found at ``position``.
+        """
+        if not self.keywords:
+            return
+        haystack = text
+        find_any, find_all = self._any, self._all
+        if not self.case_sensitive:
+            haystack = text.lower()
+            if len(haystack) != len(text):
+                # A few characters change length when lowercased; fall back to case folding in the regex.
+                haystack = text
+                find_any, find_all = self._folded_patterns()
+        size = len(haystack)
+        prefixes = self._prefixes
+        fold = not self.case_sensitive and haystack is text
+        pos = 0
+        while True:
+            match = find_any.search(haystack, pos)
+            if match is None:
+                return
+            first = match.start()
+            start = haystack.rfind("\n", 0, first) + 1
+            end = haystack.find("\n", first)
+            if end < 0:
+                end = size
+            for hit in find_all.finditer(haystack, first, end):
+                found = hit.group(1)
+                for keyword in prefixes.get(found.lower() if fold else found, ()):
+                    yield start, end, hit.start(), keyword
+            pos = end + 1
+
+    def _folded_patterns(self) -> tuple[re.Pattern[str], re.Pattern[str]]:
+        if self._folded is None:
+            self._folded = (
+                re.compile(self._pattern, re.IGNORECASE),
+                re.compile(f"(?=({self._pattern}))", re.IGNORECASE),
+            )
+        return self._folded
+
+
+class RuleEngine:
+    """Scan text for every rule at once and group the matches by rule name."""
+
+    def __init__(self, rules: list[Rule]) -> None:
+        self.rules = rules
+        # Per case mode: normalized literal -> (rule index, compiled regex or None for keyword rules).
+        owners: dict[bool, dict[str, list[tuple[int, re.Pattern[str] | None]]]] = {True: {}, False: {}}
+        merged: list[str] = []
+        self._merged_rules: list[tuple[str, re.Pattern[str]]] = []
+        self._standalone: list[tuple[str, re.Pattern[str]]] = []
+        for index, rule in enumerate(rules):
+            case_sensitive = rule.case_sensitive
+            if rule.regex is None:
+                for keyword in rule.keywords:
+                    key = keyword if case_sensitive else keyword.lower()
+                    owners[case_sensitive].setdefault(key, []).append((index, None))
+                continue
+            compiled = re.compile(rule.regex, 0 if case_sensitive else re.IGNORECASE)
+            literal = _best_literal(rule.regex)
+            if literal is not None:
+                key = literal if case_sensitive else literal.lower()
+                owners[case_sensitive].setdefault(key, []).append((index, compiled))
+            elif _mergeable(rule, compiled):
+                merged.append(f"(?:{rule.regex})" if case_sensitive else f"(?i:{rule.regex})")
+                self._merged_rules.append((rule.name, compiled))
+            else:
+                self._standalone.append((rule.name, compiled))
+        self._matchers = [
+            (KeywordMatcher(literals, case_sensitive), literals)
+            for case_sensitive, literals in owners.items()
+            if literals
+        ]
+        # Only finds the lines worth checking: an alternation reports one
+        # non-overlapping match per position, so rules are run on their own.
+        self._merged = re.compile("|".join(merged)) if merged else None
+
+    def scan(self, text: str) -> dict[str, list[str]]:
+        """Return the matches of every rule that matched ``text``, each list in text order."""
+        found: dict[str, list[str]] = {}
+        rules = self.rules
+        for matcher, owners in self._matchers:
+            line = -1
+            checked: set[int] = set()
+            for start, end, position, keyword in matcher.occurrences(text):
+                if start != line:
+                    line, checked = start, set()
+                for index, regex in owners[keyword]:
+                    name = rules[index].name
+                    if regex is None:
+                        found.setdefault(name, []).append(text[position : position + len(keyword)])
+                    elif index not in checked:
+                        checked.add(index)
+                        matches = [match.group() for match in regex.finditer(text, start, end)]
+                        if matches:
+                            found.setdefault(name, []).extend(matches)
+        if self._merged is not None:
+            size = len(text)
+            pos = 0
+            while True:
+                hit = self._merged.search(text, pos)
+                if hit is None:
+                    break
+                start = text.rfind("\n", 0, hit.start()) + 1
+                end = text.find("\n", hit.start())
+                if end < 0:
+                    end = size
+                for name, regex in self._merged_rules:
+                    matches = [match.group() for match in regex.finditer(text, start, end)]
+                    if matches:
+                        found.setdefault(name, []).extend(matches)
+                pos = end + 1
+        for name, regex in self._standalone:
+            matches = [match.group() for match in regex.finditer(text)]
+            if matches:
+                found.setdefault(name, []).extend(matches)
+        return found
+
+
+def _best_literal(regex: str) -> str | None:
+    """The longest literal every match of ``regex`` contains, if it is long enough to prefilter on."""
+    try:
+        literals = required_literals(re.compile(regex))
+    except re.error:
+        return None
+    literal = max(literals, key=len, default="")
+    return literal if len(literal) >= _MIN_LITERAL and "\n" not in literal else None
+
+
+def _mergeable(rule: Rule, compiled: re.Pattern[str]) -> bool:
+    """Whether the regex can sit inside the merged prefilter.
+
+    Named groups could clash, global inline flags are invalid mid-pattern and
+    numbered backreferences would point at another rule's group.
+    """
+    if compiled.groupindex:
+        return False
+    try:
+        re.compile(f"(?:{rule.regex})|(?:x)")
+    except re.error:
+        return False
+    return not _has_backreference(_sre_parse.parse(rule.regex, compiled.flags))
+
+
+def _has_backreference(node: Any) -> bool:
+    if isinstance(node, _sre_parse.SubPattern):
+        return any(op in (_sre_parse.GROUPREF, _sre_parse.GROUPREF_EXISTS) or _has_backreference(av) for op, av in node)
+    if isinstance(node, (tuple, list)):
+        return any(_has_backreference(item) for item in node)
+    return False
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex matching any of ``words``, shaped like their prefix trie (longest match first)."""
+    root: dict[str, dict] = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_node(root)
+
+
+def _trie_node(node: dict[str, dict]) -> str:
+    branches = []
+    for char in sorted(key for key in node if key):
+        run, child = char, node[char]
+        # Collapse chains of single children into one literal run.
+        while len(child) == 1 and "" not in child:
+            (next_char, child), = child.items()
+            run += next_char
+        branches.append(re.escape(run) + _trie_node(child))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+    return body
@@ -0,0 +1,319 @@
+"""Fixed-memory streaming sketches used by the local log summarizer.
+
+Every sketch can be merged with another of the same kind, so a file can be
+summarized in independent byte ranges (for example in a process pool) and
+the partial results combined afterwards. ``to_state``/``from_state`` convert a
+sketch to and from plain JSON-serializable data for resumable scans.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+import random
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice, repeat
+from typing import Any, Hashable, Iterable, Sequence
+
+
+class HeavyHitters:
+    """Approximate top-k counter whose memory is bounded by ``capacity``.
+
+    At most ``2 * capacity`` keys are tracked. When that is exceeded the table is
+    cut back to the ``capacity`` most frequent keys, so frequent keys keep exact
+    counts while the long tail is forgotten. ``error`` adds up the largest count
+    discarded by each cut (and across merges), which bounds how far a reported
+    count can trail its true value.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.counts: Counter[Hashable] = Counter()
+        self.error = 0
+
+    def update(self, keys: Iterable[Hashable]) -> None:
+        self.counts.update(keys)
+        self._prune()
+
+    def merge(self, other: HeavyHitters) -> None:
+        self.counts.update(other.counts)
+        self.error += other.error
+        self._prune()
+
+    def top(self, k: int) -> list[tuple[Hashable, int]]:
+        return self.counts.most_common(k)
+
+    def to_state(self) -> dict[str, Any]:
+        """Plain, JSON-serializable data that :meth:`from_state` restores."""
+        return {"capacity": self.capacity, "counts": list(self.counts.items()), "error": self.error}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> HeavyHitters:
+        hitters = cls(int(state["capacity"]))
+        hitters.counts = Counter({key: int(count) for key, count in state["counts"]})
+        hitters.error = int(state["error"])
+        return hitters
+
+    def _prune(self) -> None:
+        if len(self.counts) > 2 * self.capacity:
+            kept = self.counts.most_common(self.capacity + 1)
+            # A key can be cut again after it comes back, so every cut adds to the bound.
+            self.error += kept.pop()[1]
+            self.counts = Counter(dict(kept))
+
+
+class HyperLogLog:
+    """Distinct-count estimator using ``2 ** precision`` one-byte registers.
+
+    The default precision (12) uses 4 KiB and has a standard error of about 1.6%.
+    Items are hashed with BLAKE2b rather than ``hash()`` so registers built in
+    different processes can be merged.
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def update(self, items: Iterable[str]) -> None:
+        p = self.precision
+        registers = self.registers
+        shift = 64 - p
+        for item in items:
+            h = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+            idx = h >> shift
+            rest = h & ((1 << shift) - 1)
+            rank = shift - rest.bit_length() + 1
+            if rank > registers[idx]:
+                registers[idx] = rank
+
+    def merge(self, other: HyperLogLog) -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def to_state(self) -> dict[str, Any]:
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers).decode("ascii")}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> HyperLogLog:
+        sketch = cls(int(state["precision"]))
+        registers = base64.b64decode(state["registers"])
+        if len(registers) != len(sketch.registers):
+            raise ValueError("HyperLogLog state does not match its precision")
+        sketch.registers = bytearray(registers)
+        return sketch
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities.
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class Reservoir:
+    """Uniform random sample of ``size`` items from a stream of unknown length.
+
+    Uses Algorithm L, which computes how many items to skip between
+    replacements, so ``update`` only touches the items that enter the sample.
+    """
+
+    def __init__(self, size: int = 20, seed: int = 0) -> None:
+        self.size = size
+        self.items: list[str] = []
+        self.seen = 0
+        self._rng = random.Random(seed)
+        self._w = 1.0
+        self._next = size - 1
+
+    def update(self, items: Sequence[str]) -> None:
+        """Offer a batch of items; only the chosen ones are copied."""
+        start = self.seen
+        self.seen += len(items)
+        if len(self.items) < self.size:
+            take = self.size - len(self.items)
+            self.items.extend(islice(items, take))
+            if len(self.items) < self.size:
+                return
+            self._w = math.exp(math.log(self._uniform()) / self.size)
+            self._advance()
+        while self._next < self.seen:
+            self.items[self._rng.randrange(self.size)] = items[self._next - start]
+            self._w *= math.exp(math.log(self._uniform()) / self.size)
+            self._advance()
+
+    def merge(self, other: Reservoir) -> None:
+        """Combine two samples so each source is represented in proportion to its length."""
+        total = self.seen + other.seen
+        if total == 0:
+            return
+        mine, theirs = list(self.items), list(other.items)
+        self._rng.shuffle(mine)
+        self._rng.shuffle(theirs)
+        left_mine, left_theirs = self.seen, other.seen
+        merged: list[str] = []
+        while len(merged) < self.size and (mine or theirs):
+            if theirs and (not mine or self._rng.random() * (left_mine + left_theirs) >= left_mine):
+                merged.append(theirs.pop())
+                left_theirs -= 1
+            else:
+                merged.append(mine.pop())
+                left_mine -= 1
+        self.items = merged
+        self.seen = total
+        self._w = math.exp(math.log(self._uniform()) / self.size)
+        self._next = self.seen - 1
+        self._advance()
+
+    def to_state(self) -> dict[str, Any]:
+        version, internal, gauss = self._rng.getstate()
+        return {
+            "size": self.size,
+            "items": self.items,
+            "seen": self.seen,
+            "rng": [version, list(internal), gauss],
+            "w": self._w,
+            "next": self._next,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> Reservoir:
+        reservoir = cls(int(state["size"]))
+        reservoir.items = [str(item) for item in state["items"]]
+        reservoir.seen = int(state["seen"])
+        version, internal, gauss = state["rng"]
+        reservoir._rng.setstate((version, tuple(internal), gauss))
+        reservoir._w = float(state["w"])
+        reservoir._next = int(state["next"])
+        return reservoir
+
+    def _advance(self) -> None:
+        w = min(self._w, 1.0 - 2**-53)
+        self._next += math.floor(math.log(self._uniform()) / math.log1p(-w)) + 1
+
+    def _uniform(self) -> float:
+        return self._rng.random() or 2**-53
+
+
+class TDigest:
+    """Merging t-digest for streaming quantiles of numeric values.
+
+    Values are buffered and periodically folded into at most about
+    ``compression`` centroids, which are smallest near the tails so extreme
+    percentiles (p99, p99.9) stay accurate. ``count`` includes buffered values.
+    """
+
+    def __init__(self, compression: int = 100) -> None:
+        self.compression = compression
+        self.means: list[float] = []
+        self.weights: list[float] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: list[tuple[float, float]] = []
+
+    def update(self, values: Iterable[float]) -> None:
+        values = list(values)
+        if not values:
+            return
+        self._buffer.extend(zip(values, repeat(1.0)))
+        self.count += len(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: TDigest) -> None:
+        other._compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        if not self.means:
+            return math.nan
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.count
+        # Interpolate between centroid midpoints; the extremes anchor the ends.
+        cumulative = []
+        running = 0.0
+        for weight in self.weights:
+            cumulative.append(running + weight / 2)
+            running += weight
+        idx = bisect_left(cumulative, target)
+        if idx == 0:
+            lo_pos, lo_val = 0.0, self.min
+            hi_pos, hi_val = cumulative[0], self.means[0]
+        elif idx == len(cumulative):
+            lo_pos, lo_val = cumulative[-1], self.means[-1]
+            hi_pos, hi_val = self.count, self.max
+        else:
+            lo_pos, lo_val = cumulative[idx - 1], self.means[idx - 1]
+            hi_pos, hi_val = cumulative[idx], self.means[idx]
+        if hi_pos <= lo_pos:
+            return hi_val
+        return lo_val + (hi_val - lo_val) * (target - lo_pos) / (hi_pos - lo_pos)
+
+    def to_state(self) -> dict[str, Any]:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self.means,
+            "weights": self.weights,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> TDigest:
+        digest = cls(int(state["compression"]))
+        digest.means = [float(mean) for mean in state["means"]]
+        digest.weights = [float(weight) for weight in state["weights"]]
+        if len(digest.means) != len(digest.weights):
+            raise ValueError("TDigest state has mismatched centroids")
+        digest.count, digest.min, digest.max = float(state["count"]), float(state["min"]), float(state["max"])
+        return digest
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted([*zip(self.means, self.weights), *self._buffer])
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        means: list[float] = []
+        weights: list[float] = []
+        seen = 0.0
+        limit = total * _k_inverse(_k_scale(0.0, self.compression) + 1, self.compression)
+        for mean, weight in points:
+            if means and seen + weight <= limit:
+                merged = weights[-1] + weight
+                means[-1] += (mean - means[-1]) * weight / merged
+                weights[-1] = merged
+            else:
+                if means:
+                    limit = total * _k_inverse(_k_scale(seen / total, self.compression) + 1, self.compression)
+                means.append(mean)
+                weights.append(weight)
+            seen += weight
+        self.means, self.weights = means, weights
+
+
+def _k_scale(q: float, compression: float) -> float:
+    """The k1 scale function: centroid size shrinks near q=0 and q=1."""
+    return compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+
+def _k_inverse(k: float, compression: float) -> float:
+    if k >= compression / 4:
+        return 1.0
+    return (math.sin(k * 2 * math.pi / compression) + 1) / 2
@@ -0,0 +1,322 @@
+"""One-pass local log summaries shared with the LLM instead of raw content."""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Iterable
+
+from grpx.detectors import get_detectors
+from grpx.sketches import HeavyHitters, HyperLogLog, Reservoir, TDigest
+
+# Lines are summarized in batches joined into one string, so every statistic is a
+# handful of C-level regex passes per batch instead of Python work per line.
+BATCH_LINES = 8192
+MAX_TEMPLATE_CHARS = 200
+# Minute buckets kept before the timeline is coarsened to hours (about 35 days).
+MAX_MINUTE_BUCKETS = 50_000
+
+_MONTHS = {
+    name: f"{idx:02d}"
+    for idx, name in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)
+}
+
+# First timestamp within the first 40 characters of each line: ISO 8601,
+# Apache/nginx access logs, or syslog (no year).
+_TIMESTAMP = re.compile(
+    r"^[^\n]{0,40}?(?:"
+    r"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2})"
+    r"|(\d{2})/(" + "|".join(_MONTHS) + r")/(\d{4}):(\d{2}:\d{2})"
+    r"|(" + "|".join(_MONTHS) + r") {1,2}(\d{1,2}) (\d{2}:\d{2})"
+    r")",
+    re.MULTILINE,
+)
+
+_SEVERITY = re.compile(
+    r"^[^\n]*?\b(emerg|alert|fatal|crit(?:ical)?|err(?:or)?|warn(?:ing)?|notice|info|debug|trace)\b",
+    re.MULTILINE | re.IGNORECASE,
+)
+_SEVERITY_LEVELS = {
+    "emerg": "critical",
+    "alert": "critical",
+    "fatal": "critical",
+    "crit": "critical",
+    "critical": "critical",
+    "err": "error",
+    "error": "error",
+    "warn": "warning",
+    "warning": "warning",
+    "notice": "info",
+    "info": "info",
+    "debug": "debug",
+    "trace": "debug",
+}
+
+# Template masking follows the usual log-clustering rule: any token that contains a
+# digit (numbers, IPs, timestamps, hex/UUID identifiers) is a variable. URLs and
+# e-mail addresses are masked first so their digits do not split them apart; user
+# names found by ``_USER`` are masked as well.
+_URL = re.compile(r"https?://[^\s\"'<>]+")
+_EMAIL = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+_VARIABLE = re.compile(r"\b[0-9a-fA-F]*[0-9][\w.:+\-]*")
+
+# Measurement-like ``key=value`` fields whose distribution is worth reporting, and
+# user names for the distinct-user count. Both are case-sensitive and lead with a
+# literal alternation: ``re.IGNORECASE`` and ``\b`` prefixes make them several
+# times slower on large batches.
+_NUMERIC_FIELD = re.compile(
+    r"(latency|duration|elapsed|response_time|request_time|took|bytes|size)(?:[=:] ?| )"
+    r"(\d+(?:\.\d+)?) ?(ms|us|s|kb|mb|b)?\b"
+)
+_USER = re.compile(r"(?:user(?:name)?|uid|login|account)[=:] ?\"?([\w.@-]+)|for (?:invalid user )?([\w.@-]+) from ")
+_QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+_RESOLUTIONS = ("minute", "hour", "day")
+_COARSER = {"minute": "hour", "hour": "day"}
+
+_truncate_template = itemgetter(slice(None, MAX_TEMPLATE_CHARS))
+
+
+class LogSummarizer:
+    """Accumulate fixed-memory statistics over a stream of log lines.
+
+    Templates, severities, a timeline, top detector hits, distinct counts,
+    numeric field quantiles and a sample of masked lines are all kept in bounded
+    structures, so a whole file can be summarized regardless of its size.
+    Summarizers fed with different parts of a file can be combined with
+    :meth:`merge`. The sample is drawn from a seeded generator, so the same
+    input always yields the same summary (and hits the LLM response cache).
+    """
+
+    def __init__(
+        self,
+        top_k: int = 20,
+        capacity: int = 1000,
+        histogram_buckets: int = 120,
+        sample_size: int = 20,
+        seed: int = 0,
+    ) -> None:
+        self.top_k = top_k
+        self.histogram_buckets = histogram_buckets
+        self.line_count = 0
+        self.templates = HeavyHitters(capacity)
+        self.severity: Counter[str] = Counter()
+        self.timeline: Counter[str] = Counter()
+        self.resolution = "minute"
+        self.detectors = get_detectors()
+        self.detector_hits = {name: HeavyHitters(capacity) for name in self.detectors}
+        self.distinct = {name: HyperLogLog() for name in [*self.detectors, "users"]}
+        self.numeric: dict[str, TDigest] = {}
+        self.samples = Reservoir(sample_size, seed=seed)
+
+    def feed(self, lines: Iterable[str]) -> None:
+        it = iter(lines)
+        while batch := list(islice(it, BATCH_LINES)):
+            self._feed_block(batch)
+
+    def _feed_block(self, lines: list[str]) -> None:
+        self.line_count += len(lines)
+        block = "\n".join(lines)
+
+        levels = Counter(_SEVERITY.findall(block))
+        for word, count in levels.items():
+            self.severity[_SEVERITY_LEVELS[word.lower()]] += count
+
+        stamps = Counter(_TIMESTAMP.findall(block))
+        for groups, count in stamps.items():
+            self.timeline[self._bucket(_minute_key(groups))] += count
+        if self.resolution == "minute" and len(self.timeline) > MAX_MINUTE_BUCKETS:
+            self._coarsen()
+
+        for name, detector in self.detectors.items():
+            hits = Counter(detector.findall(block))
+            self.detector_hits[name].update(hits)
+            self.distinct[name].update(hits)
+
+        users = {named or ssh for named, ssh in _USER.findall(block)}
+        self.distinct["users"].update(users)
+
+        values: dict[str, list[float]] = {}
+        for field, value, unit in _NUMERIC_FIELD.findall(block):
+            values.setdefault(f"{field}_{unit.lower()}" if unit else field, []).append(float(value))
+        for key, batch in values.items():
+            if key not in self.numeric:
+                self.numeric[key] = TDigest()
+            self.numeric[key].update(batch)
+
+        masked = block
+        if "://" in masked:
+            masked = _URL.sub("<URL>", masked)
+        if "@" in masked:
+            masked = _EMAIL.sub("<EMAIL>", masked)
+        if users:
+            masked = _USER.sub(_mask_user, masked)
+        masked = _VARIABLE.sub("<*>", masked)
+        templates = list(map(_truncate_template, masked.split("\n")))
+        self.templates.update(templates)
+        self.samples.update(templates)
+
+    def merge(self, other: LogSummarizer) -> None:
+        """Fold the statistics of ``other`` (e.g. another byte range) into this summarizer.
+
+        ``other`` should not be used afterwards; its timeline may be coarsened in place.
+        """
+        self.line_count += other.line_count
+        self.templates.merge(other.templates)
+        self.severity.update(other.severity)
+        while self.resolution != other.resolution:
+            if _RESOLUTIONS.index(self.resolution) < _RESOLUTIONS.index(other.resolution):
+                self._coarsen()
+            else:
+                other._coarsen()
+        self.timeline.update(other.timeline)
+        if self.resolution == "minute" and len(self.timeline) > MAX_MINUTE_BUCKETS:
+            self._coarsen()
+        for name, hits in other.detector_hits.items():
+            self.detector_hits[name].merge(hits)
+        for name, sketch in other.distinct.items():
+            self.distinct[name].merge(sketch)
+        for key, digest in other.numeric.items():
+            if key in self.numeric:
+                self.numeric[key].merge(digest)
+            else:
+                self.numeric[key] = digest
+        self.samples.merge(other.samples)
+
+    def to_state(self) -> dict[str, Any]:
+        """Plain, JSON-serializable statistics that :meth:`from_state` restores (for checkpoints)."""
+        return {
+            "top_k": self.top_k,
+            "histogram_buckets": self.histogram_buckets,
+            "line_count": self.line_count,
+            "templates": self.templates.to_state(),
+            "severity": dict(self.severity),
+            "timeline": dict(self.timeline),
+            "resolution": self.resolution,
+            "detector_hits": {name: hits.to_state() for name, hits in self.detector_hits.items()},
+            "distinct": {name: sketch.to_state() for name, sketch in self.distinct.items()},
+            "numeric": {key: digest.to_state() for key, digest in self.numeric.items()},
+            "samples": self.samples.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> LogSummarizer:
+        """Rebuild a summarizer from :meth:`to_state` data.
+
+        Raises :class:`ValueError` when the state was taken with a different set
+        of default detectors, since its per-detector statistics no longer line up.
+        """
+        summarizer = cls(top_k=int(state["top_k"]), histogram_buckets=int(state["histogram_buckets"]))
+        if set(state["detector_hits"]) != set(summarizer.detectors) or state["resolution"] not in _RESOLUTIONS:
+            raise ValueError("Summary state was taken with different detectors or settings")
+        summarizer.line_count = int(state["line_count"])
+        summarizer.templates = HeavyHitters.from_state(state["templates"])
+        summarizer.severity = Counter({level: int(count) for level, count in state["severity"].items()})
+        summarizer.timeline = Counter({bucket: int(count) for bucket, count in state["timeline"].items()})
+        summarizer.resolution = state["resolution"]
+        summarizer.detector_hits = {
+            name: HeavyHitters.from_state(hits) for name, hits in state["detector_hits"].items()
+        }
+        summarizer.distinct = {name: HyperLogLog.from_state(sketch) for name, sketch in state["distinct"].items()}
+        summarizer.numeric = {key: TDigest.from_state(digest) for key, digest in state["numeric"].items()}
+        summarizer.samples = Reservoir.from_state(state["samples"])
+        return summarizer
+
+    def _bucket(self, key: str) -> str:
+        return key if self.resolution == "minute" else _coarser_key(key, self.resolution)
+
+    def _coarsen(self) -> None:
+        self.resolution = _COARSER[self.resolution]
+        self.timeline = _rollup(self.timeline, self.resolution)
+
+    def result(self) -> dict[str, Any]:
+        """Return a compact, JSON-serializable summary of everything fed so far."""
+        labelled = sum(self.severity.values())
+        severity = {level: self.severity[level] for level in ("critical", "error", "warning", "info", "debug")}
+        severity["unlabelled"] = self.line_count - labelled
+
+        return {
+            "line_count": self.line_count,
+            "severity": severity,
+            "top_templates": [
+                {"template": template, "count": count} for template, count in self.templates.top(self.top_k)
+            ],
+            "timeline": self._timeline_result(),
+            "distinct": {name: sketch.count() for name, sketch in self.distinct.items()},
+            "numeric_fields": {
+                key: {
+                    "count": int(digest.count),
+                    "min": digest.min,
+                    **{label: round(digest.quantile(q), 3) for label, q in _QUANTILES.items()},
+                    "max": digest.max,
+                }
+                for key, digest in sorted(self.numeric.items())
+            },
+            "sample_lines": self.samples.items,
+            "top_detector_hits": {
+                name: [{"value": value, "count": count} for value, count in hits.top(self.top_k)]
+                for name, hits in self.detector_hits.items()
+                if hits.counts
+            },
+        }
+
+    def _timeline_result(self) -> dict[str, Any]:
+        if not self.timeline:
+            return {}
+        peaks = [{"bucket": key, "count": count} for key, count in self.timeline.most_common(10)]
+        counts, resolution = self.timeline, self.resolution
+        # Coarsen a copy for display only; peaks keep the finest resolution available.
+        while len(counts) > self.histogram_buckets and resolution in _COARSER:
+            resolution = _COARSER[resolution]
+            counts = _rollup(counts, resolution)
+        keys = sorted(counts)
+        return {
+            "first": keys[0],
+            "last": keys[-1],
+            "resolution": resolution,
+            "peaks": peaks,
+            "counts": {key: counts[key] for key in keys[-self.histogram_buckets :]},
+        }
+
+
+def minute_of(text: str) -> str | None:
+    """Return the ``[YYYY-]MM-DD HH:MM`` minute of a timestamp near the start of ``text``."""
+    match = _TIMESTAMP.match(text)
+    return _minute_key(match.groups()) if match else None
+
+
+def severity_of(text: str) -> str | None:
+    """Return the normalized level (``critical`` ... ``debug``) of the first severity word in ``text``."""
+    match = _SEVERITY.match(text)
+    return _SEVERITY_LEVELS[match.group(1).lower()] if match else None
+
+
+def _mask_user(match: re.Match[str]) -> str:
+    group = 1 if match.group(1) is not None else 2
+    text, offset = match.group(0), match.start(0)
+    return text[: match.start(group) - offset] + "<USER>" + text[match.end(group) - offset :]
+
+
+def _minute_key(groups: tuple[str, ...]) -> str:
+    """Normalize one ``_TIMESTAMP`` match to ``[YYYY-]MM-DD HH:MM``."""
+    iso_date, iso_time, day, month, year, apache_time, syslog_month, syslog_day, syslog_time = groups
+    if iso_date:
+        return f"{iso_date} {iso_time}"
+    if day:
+        return f"{year}-{_MONTHS[month]}-{day} {apache_time}"
+    return f"{_MONTHS[syslog_month]}-{int(syslog_day):02d} {syslog_time}"
+
+
+def _coarser_key(key: str, resolution: str) -> str:
+    """Truncate a minute (or hour) key such as ``2024-05-01 12:34`` to ``resolution``."""
+    date, _, time = key.partition(" ")
+    return f"{date} {time[:2]}" if resolution == "hour" else date
+
+
+def _rollup(counts: Counter[str], resolution: str) -> Counter[str]:
+    coarse: Counter[str] = Counter()
+    for key, count in counts.items():
+        coarse[_coarser_key(key, resolution)] += count
+    return coarse
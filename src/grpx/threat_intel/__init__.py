@@ -1,5 +1,6 @@
 """Threat intelligence module."""
 
+from .cache import ThreatIntelCache
 from .service import ThreatIntelService
 
-__all__ = ["ThreatIntelService"]
+__all__ = ["ThreatIntelCache", "ThreatIntelService"]
@@ -0,0 +1,158 @@
+"""Persistent SQLite cache for threat-intel provider responses."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from grpx.config import CONFIG_DIR
+
+CACHE_FILE = CONFIG_DIR / "threat_intel_cache.sqlite3"
+
+DEFAULT_TTL = 86400
+DEFAULT_NEGATIVE_TTL = 300
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Counting rows is a table scan, so the size limit is enforced every N writes.
+_EVICT_EVERY = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    provider TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    payload TEXT,
+    error TEXT,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (provider, ip)
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS stats (
+    provider TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class CacheEntry:
+    payload: dict | None
+    error: str | None
+
+
+class ThreatIntelCache:
+    """Cache raw provider responses per ``(provider, ip)`` with TTLs and LRU eviction.
+
+    Definitive failures (an invalid IP, no data) are cached too, for
+    ``negative_ttl`` seconds, so they are not retried on every run.
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_FILE,
+        ttl: dict[str, float] | None = None,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl or {}
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: dict) -> ThreatIntelCache:
+        section = config["threat_intel"].get("cache", {})
+        return cls(
+            ttl=section.get("ttl", {}),
+            negative_ttl=float(section.get("negative_ttl", DEFAULT_NEGATIVE_TTL)),
+            max_entries=int(section.get("max_entries", DEFAULT_MAX_ENTRIES)),
+        )
+
+    def get(self, provider: str, ip: str) -> CacheEntry | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, error FROM entries WHERE provider = ? AND ip = ? AND expires_at > ?",
+                (provider, ip, now),
+            ).fetchone()
+            column = "hits" if row else "misses"
+            self._conn.execute("INSERT OR IGNORE INTO stats (provider) VALUES (?)", (provider,))
+            self._conn.execute(f"UPDATE stats SET {column} = {column} + 1 WHERE provider = ?", (provider,))
+            if row:
+                self._conn.execute(
+                    "UPDATE entries SET last_access = ? WHERE provider = ? AND ip = ?", (now, provider, ip)
+                )
+            self._conn.commit()
+        if row is None:
+            return None
+        payload, error = row
+        return CacheEntry(payload=json.loads(payload) if payload is not None else None, error=error)
+
+    def put(self, provider: str, ip: str, payload: dict | None = None, error: str | None = None) -> None:
+        now = time.time()
+        ttl = self.negative_ttl if error is not None else float(self.ttl.get(provider, DEFAULT_TTL))
+        encoded = json.dumps(payload) if payload is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (provider, ip, payload, error, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, ip, encoded, error, now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict()
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            expired = self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE expires_at <= ?", (time.time(),)
+            ).fetchone()[0]
+            rows = self._conn.execute("SELECT provider, hits, misses FROM stats ORDER BY provider").fetchall()
+        providers = {}
+        for provider, hits, misses in rows:
+            total = hits + misses
+            hit_rate = round(hits / total, 4) if total else 0.0
+            providers[provider] = {"hits": hits, "misses": misses, "hit_rate": hit_rate}
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "expired": expired,
+            "max_entries": self.max_entries,
+            "providers": providers,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM stats")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+
+    def _evict(self) -> None:
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        excess = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
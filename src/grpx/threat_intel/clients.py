@@ -3,42 +3,57 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import time
+import urllib.error
+from dataclasses import dataclass, field
 from urllib.parse import urlencode
-import urllib.request
+
+from grpx.transport import HTTPTransport, shared_transport
+
+from .ratelimit import RateLimiter, RetryPolicy
 
 
 @dataclass
-class VirusTotalClient:
+class _Client:
     api_key: str
+    transport: HTTPTransport = field(default_factory=shared_transport)
+    timeout: float = 30.0
+    limiter: RateLimiter | None = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+
+    def _get_json(self, url: str, headers: dict[str, str] | None = None) -> dict:
+        # One deadline covers rate-limit waits, retries and the requests themselves,
+        # so a lookup never outlives the ``timeout`` its caller waits for.
+        deadline = time.monotonic() + self.timeout
+
+        def _attempt() -> bytes:
+            if self.limiter is not None:
+                self.limiter.acquire(timeout=deadline - time.monotonic())
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise urllib.error.URLError(TimeoutError(f"no time left within {self.timeout:g}s"))
+            return self.transport.request("GET", url, headers=headers, timeout=remaining)
+
+        return json.loads(self.retry.call(_attempt, deadline=deadline).decode("utf-8"))
+
 
+@dataclass
+class VirusTotalClient(_Client):
     def lookup_ip(self, ip: str) -> dict:
         url = f"https://www.virustotal.com/api/v3/ip_addresses/{ip}"
-        request = urllib.request.Request(url, headers={"x-apikey": self.api_key})
-        with urllib.request.urlopen(request, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
+        return self._get_json(url, headers={"x-apikey": self.api_key})
 
 
 @dataclass
-class AbuseIPDBClient:
-    api_key: str
-
+class AbuseIPDBClient(_Client):
     def lookup_ip(self, ip: str) -> dict:
         query = urlencode({"ipAddress": ip})
         url = f"https://api.abuseipdb.com/api/v2/check?{query}"
-        headers = {"Key": self.api_key, "Accept": "application/json"}
-        request = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(request, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
+        return self._get_json(url, headers={"Key": self.api_key, "Accept": "application/json"})
 
 
 @dataclass
-class IPinfoClient:
-    api_key: str
-
+class IPinfoClient(_Client):
     def lookup_ip(self, ip: str) -> dict:
         query = urlencode({"token": self.api_key})
-        url = f"https://ipinfo.io/{ip}/json?{query}"
-        request = urllib.request.Request(url)
-        with urllib.request.urlopen(request, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
+        return self._get_json(f"https://ipinfo.io/{ip}/json?{query}")
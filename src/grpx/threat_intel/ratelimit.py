@@ -0,0 +1,142 @@
+"""Client-side rate limiting and retry policy for threat-intel APIs."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import urllib.error
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a provider quota would need a longer wait than allowed."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self) -> None:
+        # Tokens may go negative: that reserves a future slot for a caller that sleeps.
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Per-provider limiter combining per-minute and per-day token buckets."""
+
+    def __init__(
+        self,
+        per_minute: float = 0,
+        per_day: float = 0,
+        max_wait: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        now = clock()
+        self._buckets: list[tuple[str, TokenBucket]] = []
+        if per_minute > 0:
+            self._buckets.append(("per-minute", TokenBucket(per_minute / 60.0, per_minute, now)))
+        if per_day > 0:
+            self._buckets.append(("per-day", TokenBucket(per_day / 86400.0, per_day, now)))
+
+    @classmethod
+    def from_config(cls, limits: dict) -> RateLimiter:
+        return cls(
+            per_minute=float(limits.get("per_minute", 0)),
+            per_day=float(limits.get("per_day", 0)),
+            max_wait=float(limits.get("max_wait", 300)),
+        )
+
+    def acquire(self, timeout: float | None = None) -> None:
+        """Block until a request is allowed, or raise if that would exceed ``max_wait`` (or ``timeout``)."""
+        limit = self.max_wait if timeout is None else min(self.max_wait, max(0.0, timeout))
+        with self._lock:
+            now = self._clock()
+            wait, label = 0.0, ""
+            for name, bucket in self._buckets:
+                needed = bucket.wait_time(now)
+                if needed > wait:
+                    wait, label = needed, name
+            if wait > limit:
+                raise RateLimitExceeded(f"{label} quota exhausted; next slot in {wait:.0f}s")
+            for _, bucket in self._buckets:
+                bucket.take()
+        if wait > 0:
+            self._sleep(wait)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter that honours ``Retry-After``."""
+
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    sleep: Callable[[float], None] = time.sleep
+
+    @classmethod
+    def from_config(cls, section: dict) -> RetryPolicy:
+        return cls(
+            max_retries=int(section.get("max_retries", 5)),
+            base_delay=float(section.get("base_delay", 1.0)),
+            max_delay=float(section.get("max_delay", 60.0)),
+        )
+
+    def call(self, fn: Callable[[], T], deadline: float | None = None) -> T:
+        """Call ``fn``, retrying retryable HTTP errors; no retry starts after ``deadline`` (``time.monotonic``)."""
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except urllib.error.HTTPError as exc:
+                if exc.code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise
+                delay = self.delay(attempt, exc.headers.get("Retry-After") if exc.headers else None)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+            attempt += 1
+            self.sleep(delay)
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header given as delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -2,31 +2,164 @@
 
 from __future__ import annotations
 
+import urllib.error
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator
+
+from grpx.providers.base import format_http_error
+from grpx.transport import shared_transport
+
+from .cache import ThreatIntelCache
 from .clients import AbuseIPDBClient, IPinfoClient, VirusTotalClient
+from .ratelimit import RateLimiter, RateLimitExceeded, RetryPolicy
+
+DEFAULT_PROVIDER_CONCURRENCY = 4
+
+_Lookup = tuple[Callable[[str], dict], Callable[[dict], dict]]
+
+# Answers about the IP itself ("invalid", "no data"), worth caching as failures.
+# Timeouts, throttling (429, RateLimitExceeded) and 5xx are transient and retried next time.
+_DEFINITIVE_STATUSES = frozenset({400, 404, 422})
+
+
+class CachedLookupError(RuntimeError):
+    """Raised when the cache holds a recent failure for a provider/IP pair."""
 
 
 class ThreatIntelService:
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: dict, cache: ThreatIntelCache | None = None, refresh: bool = False) -> None:
+        """``cache`` is consulted before any network call; ``refresh`` skips reads but still stores results."""
         self.config = config
+        self.cache = cache
+        self.refresh = refresh
+        self.transport = shared_transport(config)
+        section = config["threat_intel"]
+        self.timeout = float(section.get("timeout", 30))
+        self.retry = RetryPolicy.from_config(section.get("retry", {}))
+        rate_limits = section.get("rate_limits", {})
+        self.limiters = {name: RateLimiter.from_config(limits) for name, limits in rate_limits.items()}
+        self._lookups = self._build_lookups()
+        limits = section.get("concurrency", {})
+        # One pool per provider caps in-flight requests to that provider, whatever
+        # the number of IPs being enriched at once.
+        self._pools = {
+            name: ThreadPoolExecutor(
+                max_workers=max(1, int(limits.get(name, DEFAULT_PROVIDER_CONCURRENCY))),
+                thread_name_prefix=f"grpx-ti-{name}",
+            )
+            for name in self._lookups
+        }
+
+    def configured(self) -> bool:
+        return bool(self._lookups)
 
     def lookup_ip(self, ip: str, full: bool = False) -> dict:
-        keys = self.config["threat_intel"]
-        results: dict[str, dict] = {}
+        """Query every configured provider concurrently.
 
-        if keys.get("virustotal_api_key"):
-            vt = VirusTotalClient(keys["virustotal_api_key"]).lookup_ip(ip)
-            results["virustotal"] = vt if full else self._summarize_virustotal(vt)
+        Each provider gets ``threat_intel.timeout`` seconds, rate-limit waits and
+        retries included; a provider that fails or times out is reported as
+        ``{"error": ...}`` without affecting the others.
+        """
+        futures = self._submit(ip)
+        done, _ = wait(futures.values(), timeout=self.timeout)
+        return self._collect(futures, full, done)
 
-        if keys.get("abuseipdb_api_key"):
-            abuse = AbuseIPDBClient(keys["abuseipdb_api_key"]).lookup_ip(ip)
-            results["abuseipdb"] = abuse if full else self._summarize_abuseipdb(abuse)
+    def lookup_many(
+        self, ips: Iterable[str], full: bool = False, max_pending: int = 256
+    ) -> Iterator[tuple[str, dict]]:
+        """Enrich a stream of IPs, skipping duplicates, and yield ``(ip, results)`` in input order.
 
-        if keys.get("ipinfo_api_key"):
-            ipinfo = IPinfoClient(keys["ipinfo_api_key"]).lookup_ip(ip)
-            results["ipinfo"] = ipinfo if full else self._summarize_ipinfo(ipinfo)
+        At most ``max_pending`` IPs are in flight; per-provider concurrency comes from
+        ``threat_intel.concurrency``. Each lookup is bounded by ``threat_intel.timeout``.
+        """
+        seen: set[str] = set()
+        pending: deque[tuple[str, dict[str, Future[dict]]]] = deque()
+        for ip in ips:
+            if ip in seen:
+                continue
+            seen.add(ip)
+            pending.append((ip, self._submit(ip)))
+            if len(pending) >= max_pending:
+                head_ip, futures = pending.popleft()
+                yield head_ip, self._collect(futures, full)
+        while pending:
+            head_ip, futures = pending.popleft()
+            yield head_ip, self._collect(futures, full)
+
+    def close(self) -> None:
+        """Drop queued lookups and wait for running ones, which end by their deadline.
 
+        Close the service before the cache: running lookups still write to it.
+        """
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
+
+    def _submit(self, ip: str) -> dict[str, Future[dict]]:
+        return {
+            name: self._pools[name].submit(self._cached_lookup, name, lookup, ip)
+            for name, (lookup, _) in self._lookups.items()
+        }
+
+    def _cached_lookup(self, name: str, lookup: Callable[[str], dict], ip: str) -> dict:
+        if self.cache is None:
+            return lookup(ip)
+        if not self.refresh:
+            entry = self.cache.get(name, ip)
+            if entry is not None:
+                if entry.error is not None:
+                    raise CachedLookupError(entry.error)
+                return entry.payload or {}
+        try:
+            payload = lookup(ip)
+        except urllib.error.HTTPError as exc:
+            if exc.code in _DEFINITIVE_STATUSES:
+                self.cache.put(name, ip, error=_describe_error(name, exc))
+            raise
+        self.cache.put(name, ip, payload=payload)
+        return payload
+
+    def _collect(self, futures: dict[str, Future[dict]], full: bool, done: set[Future[dict]] | None = None) -> dict:
+        results: dict[str, dict] = {}
+        for name, future in futures.items():
+            if done is not None and future not in done:
+                # Abandoned: a running lookup gives up by itself at its deadline.
+                future.cancel()
+                results[name] = {"error": f"timed out after {self.timeout:g}s"}
+                continue
+            try:
+                payload = future.result()
+            except Exception as exc:
+                results[name] = {"error": _describe_error(name, exc)}
+                continue
+            summarize = self._lookups[name][1]
+            results[name] = payload if full else summarize(payload)
         return results
 
+    def _client_options(self, name: str) -> dict:
+        return {
+            "transport": self.transport,
+            "timeout": self.timeout,
+            "limiter": self.limiters.get(name),
+            "retry": self.retry,
+        }
+
+    def _build_lookups(self) -> dict[str, _Lookup]:
+        keys = self.config["threat_intel"]
+        lookups: dict[str, _Lookup] = {}
+        if keys.get("virustotal_api_key"):
+            vt = VirusTotalClient(keys["virustotal_api_key"], **self._client_options("virustotal"))
+            lookups["virustotal"] = (vt.lookup_ip, self._summarize_virustotal)
+        if keys.get("abuseipdb_api_key"):
+            abuse = AbuseIPDBClient(keys["abuseipdb_api_key"], **self._client_options("abuseipdb"))
+            lookups["abuseipdb"] = (abuse.lookup_ip, self._summarize_abuseipdb)
+        if keys.get("ipinfo_api_key"):
+            ipinfo = IPinfoClient(keys["ipinfo_api_key"], **self._client_options("ipinfo"))
+            lookups["ipinfo"] = (ipinfo.lookup_ip, self._summarize_ipinfo)
+        return lookups
+
     @staticmethod
     def _summarize_virustotal(payload: dict) -> dict:
         attrs = payload.get("data", {}).get("attributes", {})
@@ -60,3 +193,19 @@ class ThreatIntelService:
             "proxy": privacy.get("proxy"),
             "tor": privacy.get("tor"),
         }
+
+
+_PROVIDER_LABELS = {"virustotal": "VirusTotal", "abuseipdb": "AbuseIPDB", "ipinfo": "IPinfo"}
+
+
+def _describe_error(name: str, exc: Exception) -> str:
+    label = _PROVIDER_LABELS.get(name, name)
+    if isinstance(exc, CachedLookupError):
+        return f"{exc} (cached)"
+    if isinstance(exc, RateLimitExceeded):
+        return f"{label} rate limit: {exc}"
+    if isinstance(exc, urllib.error.HTTPError):
+        return format_http_error(label, exc)
+    if isinstance(exc, urllib.error.URLError):
+        return f"{label} connection error: {exc.reason}"
+    return f"{label} error: {exc}"
@@ -0,0 +1,466 @@
+"""Shared keep-alive HTTP transport used by providers and threat-intel clients."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import http.client
+import io
+import select
+import ssl
+import threading
+import urllib.error
+import urllib.request
+import weakref
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import Any, Iterator
+from urllib.parse import unquote, urljoin, urlsplit
+
+from grpx import __version__
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+_PoolKey = tuple[str, str, int]
+# A pool key plus the proxy URL the connection goes through ("" when direct).
+_RouteKey = tuple[str, str, int, str]
+
+# Errors that mean a pooled keep-alive socket was closed by the server while idle.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Only these are resent when a reused connection fails after the request was written.
+_IDEMPOTENT = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"})
+_REDIRECTS = frozenset({301, 302, 303, 307, 308})
+# Same limit as urllib's HTTPRedirectHandler.
+_MAX_REDIRECTS = 10
+
+
+class PooledResponse:
+    """HTTP response that hands its connection back to the pool once consumed."""
+
+    def __init__(
+        self,
+        transport: HTTPTransport,
+        key: _RouteKey,
+        conn: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+    ) -> None:
+        self._transport = transport
+        self._key = key
+        self._conn: http.client.HTTPConnection | None = conn
+        self._response = response
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amt: int | None = None) -> bytes:
+        data = self._response.read(amt)
+        if amt is None or not data:
+            self.close()
+        return data
+
+    def readline(self) -> bytes:
+        line = self._response.readline()
+        if not line:
+            self.close()
+        return line
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.readline, b"")
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        reusable = self._response.isclosed() and not self._response.will_close
+        if not reusable:
+            self._response.close()
+            conn.close()
+            return
+        self._transport._release(self._key, conn)
+
+    def __enter__(self) -> PooledResponse:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class HTTPTransport:
+    """Per-host pools of persistent HTTP/1.1 connections.
+
+    Errors are raised as ``urllib.error.HTTPError``/``URLError`` so callers keep the
+    same handling they had with ``urllib.request.urlopen``. Like ``urlopen``, it
+    honours ``HTTP_PROXY``/``HTTPS_PROXY``/``NO_PROXY`` (HTTPS goes through a
+    ``CONNECT`` tunnel) and follows redirects.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT) -> None:
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self._idle: dict[_RouteKey, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float = 60.0,
+    ) -> bytes:
+        """Send a request and return the full response body."""
+        with self.open(method, url, headers=headers, body=body, timeout=timeout) as response:
+            try:
+                return response.read()
+            except (OSError, http.client.HTTPException) as exc:
+                raise urllib.error.URLError(exc) from exc
+
+    def open(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float = 60.0,
+    ) -> PooledResponse:
+        """Send a request and return a response whose body has not been read yet.
+
+        Redirects are followed as ``urlopen`` does: for GET and HEAD, and for POST
+        on 301, 302 and 303, which turn it into a GET without a body.
+        """
+        send_headers = {"User-Agent": f"grpx/{__version__}", **(headers or {})}
+        for _ in range(_MAX_REDIRECTS + 1):
+            pooled = self._send(method, url, send_headers, body, timeout)
+            location = pooled.headers.get("Location")
+            if pooled.status not in _REDIRECTS or not location:
+                break
+            if not (method in {"GET", "HEAD"} or (method == "POST" and pooled.status in {301, 302, 303})):
+                break
+            pooled.read()
+            url = urljoin(url, location)
+            if method == "POST":
+                method, body = "GET", None
+                send_headers = {
+                    name: value
+                    for name, value in send_headers.items()
+                    if name.lower() not in {"content-type", "content-length"}
+                }
+        if pooled.status >= 400 or pooled.status in _REDIRECTS:
+            detail = pooled.read()
+            raise urllib.error.HTTPError(url, pooled.status, pooled.reason, pooled.headers, io.BytesIO(detail))
+        return pooled
+
+    def _send(
+        self, method: str, url: str, headers: dict[str, str], body: bytes | None, timeout: float
+    ) -> PooledResponse:
+        (scheme, host, port), target = _split_url(url)
+        proxy = _proxy_for(scheme, host)
+        key = (scheme, host, port, proxy)
+        headers = dict(headers)
+        if proxy and scheme == "http":
+            # Plain HTTP goes to the proxy itself, with the full URL as target.
+            target = url.split("#", 1)[0]
+            headers.update(_proxy_headers(proxy))
+
+        while True:
+            conn, reused = self._acquire(key)
+            written = False
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                conn.sock.settimeout(timeout)
+                conn.request(method, target, body=body, headers=headers)
+                written = True
+                response = conn.getresponse()
+                break
+            except _STALE_ERRORS as exc:
+                conn.close()
+                # Once written, a POST may have reached the server: never send it twice.
+                if not reused or (written and method not in _IDEMPOTENT):
+                    raise urllib.error.URLError(exc) from exc
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                raise urllib.error.URLError(exc) from exc
+        return PooledResponse(self, key, conn, response)
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for conns in pools.values():
+            for conn in conns:
+                conn.close()
+
+    def _acquire(self, key: _RouteKey) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn = idle.pop()
+                if not _dropped(conn):
+                    return conn, True
+                conn.close()
+        scheme, host, port, proxy = key
+        address = (host, port)
+        if proxy:
+            proxy_parts = urlsplit(proxy)
+            address = (proxy_parts.hostname or "", proxy_parts.port or 80)
+        if scheme == "http":
+            return http.client.HTTPConnection(*address, timeout=self.connect_timeout), False
+        tls = http.client.HTTPSConnection(*address, timeout=self.connect_timeout, context=self._ssl_context)
+        if proxy:
+            tls.set_tunnel(host, port, headers=_proxy_headers(proxy))
+        return tls, False
+
+    def _release(self, key: _RouteKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+def _dropped(conn: http.client.HTTPConnection) -> bool:
+    """Whether the server closed an idle connection: its socket reads EOF without blocking."""
+    if conn.sock is None:
+        return False
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def _proxy_for(scheme: str, host: str) -> str:
+    """Return the proxy URL for ``scheme`` from the environment (as ``urlopen`` does), or ``""``."""
+    proxy = urllib.request.getproxies().get(scheme, "")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return ""
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
+def _proxy_headers(proxy: str) -> dict[str, str]:
+    parts = urlsplit(proxy)
+    if parts.username is None:
+        return {}
+    credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode()).decode("ascii")}
+
+
+class AsyncHTTPTransport:
+    """Minimal non-blocking HTTP/1.1 client on asyncio streams with keep-alive pools.
+
+    Instances belong to one event loop; use :func:`async_transport` to get the one
+    for the running loop. Errors and proxy handling mirror :class:`HTTPTransport`.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT) -> None:
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self._idle: dict[_RouteKey, list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._ssl_context = ssl.create_default_context()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        body: bytes | None = None,
+        timeout: float = 60.0,
+    ) -> bytes:
+        """Send a request and return the full response body."""
+        (scheme, host, port), target = _split_url(url)
+        proxy = _proxy_for(scheme, host)
+        key = (scheme, host, port, proxy)
+        host_header = host if port in {80, 443} else f"{host}:{port}"
+        send_headers = {"Host": host_header, "User-Agent": f"grpx/{__version__}", **(headers or {})}
+        if proxy and scheme == "http":
+            target = url.split("#", 1)[0]
+            send_headers.update(_proxy_headers(proxy))
+        send_headers["Content-Length"] = str(len(body or b""))
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in send_headers.items())
+        payload = head.encode("latin-1") + b"\r\n" + (body or b"")
+
+        while True:
+            reader, writer, reused = await self._acquire(key)
+            written = False
+            try:
+                writer.write(payload)
+                await asyncio.wait_for(writer.drain(), timeout)
+                written = True
+                status, reason, response_headers, data, reusable = await asyncio.wait_for(
+                    self._read_response(reader), timeout
+                )
+                break
+            except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError) as exc:
+                writer.close()
+                if not reused or (written and method not in _IDEMPOTENT):
+                    raise urllib.error.URLError(exc) from exc
+            except (OSError, asyncio.TimeoutError, ValueError) as exc:
+                writer.close()
+                raise urllib.error.URLError(exc) from exc
+
+        if reusable:
+            self._release(key, reader, writer)
+        else:
+            writer.close()
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, response_headers, io.BytesIO(data))
+        return data
+
+    async def aclose(self) -> None:
+        """Close every idle pooled connection."""
+        pools, self._idle = self._idle, {}
+        for conns in pools.values():
+            for _, writer in conns:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+
+    async def _acquire(self, key: _RouteKey) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port, proxy = key
+        try:
+            if proxy:
+                reader, writer = await asyncio.wait_for(
+                    self._open_via_proxy(scheme, host, port, proxy), self.connect_timeout
+                )
+            else:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        host,
+                        port,
+                        ssl=self._ssl_context if scheme == "https" else None,
+                        server_hostname=host if scheme == "https" else None,
+                    ),
+                    self.connect_timeout,
+                )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+            raise urllib.error.URLError(exc) from exc
+        return reader, writer, False
+
+    async def _open_via_proxy(
+        self, scheme: str, host: str, port: int, proxy: str
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        proxy_parts = urlsplit(proxy)
+        reader, writer = await asyncio.open_connection(proxy_parts.hostname or "", proxy_parts.port or 80)
+        if scheme == "http":
+            return reader, writer
+        # HTTPS goes through a CONNECT tunnel, then TLS is started inside it.
+        head = f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in _proxy_headers(proxy).items())
+        try:
+            writer.write(head.encode("latin-1") + b"\r\n")
+            await writer.drain()
+            _, status, reason, _ = await self._read_head(reader)
+            if status != 200:
+                raise OSError(f"Tunnel connection failed: {status} {reason}")
+            if hasattr(writer, "start_tls"):
+                await writer.start_tls(self._ssl_context, server_hostname=host)
+            else:  # Python 3.10: upgrade the transport and wrap it in a new writer.
+                loop = asyncio.get_running_loop()
+                protocol = writer.transport.get_protocol()
+                tls = await loop.start_tls(writer.transport, protocol, self._ssl_context, server_hostname=host)
+                writer = asyncio.StreamWriter(tls, protocol, reader, loop)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    def _release(self, key: _RouteKey, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.pool_size:
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> tuple[str, int, str, Message]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        version, status, reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+        raw_headers = bytearray()
+        while True:
+            line = await reader.readline()
+            if line in {b"\r\n", b"\n", b""}:
+                break
+            raw_headers += line
+        return version, int(status), reason, BytesHeaderParser().parsebytes(bytes(raw_headers))
+
+    @classmethod
+    async def _read_response(cls, reader: asyncio.StreamReader) -> tuple[int, str, Message, bytes, bool]:
+        version, status, reason, headers = await cls._read_head(reader)
+        reusable = version == "HTTP/1.1" and headers.get("Connection", "").lower() != "close"
+        if "chunked" in headers.get("Transfer-Encoding", "").lower():
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in {b"\r\n", b"\n", b""}:
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b"".join(parts)
+        elif headers.get("Content-Length") is not None:
+            data = await reader.readexactly(int(headers["Content-Length"]))
+        else:
+            data = await reader.read()
+            reusable = False
+        return status, reason, headers, data, reusable
+
+
+def _split_url(url: str) -> tuple[_PoolKey, str]:
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in {"http", "https"} or not parts.hostname:
+        raise urllib.error.URLError(f"unsupported URL: {url}")
+    key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return key, target
+
+
+_async_transports: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHTTPTransport] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def async_transport(settings: HTTPTransport | None = None) -> AsyncHTTPTransport:
+    """Return the async transport bound to the running loop, sized like ``settings``."""
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.get(loop)
+    if transport is None:
+        settings = settings or shared_transport()
+        transport = AsyncHTTPTransport(pool_size=settings.pool_size, connect_timeout=settings.connect_timeout)
+        _async_transports[loop] = transport
+    return transport
+
+
+_shared: HTTPTransport | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport(config: dict | None = None) -> HTTPTransport:
+    """Return the process-wide transport, rebuilt if the ``http`` settings change."""
+    global _shared
+    settings = (config or {}).get("http", {})
+    pool_size = int(settings.get("pool_size", DEFAULT_POOL_SIZE))
+    connect_timeout = float(settings.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT))
+    with _shared_lock:
+        changed = _shared is not None and (_shared.pool_size, _shared.connect_timeout) != (pool_size, connect_timeout)
+        if _shared is None or (config is not None and changed):
+            if _shared is not None:
+                _shared.close()
+            _shared = HTTPTransport(pool_size=pool_size, connect_timeout=connect_timeout)
+        return _shared
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from grpx.blocklist import IOCSet, blocklist_path, build_blocklist, list_blocklists
+from grpx.cli import main
+from grpx.config import ConfigManager
+
+FEED = """# sample feed
+evil.example
+0.0.0.0 ads.bad.test
+203.0.113.0/24
+198.51.100.7,malware,2024-05-01
+2001:DB8:0::1
+hxxp://phish[.]example/login
+44d88612fea8a8f36de82e1f56ace6e9
+2001:db8::/32
+"""
+
+
+@pytest.fixture
+def blocklist_dir(monkeypatch, tmp_path: Path) -> Path:
+    directory = tmp_path / "blocklists"
+    monkeypatch.setattr("grpx.blocklist.BLOCKLIST_DIR", directory)
+    monkeypatch.setattr("grpx.detectors._registry", None)
+    return directory
+
+
+def _build(tmp_path: Path, directory: Path, feed: str = FEED, **kwargs) -> dict:
+    path = tmp_path / "feed.txt"
+    path.write_text(feed)
+    return build_blocklist([path], blocklist_dir=directory, **kwargs)
+
+
+def test_build_normalizes_feed_entries(tmp_path: Path, blocklist_dir: Path) -> None:
+    stats = _build(tmp_path, blocklist_dir)
+
+    assert (stats["iocs"], stats["networks"], stats["skipped"]) == (6, 1, 1)
+    ioc_set = IOCSet(blocklist_path("ioc", blocklist_dir))
+    try:
+        assert "EVIL.example." in ioc_set and "ads.bad.test" in ioc_set
+        assert "203.0.113.77" in ioc_set and "2001:db8::1" in ioc_set
+        assert "http://phish.example/login" in ioc_set
+        assert "0.0.0.0" not in ioc_set and "203.0.114.1" not in ioc_set
+    finally:
+        ioc_set.close()
+
+
+def test_scan_finds_values_inside_tokens(tmp_path: Path, blocklist_dir: Path) -> None:
+    _build(tmp_path, blocklist_dir)
+    ioc_set = IOCSet(blocklist_path("ioc", blocklist_dir))
+    text = (
+        'GET http://phish.example/login?u=1 from src=203.0.113.9:443 to "www.evil.example" '
+        "via [2001:db8:0::1]:53 file=44D88612FEA8A8F36DE82E1F56ACE6E9 user a@sub.ads.bad.test\n"
+        "ok 8.8.8.8 good.example evil.example.org build/198.51.100.7 http://x.evil.example/a\n"
+    )
+    try:
+        assert ioc_set.scan(text) == {
+            "ioc": [
+                "http://phish.example/login?u=1",
+                "203.0.113.9",
+                "www.evil.example",
+                "2001:db8:0::1",
+                "44D88612FEA8A8F36DE82E1F56ACE6E9",
+                "a@sub.ads.bad.test",
+                "198.51.100.7",
+                "x.evil.example",
+            ]
+        }
+        assert ioc_set.scan("nothing to see 10.0.0.1\n") == {}
+    finally:
+        ioc_set.close()
+
+
+def test_append_keeps_existing_iocs(tmp_path: Path, blocklist_dir: Path) -> None:
+    _build(tmp_path, blocklist_dir)
+    stats = _build(tmp_path, blocklist_dir, feed="new.example\nevil.example\n10.0.0.0/8\n", append=True)
+
+    assert (stats["iocs"], stats["networks"]) == (7, 2)
+    assert [entry["name"] for entry in list_blocklists(blocklist_dir)] == ["ioc"]
+
+
+def test_cli_builds_blocklist_and_detects_hits(monkeypatch, tmp_path: Path, blocklist_dir: Path, capsys) -> None:
+    monkeypatch.setattr("grpx.cli.ConfigManager", lambda: ConfigManager(tmp_path / "config.json"))
+    feed = tmp_path / "feed.txt"
+    feed.write_text(FEED)
+    log = tmp_path / "fw.log"
+    log.write_text("".join(f"deny src=10.0.{i % 250}.1 dst=203.0.113.{i % 250}\n" for i in range(600)))
+
+    assert main(["blocklist", "build", str(feed), "--name", "feeds"]) == 0
+    capsys.readouterr()
+    assert main(["--detect", "feeds", "-f", str(log)]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "203.0.113.0" and lines[-1] == "Matches: 600"
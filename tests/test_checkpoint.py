@@ -0,0 +1,85 @@
+import json
+import os
+import pickle
+from pathlib import Path
+
+from grpx.checkpoint import CheckpointStore
+from grpx.detectors import iter_detections
+from grpx.file_stream import FileStreamProcessor
+
+
+def test_detectors_resume_from_last_offset(tmp_path: Path) -> None:
+    store = CheckpointStore(tmp_path / "cp.sqlite3")
+    log = tmp_path / "fw.log"
+    log.write_text("deny 10.0.0.1\ndeny 10.0.0.2\ndeny 10.0.0.")
+
+    first = list(iter_detections(["ipv4"], file_path=str(log), checkpoints=store))
+    with log.open("a") as fh:
+        fh.write("3\ndeny 10.0.0.4\n")
+    second = list(iter_detections(["ipv4"], file_path=str(log), checkpoints=store))
+    third = list(iter_detections(["ipv4"], file_path=str(log), checkpoints=store))
+
+    assert [m for _, m in first] == ["10.0.0.1", "10.0.0.2"]
+    assert [m for _, m in second] == ["10.0.0.3", "10.0.0.4"]
+    assert third == []
+    assert store.begin(log, '["detect", ["ipv4"]]').state == {"ipv4": 4}
+
+
+def test_rotation_and_truncation_restart_from_zero(tmp_path: Path) -> None:
+    store = CheckpointStore(tmp_path / "cp.sqlite3")
+    log = tmp_path / "app.log"
+    log.write_text("ERROR a\nERROR b\n")
+    processor = FileStreamProcessor(log, include="ERROR", checkpoints=store)
+    assert list(processor.iter_lines()) == ["ERROR a", "ERROR b"]
+
+    log.write_text("ERROR c\n")
+    assert list(processor.iter_lines()) == ["ERROR c"]
+
+    os.replace(tmp_path / "app.log", tmp_path / "app.log.1")
+    log.write_text("ERROR c\nERROR d\n")
+    assert list(processor.iter_lines()) == ["ERROR c", "ERROR d"]
+
+
+def test_unfinished_iteration_is_not_committed(tmp_path: Path) -> None:
+    store = CheckpointStore(tmp_path / "cp.sqlite3")
+    log = tmp_path / "app.log"
+    log.write_text("one\ntwo\n")
+    processor = FileStreamProcessor(log, checkpoints=store)
+
+    assert next(iter(processor.iter_lines())) == "one"
+    assert list(processor.iter_lines()) == ["one", "two"]
+
+
+def test_summarize_merges_new_tail_into_stored_state(tmp_path: Path) -> None:
+    store = CheckpointStore(tmp_path / "cp.sqlite3")
+    log = tmp_path / "app.log"
+    log.write_text("".join(f"ERROR job {i} from 10.0.0.{i}\n" for i in range(100)))
+    assert FileStreamProcessor(log, checkpoints=store).summarize()["line_count"] == 100
+
+    with log.open("a") as fh:
+        fh.write("".join(f"INFO job {i} from 10.0.1.{i}\n" for i in range(50)))
+    resumed = FileStreamProcessor(log, checkpoints=store).summarize()
+    full = FileStreamProcessor(log).summarize()
+
+    assert resumed["line_count"] == 150
+    assert resumed["severity"] == full["severity"]
+    assert resumed["top_templates"] == full["top_templates"]
+    assert resumed["distinct"] == full["distinct"]
+
+
+def test_unusable_state_restarts_from_zero(tmp_path: Path) -> None:
+    store = CheckpointStore(tmp_path / "cp.sqlite3")
+    log = tmp_path / "app.log"
+    log.write_text("".join(f"ERROR job {i} from 10.0.0.{i} to a{i}@example.com\n" for i in range(100)))
+    FileStreamProcessor(log, checkpoints=store).summarize()
+    FileStreamProcessor(log, checkpoints=store).summarize()
+    (blob,) = store._conn.execute("SELECT state FROM checkpoints").fetchone()
+    stored = json.loads(blob)
+    del stored["state"]["detector_hits"]["email"]
+    tampered = [pickle.dumps({"line_count": 1}), json.dumps({**stored, "version": 0}), json.dumps(stored)]
+
+    for state in tampered:
+        store._conn.execute("UPDATE checkpoints SET state = ?", (state,))
+        summary = FileStreamProcessor(log, checkpoints=store).summarize()
+        assert summary["line_count"] == 100
+        assert summary["top_detector_hits"]["email"][0]["count"] == 1
@@ -1,6 +1,7 @@
 from argparse import Namespace
 
 from grpx.cli import main
+from grpx.config import ConfigManager
 
 
 def test_main_help_returns_zero() -> None:
@@ -32,3 +33,32 @@ def test_threat_intel_lookup_shortcut(monkeypatch) -> None:
 
     assert code == 0
     assert called["value"] is True
+
+
+def test_detect_multiple_grouped_output(monkeypatch, tmp_path, capsys) -> None:
+    monkeypatch.setattr("grpx.cli.ConfigManager", lambda: ConfigManager(tmp_path / "config.json"))
+    log = tmp_path / "app.log"
+    log.write_text("login 10.0.0.1 bob@example.com\nlogin 10.0.0.2\n")
+
+    code = main(["--detect", "ipv4,email", "-f", str(log)])
+
+    out = capsys.readouterr().out
+    assert code == 0
+    assert out.index("[ipv4]") < out.index("10.0.0.2") < out.index("[email]")
+    assert "Total matches: 3" in out
+
+
+def test_detect_over_directory_reports_per_file(monkeypatch, tmp_path, capsys) -> None:
+    monkeypatch.setattr("grpx.cli.ConfigManager", lambda: ConfigManager(tmp_path / "config.json"))
+    logs = tmp_path / "logs"
+    (logs / "old").mkdir(parents=True)
+    (logs / "a.log").write_text("login 10.0.0.1\nlogin 10.0.0.2\n")
+    (logs / "old" / "b.log").write_text("login 10.0.0.3\n")
+
+    code = main(["--detect", "ipv4", "-f", str(logs), "-r"])
+
+    out = capsys.readouterr().out
+    assert code == 0
+    assert f"{logs / 'a.log'}:10.0.0.2" in out
+    assert f"{logs / 'old' / 'b.log'}: ipv4=1" in out
+    assert "Total matches: 3 in 2 files" in out
@@ -0,0 +1,90 @@
+import re
+from pathlib import Path
+
+from grpx.detectors import (
+    get_detectors,
+    iter_detections,
+    iter_detector,
+    required_literals,
+    resolve_detectors,
+    run_detector,
+)
+
+
+def test_run_detector_text() -> None:
+    matches = run_detector("ipv4", text="src=10.0.0.1 dst=192.168.1.20")
+
+    assert matches == ["10.0.0.1", "192.168.1.20"]
+
+
+def test_iter_detector_handles_chunk_edges(tmp_path: Path) -> None:
+    log = tmp_path / "fw.log"
+    log.write_text("".join(f"conn from 10.0.{i % 256}.{i % 200} ok\n" for i in range(500)))
+
+    matches = list(iter_detector("ipv4", file_path=str(log), chunk_size=7))
+
+    assert len(matches) == 500
+    assert matches[0] == "10.0.0.0"
+    assert matches[-1] == "10.0.243.99"
+
+
+def test_unknown_detector_raises_eagerly() -> None:
+    try:
+        iter_detector("nope", text="x")
+        raised = False
+    except ValueError:
+        raised = True
+
+    assert raised
+
+
+def test_parallel_detector_preserves_file_order(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("grpx.parallel.os.cpu_count", lambda: 2)
+    log = tmp_path / "fw.log"
+    log.write_text("".join(f"deny 10.1.{i // 250}.{i % 250}\n" for i in range(2000)))
+
+    serial = list(iter_detector("ipv4", file_path=str(log)))
+    parallel = list(iter_detector("ipv4", file_path=str(log), workers=2))
+
+    assert parallel == serial
+
+
+def test_resolve_detectors_all_and_list() -> None:
+    assert resolve_detectors("all") == ["email", "ipv4", "url"]
+    assert resolve_detectors("url, ipv4,url") == ["url", "ipv4"]
+    assert resolve_detectors("all,cidr") == ["email", "ipv4", "url", "cidr"]
+
+
+def test_iter_detections_single_pass_keeps_overlaps() -> None:
+    text = "GET http://10.0.0.5/admin from admin@example.com\n"
+
+    found = list(iter_detections(["ipv4", "email", "url"], text=text))
+
+    assert ("ipv4", "10.0.0.5") in found
+    assert ("url", "http://10.0.0.5/admin") in found
+    assert ("email", "admin@example.com") in found
+
+
+def test_ipv4_rejects_invalid_octets_and_version_strings() -> None:
+    text = "a 10.0.0.1, 999.1.1.1 256.0.0.1 010.1.1.1 v1.2.3.4.5 end 8.8.8.8.\n"
+
+    assert run_detector("ipv4", text=text) == ["10.0.0.1", "8.8.8.8"]
+
+
+def test_ipv6_and_cidr_are_validated_and_opt_in() -> None:
+    text = "peer fe80::1%eth0 at 12:00:00 mac 00:1a:2b:3c:4d:5e route 2001:db8::/32 via 10.0.0.0/8 bad 10.0.0.0/33\n"
+
+    assert run_detector("ipv6", text=text) == ["fe80::1", "2001:db8::"]
+    assert run_detector("cidr", text=text) == ["2001:db8::/32", "10.0.0.0/8"]
+    assert "ipv6" not in resolve_detectors("all")
+
+
+def test_required_literals_and_sparse_prefilter_match_plain_regex() -> None:
+    assert required_literals(re.compile(r"\bfoo-(?:\d+\.){3}x(?:y|z)bar?")) == ["foo-", ".", "x", "ba"]
+    detectors = get_detectors(["email", "ipv4"])
+    assert detectors["email"].literal == "@" and detectors["ipv4"].literal == "."
+
+    text = "".join(f"line {i} {'mail a.b@example.com' if i % 50 == 0 else 'nothing'}\n" for i in range(1000))
+
+    assert detectors["email"].findall(text) == detectors["email"].pattern.findall(text)
+    assert len(detectors["email"].findall(text)) == 20
@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from grpx.executor import PromptExecutor, iter_token_chunks
+from grpx.providers import ResponseCache
+from grpx.providers.base import BaseProvider
+
+
+class _RecordingProvider(BaseProvider):
+    def __init__(self) -> None:
+        super().__init__("fake", transport=object())  # type: ignore[arg-type]
+        self.prompts: list[str] = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.prompts.append(prompt)
+        if "Partial findings follow" in prompt:
+            return "final answer"
+        part = prompt.split("(part ", 1)[1].split(")", 1)[0]
+        return f"finding {part}"
+
+
+def test_iter_token_chunks_respects_budget() -> None:
+    chunks = list(iter_token_chunks((f"line {i:04d}" for i in range(100)), token_budget=10))
+
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert "\n".join(chunks).split("\n") == [f"line {i:04d}" for i in range(100)]
+
+
+def test_map_reduce_covers_whole_file(tmp_path: Path) -> None:
+    log = tmp_path / "incident.log"
+    log.write_text("".join(f"event {i} failed\n" for i in range(2000)))
+    provider = _RecordingProvider()
+    executor = PromptExecutor(provider, allow_content_to_ai=True, chunk_tokens=500, parallelism=3, use_cache=False)
+
+    answer = executor.apply_to_file(str(log), "What failed?", max_lines=10, map_reduce=True)
+
+    map_prompts = [p for p in provider.prompts if "(part " in p]
+    assert answer == "final answer"
+    assert len(map_prompts) > 10
+    assert any("event 1999 failed" in p for p in map_prompts)
+    reduce_prompt = provider.prompts[-1]
+    assert reduce_prompt.index("finding 1") < reduce_prompt.index(f"finding {len(map_prompts)}")
+
+
+def test_response_cache_answers_repeat_runs(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_text("ERROR disk full\n")
+    provider = _RecordingProvider()
+    cache = ResponseCache(tmp_path / "llm.sqlite3")
+
+    for _ in range(2):
+        executor = PromptExecutor(provider, cache=cache)
+        assert executor.apply_to_file(str(log), "Summarize (part 1)") == "finding 1"
+    uncached = PromptExecutor(provider, use_cache=False)
+    uncached.apply_to_file(str(log), "Summarize (part 1)")
+
+    assert len(provider.prompts) == 2
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "llm.sqlite3", max_bytes=10)
+    cache.put("a", "12345")
+    time.sleep(0.01)
+    cache.put("b", "12345")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.put("c", "12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+
+
+def test_response_cache_keeps_a_running_byte_total(tmp_path: Path) -> None:
+    path = tmp_path / "llm.sqlite3"
+    legacy = sqlite3.connect(str(path))
+    legacy.execute("CREATE TABLE responses (key TEXT PRIMARY KEY, response TEXT, size INTEGER, last_access REAL)")
+    legacy.execute("INSERT INTO responses VALUES ('old', 'xxxx', 4, 0)")
+    legacy.commit()
+    legacy.close()
+
+    cache = ResponseCache(path, max_bytes=1000)
+    for i in range(300):
+        cache.put(f"k{i}", "x" * 10)
+    cache.put("k299", "y" * 20)
+
+    conn = sqlite3.connect(str(path))
+    total = conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+    assert total == conn.execute("SELECT SUM(size) FROM responses").fetchone()[0] <= 1000
+    assert cache.get("old") is None and cache.get("k299") == "y" * 20
@@ -0,0 +1,94 @@
+import gzip
+from pathlib import Path
+
+import pytest
+
+from grpx.cli import main
+from grpx.config import ConfigManager
+from grpx.detectors import iter_file_set_detections
+from grpx.file_set import expand_paths, plan_file_tasks
+from grpx.file_stream import iter_file_set_lines, summarize_files
+
+
+def _make_tree(root: Path) -> dict[str, Path]:
+    (root / "nginx" / "old").mkdir(parents=True)
+    files = {
+        "big": root / "nginx" / "access.log",
+        "small": root / "nginx" / "error.log",
+        "archived": root / "nginx" / "old" / "access.log.1.gz",
+        "top": root / "auth.log",
+    }
+    files["big"].write_text("".join(f"GET /item/{i} from 10.0.0.{i % 200}\n" for i in range(4000)))
+    files["small"].write_text("ERROR upstream 10.9.9.9 timed out\nWARN retry\n")
+    files["archived"].write_bytes(gzip.compress(b"GET / from 192.168.1.1\nGET / from 192.168.1.2\n"))
+    files["top"].write_text("Failed password for root from 172.16.0.5\n")
+    return files
+
+
+def test_expand_paths_directories_globs_and_recursion(tmp_path: Path) -> None:
+    files = _make_tree(tmp_path)
+
+    assert expand_paths([str(tmp_path / "nginx")]) == [files["big"], files["small"]]
+    assert set(expand_paths([str(tmp_path)], recursive=True)) == set(files.values())
+    assert expand_paths([str(tmp_path / "**" / "access.log*")]) == [files["big"], files["archived"]]
+    assert expand_paths([str(files["top"]), str(tmp_path / "*.log")]) == [files["top"]]
+    with pytest.raises(ValueError):
+        expand_paths([str(tmp_path / "*.missing")])
+
+
+def test_empty_file_set_is_an_error(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("grpx.cli.ConfigManager", lambda: ConfigManager(tmp_path / "config.json"))
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "nested" / "only").mkdir(parents=True)
+
+    with pytest.raises(ValueError, match="No files found under .*empty"):
+        expand_paths([str(tmp_path / "empty")], recursive=True)
+    with pytest.raises(ValueError, match="use -r"):
+        main(["--detect", "ipv4", "-f", str(tmp_path / "nested")])
+
+
+def test_plan_file_tasks_biggest_first_with_split_and_packing(tmp_path: Path) -> None:
+    files = _make_tree(tmp_path)
+    big_size = files["big"].stat().st_size
+
+    tasks = plan_file_tasks(list(files.values()), workers=2, range_size=big_size // 3)
+
+    big_pieces = [piece for task in tasks for piece in task if piece[0] == str(files["big"])]
+    assert len(big_pieces) >= 3
+    assert all(len(task) == 1 for task in tasks[: len(big_pieces)])
+    assert [start for _, start, _ in big_pieces] == sorted(start for _, start, _ in big_pieces)
+    assert big_pieces[-1][2] == big_size
+    small = [piece[0] for task in tasks[len(big_pieces) :] for piece in task]
+    assert sorted(small) == sorted(str(path) for name, path in files.items() if name != "big")
+
+
+def test_file_set_scans_group_results_per_file(tmp_path: Path) -> None:
+    files = _make_tree(tmp_path)
+    paths = sorted(files.values())
+
+    serial = list(iter_file_set_detections(["ipv4"], paths))
+    parallel = list(iter_file_set_detections(["ipv4"], paths, workers=3))
+
+    assert parallel == serial
+    assert serial[0] == (str(files["big"]), "ipv4", "10.0.0.0")
+    assert len(serial) == 4000 + 1 + 2 + 1
+    order = list(dict.fromkeys(path for path, _, _ in serial))
+    assert len(order) == 4 and order[0] == str(files["big"])
+
+    lines = list(iter_file_set_lines(paths, include="ERROR|Failed", workers=2))
+    assert sorted(lines) == [
+        (str(files["top"]), "Failed password for root from 172.16.0.5"),
+        (str(files["small"]), "ERROR upstream 10.9.9.9 timed out"),
+    ]
+
+
+def test_summarize_files_reports_per_file_and_total(tmp_path: Path) -> None:
+    files = _make_tree(tmp_path)
+
+    summary = summarize_files(sorted(files.values()), workers=2)
+
+    assert summary["file_count"] == 4
+    assert summary["total"]["line_count"] == 4000 + 2 + 2 + 1
+    by_path = {entry["path"]: entry for entry in summary["files"]}
+    assert by_path[str(files["small"])]["severity"] == {"error": 1, "warning": 1}
+    assert summary["files"][0]["path"] == str(files["big"])
@@ -0,0 +1,151 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from grpx.file_stream import FileStreamProcessor, _bytes_pattern
+from grpx.parallel import line_aligned_ranges
+
+
+def _write_log(path: Path, count: int) -> None:
+    path.write_text("".join(f"{'ERROR' if i % 3 == 0 else 'INFO'} request {i}\n" for i in range(count)))
+
+
+def test_line_aligned_ranges_cover_file(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    _write_log(log, 1000)
+    data = log.read_bytes()
+
+    ranges = line_aligned_ranges(log, parts=7)
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[start - 1 : start] == b"\n"
+
+
+def test_parallel_iter_lines_matches_serial(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    _write_log(log, 3000)
+
+    serial = list(FileStreamProcessor(log, include="ERROR", exclude="7$").iter_lines())
+    parallel = list(FileStreamProcessor(log, include="ERROR", exclude="7$", workers=3).iter_lines())
+
+    assert parallel == serial
+    assert serial[0] == "ERROR request 0"
+
+
+def test_mmap_path_matches_text_path(tmp_path: Path) -> None:
+    log = tmp_path / "mixed.log"
+    log.write_bytes(
+        b"INFO start\r\n"
+        b"ERROR disk full at /var\n"
+        b"error\n"
+        b"at boot\n"
+        b"WARN caf\xc3\xa9 timeout\n"
+        b"ERROR last line without newline"
+    )
+
+    for include, exclude in [("ERROR", None), (r"error\s+at", None), ("^(WARN|INFO)", "start"), (None, "ERROR")]:
+        fast = FileStreamProcessor(log, include=include, exclude=exclude)
+        slow = FileStreamProcessor(log, include=include, exclude=exclude, use_mmap=False)
+
+        assert list(fast.iter_lines()) == list(slow.iter_lines())
+
+
+def test_mmap_path_on_empty_file(tmp_path: Path) -> None:
+    log = tmp_path / "empty.log"
+    log.write_bytes(b"")
+
+    assert list(FileStreamProcessor(log, include="x").iter_lines()) == []
+
+
+def test_summarize_templates_severity_and_timeline(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_text(
+        "".join(
+            f"2024-05-01T12:{i // 60:02d}:{i % 60:02d}Z {'ERROR' if i % 4 == 0 else 'INFO'} "
+            f"request {i} from 10.0.0.{i % 3} id=deadbeef{i:04d}\n"
+            for i in range(240)
+        )
+        + "May  1 12:05:00 host sshd[42]: Failed password for admin@example.com\n"
+    )
+
+    summary = FileStreamProcessor(log).summarize(top_k=3)
+
+    assert summary["line_count"] == 241
+    assert summary["severity"]["error"] == 60
+    assert summary["severity"]["info"] == 180
+    assert summary["severity"]["unlabelled"] == 1
+    assert summary["top_templates"][0] == {"template": "<*> INFO request <*> from <*> id=<*>", "count": 180}
+    assert summary["timeline"]["resolution"] == "minute"
+    assert summary["timeline"]["counts"]["2024-05-01 12:00"] == 60
+    assert summary["timeline"]["counts"]["05-01 12:05"] == 1
+    assert summary["top_detector_hits"]["ipv4"][0]["count"] == 80
+    assert summary["top_detector_hits"]["email"] == [{"value": "admin@example.com", "count": 1}]
+    assert "deadbeef" not in str(summary)
+
+
+def test_summarize_respects_max_lines_and_filters(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    _write_log(log, 300)
+
+    summary = FileStreamProcessor(log, include="ERROR").summarize(max_lines=50)
+
+    assert summary["line_count"] == 50
+    assert summary["severity"]["error"] == 50
+    assert summary["timeline"] == {}
+
+
+def test_parallel_summarize_covers_whole_file(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("grpx.parallel.os.cpu_count", lambda: 2)
+    log = tmp_path / "app.log"
+    _write_log(log, 20000)
+
+    serial = FileStreamProcessor(log, exclude="7$").summarize()
+    parallel = FileStreamProcessor(log, exclude="7$", workers=2).summarize()
+
+    assert serial["line_count"] == 18000
+    for key in ("line_count", "severity", "top_templates", "distinct"):
+        assert parallel[key] == serial[key]
+
+
+NON_ASCII_LOG = "WARN café timeout\nnaïve retry\nÉRROR up\nERROR up\nKernel panic\nsmall\nERROR ſtop\n"
+
+
+@pytest.mark.parametrize(
+    "include",
+    [
+        "caf. timeout",
+        r"na\w+ve",
+        r"^\w+ up",
+        r"\AERROR",
+        r"[^a-z]RROR",
+        "(?i)kernel",
+        "(?i)STOP",
+        r"(?a)\bup\b",
+        "ERROR.*up",
+        "(?i)error|retry",
+        r"(?a)^[A-Z]\w+ up",
+    ],
+)
+def test_mmap_path_matches_text_path_on_non_ascii(tmp_path: Path, include: str) -> None:
+    log = tmp_path / "utf8.log"
+    log.write_text(NON_ASCII_LOG, encoding="utf-8")
+
+    fast = list(FileStreamProcessor(log, include=include).iter_lines())
+    slow = list(FileStreamProcessor(log, include=include, use_mmap=False).iter_lines())
+
+    assert fast == slow
+    assert list(FileStreamProcessor(log, exclude=include).iter_lines()) == list(
+        FileStreamProcessor(log, exclude=include, use_mmap=False).iter_lines()
+    )
+
+
+def test_bytes_pattern_allow_list() -> None:
+    safe = ["ERROR.*timeout", "^(WARN|INFO)", "(?i)error", r"(?a)\d+ms\b", "[A-Z]{3}-[0-9]+"]
+    unsafe = ["caf. x", r"\w+", r"\AERROR", "ERROR$", r"[^x]", "(?i)kernel", r"(?a)(?<=\s)x", "(a)\\1"]
+
+    assert all(_bytes_pattern(re.compile(pattern)) is not None for pattern in safe)
+    assert all(_bytes_pattern(re.compile(pattern)) is None for pattern in unsafe)
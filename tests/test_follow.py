@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from grpx.file_stream import FileStreamProcessor
+from grpx.follow import FileFollower
+
+
+def test_follow_handles_append_rotation_and_truncation(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_bytes(b"one\n")
+    blocks = FileFollower(log, from_start=True, poll_interval=0.01).iter_blocks(idle_timeout=0.2)
+
+    assert next(blocks) == b"one\n"
+
+    with log.open("ab") as fh:
+        fh.write(b"two\npartial")
+    assert next(blocks) == b"two\n"
+
+    with log.open("ab") as fh:
+        fh.write(b" line\n")
+    assert next(blocks) == b"partial line\n"
+
+    rotated = tmp_path / "app.log.1"
+    log.rename(rotated)
+    with rotated.open("ab") as fh:
+        fh.write(b"late\n")
+    log.write_bytes(b"fresh\n")
+    assert next(blocks) == b"late\n"
+    assert next(blocks) == b"fresh\n"
+
+    log.write_bytes(b"x\n")
+    assert next(blocks) == b"x\n"
+    assert list(blocks) == []
+
+
+def test_follow_waits_for_missing_file(tmp_path: Path) -> None:
+    log = tmp_path / "later.log"
+    blocks = FileFollower(log, poll_interval=0.01).iter_blocks(idle_timeout=0.5)
+
+    def _create() -> None:
+        time.sleep(0.05)
+        log.write_bytes(b"created\n")
+
+    writer = threading.Thread(target=_create)
+    writer.start()
+    found = list(blocks)
+    writer.join()
+
+    assert found == [b"created\n"]
+
+
+def test_follow_filters_new_lines(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_text("ERROR old\n")
+    lines = FileStreamProcessor(log, include="ERROR", exclude="ignore").follow(poll_interval=0.01, idle_timeout=0.3)
+
+    def _write() -> None:
+        time.sleep(0.05)
+        with log.open("a") as fh:
+            fh.write("INFO ok\nERROR new\r\nERROR ignore me\n")
+
+    writer = threading.Thread(target=_write)
+    writer.start()
+    found = list(lines)
+    writer.join()
+
+    assert found == ["ERROR new"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_follow_wakes_on_write_without_polling(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    log.write_bytes(b"")
+    blocks = FileFollower(log, poll_interval=30).iter_blocks()
+
+    def _write() -> None:
+        time.sleep(0.2)
+        with log.open("ab") as fh:
+            fh.write(b"ping\n")
+
+    writer = threading.Thread(target=_write)
+    started = time.monotonic()
+    writer.start()
+    assert next(blocks) == b"ping\n"
+    writer.join()
+    blocks.close()
+
+    assert time.monotonic() - started < 5
@@ -0,0 +1,101 @@
+import re
+from pathlib import Path
+
+from grpx.detectors import iter_detections
+from grpx.file_stream import FileStreamProcessor
+from grpx.index import LogIndex, trigram_query
+
+
+def _write_log(path: Path, count: int, offset: int = 0) -> None:
+    with path.open("a") as fh:
+        for i in range(offset, offset + count):
+            if i % 997 == 0:
+                fh.write(f"ERROR payment gateway timeout order={i} see https://status.example.com/{i}\n")
+            else:
+                fh.write(f"INFO request {i} served from 10.0.{i % 256}.{i % 7} in {i % 50}ms\n")
+
+
+def _build(log: Path, index_dir: Path, workers: int = 1) -> dict[str, int]:
+    index = LogIndex(log, index_dir, block_size=4096)
+    try:
+        return index.update(workers=workers)
+    finally:
+        index.close()
+
+
+def test_trigram_query_extracts_required_literals() -> None:
+    assert trigram_query(re.compile("ERROR")) == [frozenset({b"err", b"rro", b"ror"})]
+    assert trigram_query(re.compile(r"(?:foo|bar)\d+")) == [frozenset({b"foo"}), frozenset({b"bar"})]
+    assert trigram_query(re.compile(r"\d+\.\d+")) is None
+    assert trigram_query(re.compile("x(?:abc)?y")) is None
+    # Unicode case folding lets "k" match the Kelvin sign, so it is never required.
+    assert trigram_query(re.compile("(?i)kernel")) == [frozenset({b"ern", b"rne", b"nel"})]
+    assert trigram_query(re.compile("\u212aernel")) == [frozenset({b"ern", b"rne", b"nel"})]
+    scoped = trigram_query(re.compile("(?i:kernel) panic"))
+    assert scoped == [frozenset({b"ern", b"rne", b"nel", b"pan", b"ani", b"nic"})]
+    assert trigram_query(re.compile("(?i)(?-i:kernel)")) == [frozenset({b"ker", b"ern", b"rne", b"nel"})]
+
+
+def test_index_keeps_lines_with_non_ascii_literals(tmp_path: Path) -> None:
+    log = tmp_path / "kern.log"
+    log.write_text("".join("\u212aernel panic\n" if i % 500 == 0 else f"INFO tick {i}\n" for i in range(5000)))
+    expected = list(FileStreamProcessor(log, include="\u212aernel", index_dir=None).iter_lines())
+
+    _build(log, tmp_path / "index")
+    processor = FileStreamProcessor(log, include="\u212aernel", index_dir=tmp_path / "index")
+
+    assert len(expected) == 10 and list(processor.iter_lines()) == expected
+
+
+def test_index_honours_scoped_ignorecase(tmp_path: Path) -> None:
+    log = tmp_path / "kern.log"
+    log.write_text("".join("\u212aernel panic\n" if i % 500 == 0 else f"INFO tick {i}\n" for i in range(5000)))
+    expected = list(FileStreamProcessor(log, include="(?i:kernel)", index_dir=None).iter_lines())
+
+    _build(log, tmp_path / "index")
+    processor = FileStreamProcessor(log, include="(?i:kernel)", index_dir=tmp_path / "index")
+
+    assert len(expected) == 10 and list(processor.iter_lines()) == expected
+
+
+def test_index_narrows_scans_without_changing_results(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    _write_log(log, 20000)
+    expected = list(FileStreamProcessor(log, include="timeout", index_dir=None).iter_lines())
+    expected_urls = list(iter_detections(["url"], file_path=str(log), index_dir=None))
+
+    result = _build(log, tmp_path / "index", workers=2)
+    index = LogIndex(log, tmp_path / "index")
+    try:
+        ranges, indexed_end = index.candidate_ranges([re.compile("timeout")])
+        assert index.candidate_ranges([re.compile(r"\d+ms")]) is None
+    finally:
+        index.close()
+
+    assert result["rebuilt"] == 1 and indexed_end == log.stat().st_size
+    assert sum(end - start for start, end in ranges) < log.stat().st_size / 10
+    processor = FileStreamProcessor(log, include="timeout", index_dir=tmp_path / "index")
+    assert list(processor.iter_lines()) == expected
+    assert len(expected) == 21
+    assert list(iter_detections(["url"], file_path=str(log), index_dir=tmp_path / "index")) == expected_urls
+
+
+def test_index_updates_incrementally_and_covers_unindexed_tail(tmp_path: Path) -> None:
+    log = tmp_path / "app.log"
+    index_dir = tmp_path / "index"
+    _write_log(log, 5000)
+    _build(log, index_dir)
+    _write_log(log, 3000, offset=5000)
+
+    # Lines appended after the build are scanned directly until the next update.
+    processor = FileStreamProcessor(log, include="ERROR", index_dir=index_dir)
+    assert len(list(processor.iter_lines())) == 9
+
+    update = _build(log, index_dir)
+    assert update["rebuilt"] == 0
+    assert 0 < update["new_bytes"] < log.stat().st_size
+    assert len(list(processor.iter_lines())) == 9
+
+    log.write_text("ERROR rewritten\n")
+    assert list(processor.iter_lines()) == ["ERROR rewritten"]
+    assert _build(log, index_dir)["rebuilt"] == 1
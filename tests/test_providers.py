@@ -1,4 +1,12 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from grpx.providers import ProviderError
+from grpx.providers.claude import ClaudeProvider
 from grpx.providers.factory import build_provider
+from grpx.providers.ollama import OllamaProvider
+from grpx.providers.openai import OpenAIProvider
 
 
 def test_build_ollama_provider() -> None:
@@ -29,3 +37,114 @@ def test_build_unsupported_provider_raises() -> None:
         raised = True
 
     assert raised
+
+
+class _StreamingTransport:
+    def __init__(self, lines: list[bytes]) -> None:
+        self.lines = lines
+        self.sent: dict = {}
+
+    def open(self, method, url, headers=None, body=None, timeout=60.0):
+        self.sent = json.loads(body)
+        return _FakeResponse(self.lines)
+
+
+class _FakeResponse:
+    def __init__(self, lines: list[bytes]) -> None:
+        self.lines = lines
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+def test_openai_stream_parses_sse_deltas() -> None:
+    transport = _StreamingTransport(
+        [
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n',
+            b"\n",
+            b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n',
+            b"\n",
+            b": keep-alive comment\n",
+            b'data: {"choices": [{"delta": {"content": "lo"}}]}\n',
+            b"\n",
+            b"data: [DONE]\n",
+            b"\n",
+        ]
+    )
+    provider = OpenAIProvider(model="gpt", api_key="k", transport=transport)  # type: ignore[arg-type]
+
+    assert list(provider.stream("hi")) == ["Hel", "lo"]
+    assert transport.sent["stream"] is True
+
+
+def test_ollama_stream_parses_ndjson() -> None:
+    transport = _StreamingTransport(
+        [b'{"response": "a", "done": false}\n', b'{"response": "b", "done": false}\n', b'{"response": "", "done": true}\n']
+    )
+    provider = OllamaProvider(model="llama3", base_url="http://localhost:11434", transport=transport)  # type: ignore[arg-type]
+
+    assert "".join(provider.stream("hi")) == "ab"
+
+
+def test_claude_stream_surfaces_error_event() -> None:
+    transport = _StreamingTransport(
+        [
+            b"event: content_block_delta\n",
+            b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}}\n',
+            b"\n",
+            b"event: error\n",
+            b'data: {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}\n',
+            b"\n",
+        ]
+    )
+    provider = ClaudeProvider(model="claude", api_key="k", transport=transport)  # type: ignore[arg-type]
+    chunks: list[str] = []
+
+    try:
+        for chunk in provider.stream("hi"):
+            chunks.append(chunk)
+        raised = ""
+    except ProviderError as exc:
+        raised = str(exc)
+
+    assert chunks == ["Hi"]
+    assert "Overloaded" in raised
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["prompt"]
+        status = 500 if prompt == "fail" else 200
+        payload = {"error": "model crashed"} if status == 500 else {"response": prompt.upper()}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_generate_many_keeps_input_order_and_isolates_errors() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    provider = OllamaProvider("llama3", f"http://127.0.0.1:{server.server_address[1]}")
+    try:
+        results = provider.generate_many(["a", "fail", "c", "d"], concurrency=2)
+    finally:
+        server.shutdown()
+
+    assert results[0] == "A"
+    assert isinstance(results[1], ProviderError)
+    assert "model crashed" in str(results[1])
+    assert results[2:] == ["C", "D"]
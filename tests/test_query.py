@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+
+from grpx.cli import main
+from grpx.config import ConfigManager
+from grpx.file_stream import FileStreamProcessor
+from grpx.query import QueryError, compile_query
+from grpx.records import RecordParser
+
+
+def _access_line(client: str, path: str, status: int) -> str:
+    return f'{client} - - [01/May/2024:12:00:00 +0000] "GET {path} HTTP/1.1" {status} 10 "-" "curl/8"'
+
+
+LINES = [
+    _access_line("10.0.0.1", "/login", 200),
+    _access_line("10.1.2.3", "/api/timeout", 504),
+    _access_line("192.168.1.5", "/api/timeout", 503),
+    _access_line("10.9.9.9", "/health", 500),
+]
+
+
+def _select(expression: str) -> list[int]:
+    return compile_query(expression).select(RecordParser("combined").parse(LINES))
+
+
+def test_comparisons_membership_and_boolean_operators() -> None:
+    assert _select('status>=500 and client in 10.0.0.0/8 and path~"timeout"') == [1]
+    assert _select("status in (200, 503)") == [0, 2]
+    assert _select("status=500 or path='/login'") == [0, 3]
+    assert _select("not (status<500) and client not in 10.0.0.0/8") == [2]
+    assert _select("path!~'^/api' and status!=200") == [3]
+    assert _select("user=bob") == [] and _select("user!=bob") == [0, 1, 2, 3]
+
+
+def test_plan_orders_cheap_tests_first_and_extracts_literals() -> None:
+    query = compile_query('path~"ti.*out" and client in 10.0.0.0/8 and status=504 and method=GET')
+
+    assert [child.op for child in query._root.children] == ["=", "=", "in", "~"]
+    assert query.literals == ["GET"]
+    assert compile_query("status=500 or method=GET").literals == []
+    assert compile_query("severity=error and path='/a'").literals == []
+
+
+@pytest.mark.parametrize("expression", ["", "status >=", "status ? 5", "(status=5", "ip in 10.0.0.0/99"])
+def test_invalid_queries_raise(expression: str) -> None:
+    with pytest.raises(QueryError):
+        compile_query(expression)
+
+
+def test_iter_where_matches_serial_and_parallel(tmp_path: Path) -> None:
+    log = tmp_path / "access.log"
+    log.write_text("\n".join(LINES * 300) + "\nnot an access log line 504\n")
+    expression = "status=504 and client in 10.0.0.0/8"
+
+    serial = list(FileStreamProcessor(log).iter_where(expression))
+    parallel = list(FileStreamProcessor(log, workers=3).iter_where(expression))
+
+    assert serial == parallel == [LINES[1]] * 300
+    counts = FileStreamProcessor(log, workers=3).group_counts(["path"], where="status>=500")
+    assert counts == {("/api/timeout",): [600, 600], ("/health",): [300, 300]}
+
+
+def test_numeric_equality_matches_numbers_written_differently(tmp_path: Path) -> None:
+    log = tmp_path / "events.json"
+    rows = ['{"n": 1e3}', '{"n": 1000.0}', '{"n": 1000}', '{"n": 999}', '{"n": "10000"}']
+    log.write_text("\n".join(rows) + "\n")
+
+    assert list(FileStreamProcessor(log).iter_where("n=1000", format="json")) == rows[:3]
+    assert list(FileStreamProcessor(log).iter_where("n in (1000)", format="json")) == rows[:3]
+
+
+def test_cli_where_prints_matching_lines(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setattr("grpx.cli.ConfigManager", lambda: ConfigManager(tmp_path / "config.json"))
+    log = tmp_path / "access.log"
+    log.write_text("\n".join(LINES) + "\n")
+
+    assert main(["-f", str(log), "--where", "status>=500 and path~timeout"]) == 0
+
+    assert capsys.readouterr().out.splitlines() == LINES[1:3]
@@ -0,0 +1,93 @@
+import io
+import urllib.error
+
+import pytest
+
+from grpx.threat_intel.clients import AbuseIPDBClient
+from grpx.threat_intel.ratelimit import RateLimiter, RateLimitExceeded, RetryPolicy, parse_retry_after
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_rate_limiter_spaces_requests_after_burst() -> None:
+    clock = _Clock()
+    limiter = RateLimiter(per_minute=4, clock=clock, sleep=clock.sleep)
+
+    for _ in range(6):
+        limiter.acquire()
+
+    assert clock.now == 30.0
+
+
+def test_rate_limiter_raises_when_daily_quota_exhausted() -> None:
+    clock = _Clock()
+    limiter = RateLimiter(per_day=2, max_wait=60, clock=clock, sleep=clock.sleep)
+    limiter.acquire()
+    limiter.acquire()
+
+    try:
+        limiter.acquire()
+        raised = False
+    except RateLimitExceeded:
+        raised = True
+
+    assert raised
+
+
+class _FlakyTransport:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    def request(self, method, url, headers=None, body=None, timeout=60.0) -> bytes:
+        self.calls += 1
+        if self.calls <= self.failures:
+            headers = {"Retry-After": "7"}
+            raise urllib.error.HTTPError(url, 429, "Too Many Requests", headers, io.BytesIO(b"{}"))  # type: ignore[arg-type]
+        return b'{"data": {"abuseConfidenceScore": 0}}'
+
+
+def test_client_retries_429_honouring_retry_after() -> None:
+    slept: list[float] = []
+    transport = _FlakyTransport(failures=2)
+    client = AbuseIPDBClient("key", transport=transport, retry=RetryPolicy(sleep=slept.append))  # type: ignore[arg-type]
+
+    payload = client.lookup_ip("1.2.3.4")
+
+    assert payload["data"]["abuseConfidenceScore"] == 0
+    assert transport.calls == 3
+    assert slept == [7.0, 7.0]
+
+
+def test_client_deadline_bounds_retries_and_rate_limit_waits() -> None:
+    slept: list[float] = []
+    transport = _FlakyTransport(failures=2)
+    retry = RetryPolicy(sleep=slept.append)
+    client = AbuseIPDBClient("key", transport=transport, timeout=5, retry=retry)  # type: ignore[arg-type]
+
+    with pytest.raises(urllib.error.HTTPError):
+        client.lookup_ip("1.2.3.4")
+    assert (transport.calls, slept) == (1, [])
+
+    clock = _Clock()
+    limiter = RateLimiter(per_minute=1, clock=clock, sleep=clock.sleep)
+    limiter.acquire(timeout=5)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(timeout=5)
+    limiter.acquire()
+    assert clock.now == 60.0
+
+
+def test_parse_retry_after_formats() -> None:
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from grpx.cli import main
+from grpx.config import ConfigManager
+from grpx.file_stream import FileStreamProcessor
+from grpx.records import RecordParser, detect_format
+
+
+SAMPLES = {
+    "json": '{"ts": "2024-05-01T12:00:03Z", "level": "ERROR", "host": "web1", "msg": "boom", "http": {"status": 500}}',
+    "syslog": "<11>May  1 12:00:00 web1 sshd[42]: Failed password for root from 10.0.0.9",
+    "combined": '10.0.0.1 - bob [01/May/2024:12:00:00 +0000] "GET /a HTTP/1.1" 503 12 "-" "curl/8"',
+    "cef": "May  1 12:00:00 fw1 CEF:0|Acme|FW|1.0|100|Blocked \\| conn|8|src=10.0.0.1 msg=hello world act=block",
+    "kv": 'time=2024-05-01T12:00:00Z level=warn host=db1 msg="slow query" took=12ms',
+}
+
+
+@pytest.mark.parametrize("format", list(SAMPLES))
+def test_formats_parse_into_normalized_columns(format: str) -> None:
+    assert detect_format(SAMPLES[format]) == format
+    parser = RecordParser()
+
+    batch = parser.parse([SAMPLES[format], "", "not a record of this format"])
+
+    assert parser.format == format
+    assert batch.num_rows == 1 and batch.unparsed == 2
+    row = next(batch.rows())
+    assert row["minute"].endswith("12:00")
+    assert row["severity"] in {"error", "warning"}
+    assert all(len(values) == 1 for values in batch.columns.values())
+
+
+def test_format_specific_fields_are_typed() -> None:
+    json_row = next(RecordParser("json").parse([SAMPLES["json"]]).rows())
+    assert json_row["http.status"] == 500 and json_row["message"] == "boom"
+
+    syslog_row = next(RecordParser("syslog").parse([SAMPLES["syslog"]]).rows())
+    assert (syslog_row["host"], syslog_row["app"], syslog_row["pid"]) == ("web1", "sshd", 42)
+
+    combined_row = next(RecordParser("combined").parse([SAMPLES["combined"]]).rows())
+    assert (combined_row["status"], combined_row["bytes"], combined_row["user"]) == (503, 12, "bob")
+
+    cef_row = next(RecordParser("cef").parse([SAMPLES["cef"]]).rows())
+    assert (cef_row["name"], cef_row["msg"], cef_row["act"]) == ("Blocked | conn", "hello world", "block")
+
+    kv_row = next(RecordParser("kv").parse([SAMPLES["kv"]]).rows())
+    assert (kv_row["host"], kv_row["took"]) == ("db1", "12ms")
+
+
+def _write_json_log(path: Path, count: int) -> None:
+    with path.open("w") as fh:
+        for i in range(count):
+            level = "error" if i % 4 == 0 else "info"
+            record = {"time": f"2024-05-01T12:{i % 3:02d}:00Z", "level": level, "host": f"web{i % 2}", "msg": "x"}
+            fh.write(json.dumps(record) + "\n")
+
+
+def test_group_counts_error_rate_per_host_per_minute(tmp_path: Path) -> None:
+    log = tmp_path / "app.jsonl"
+    _write_json_log(log, 1200)
+
+    serial = FileStreamProcessor(log).group_counts(["host", "minute"])
+    parallel = FileStreamProcessor(log, workers=3).group_counts(["host", "minute"])
+
+    assert parallel == serial
+    assert sum(count for count, _ in serial.values()) == 1200
+    assert serial[("web0", "2024-05-01 12:00")] == [200, 100]
+    assert serial[("web1", "2024-05-01 12:00")] == [200, 0]
+    batches = list(FileStreamProcessor(log, workers=3).iter_records(batch_size=500))
+    assert max(batch.num_rows for batch in batches) <= 500
+    assert sum(batch.num_rows for batch in batches) == 1200
+
+
+def test_cli_group_by_prints_rates(monkeypatch, tmp_path: Path, capsys) -> None:
+    monkeypatch.setattr("grpx.cli.ConfigManager", lambda: ConfigManager(tmp_path / "config.json"))
+    log = tmp_path / "app.jsonl"
+    _write_json_log(log, 12)
+
+    assert main(["-f", str(log), "--group-by", "host"]) == 0
+
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert rows == [
+        {"host": "web0", "count": 6, "errors": 3, "error_rate": 0.5},
+        {"host": "web1", "count": 6, "errors": 0, "error_rate": 0.0},
+    ]
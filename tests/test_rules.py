@@ -0,0 +1,148 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from grpx.detectors import iter_detections, reload_detectors, resolve_detectors, run_detector
+from grpx.rules import KeywordMatcher, Rule, RuleEngine, RuleError, load_rules
+
+
+@pytest.fixture
+def rules_dir(tmp_path: Path):
+    path = tmp_path / "rules"
+    path.mkdir()
+    (path / "c2.txt").write_text("# known C2 domains\nevil.example\nBAD.test\n\n")
+    (path / "pack.json").write_text(
+        json.dumps(
+            {
+                "rules": [
+                    {"name": "encoded-ps", "regex": r"powershell(?:\.exe)? -e(?:nc)? \S+", "case_sensitive": False},
+                    {"name": "sha256", "regex": r"\b[0-9a-f]{64}\b"},
+                    {"name": "tools", "keywords": ["mimikatz", "psexec"], "case_sensitive": True},
+                ]
+            }
+        )
+    )
+    yield path
+    reload_detectors(plugins=False)
+
+
+def test_load_rules_reads_packs_and_keyword_lists(rules_dir: Path) -> None:
+    rules = {rule.name: rule for rule in load_rules(rules_dir, plugins=False)}
+
+    assert sorted(rules) == ["c2", "encoded-ps", "sha256", "tools"]
+    assert rules["c2"].keywords == ("evil.example", "BAD.test") and not rules["c2"].case_sensitive
+    assert rules["tools"].case_sensitive and rules["sha256"].case_sensitive
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        {"name": "all", "keywords": ["x"]},
+        {"name": "both", "keywords": ["x"], "regex": "x"},
+        {"name": "empty", "regex": "a*"},
+        {"name": "broken", "regex": "(x"},
+    ],
+)
+def test_invalid_rules_raise(tmp_path: Path, rule: dict) -> None:
+    (tmp_path / "bad.json").write_text(json.dumps([rule]))
+
+    with pytest.raises(RuleError):
+        load_rules(tmp_path, plugins=False)
+
+
+def test_keyword_matcher_reports_overlapping_and_prefix_keywords() -> None:
+    matcher = KeywordMatcher(["he", "she", "hers", "his"], case_sensitive=False)
+    text = "x\nuShers his\nnone\n"
+
+    found = [(position, keyword) for _, _, position, keyword in matcher.occurrences(text)]
+
+    assert found == [(3, "she"), (4, "he"), (4, "hers"), (9, "his")]
+
+
+def test_rule_engine_matches_keywords_prefiltered_and_merged_regexes() -> None:
+    engine = RuleEngine(
+        [
+            Rule("c2", keywords=("evil.example",), case_sensitive=False),
+            Rule("ps", regex=r"powershell -enc \S+", case_sensitive=False),
+            Rule("port", regex=r"\bport=\d{5}\b"),
+            Rule("hex", regex=r"\b[0-9a-f]{8}\b"),
+            Rule("named", regex=r"(?P<user>root)@\w+"),
+        ]
+    )
+    text = (
+        "dns EVIL.example and evil.example\n"
+        "PowerShell -enc AAAA; powershell -enc BBBB port=31337\n"
+        "id deadbeef root@host port=80\n"
+    )
+
+    assert engine.scan(text) == {
+        "c2": ["EVIL.example", "evil.example"],
+        "ps": ["PowerShell -enc AAAA;", "powershell -enc BBBB"],
+        "port": ["port=31337"],
+        "hex": ["deadbeef"],
+        "named": ["root@host"],
+    }
+
+
+def test_rules_join_the_detector_registry(rules_dir: Path, tmp_path: Path) -> None:
+    assert reload_detectors(rules_dir, plugins=False) == ["c2", "encoded-ps", "sha256", "tools"]
+    assert resolve_detectors("ipv4,rules") == ["ipv4", "c2", "encoded-ps", "sha256", "tools"]
+    assert "c2" not in resolve_detectors("all")
+
+    digest = "ab" * 32
+    log = tmp_path / "edr.log"
+    log.write_text(
+        "".join(
+            f"host{i} ok 10.0.0.{i % 250}\n" if i % 100 else f"host{i} POWERSHELL.exe -e {digest} bad.test Mimikatz\n"
+            for i in range(1000)
+        )
+    )
+
+    found = list(iter_detections(["c2", "encoded-ps", "sha256", "tools"], file_path=str(log), chunk_size=4096))
+
+    assert found.count(("c2", "bad.test")) == 10
+    assert found.count(("encoded-ps", f"POWERSHELL.exe -e {digest}")) == 10
+    assert found.count(("sha256", digest)) == 10
+    assert not any(name == "tools" for name, _ in found)
+    assert run_detector("c2", text="to BAD.TEST\n") == ["BAD.TEST"]
+
+
+def test_merged_regex_rules_report_overlapping_matches() -> None:
+    engine = RuleEngine(
+        [
+            Rule("hexid", regex=r"[0-9a-f]{8}"),
+            Rule("sha1", regex=r"[0-9a-f]{40}"),
+            Rule("pair", regex=r"(\d)\1"),
+            Rule("digit", regex=r"\d"),
+        ]
+    )
+    digest = "0123456789abcdef0123456789abcdef01234567"
+
+    found = engine.scan(f"file {digest}\nno hex here 77\n")
+
+    assert found["sha1"] == [digest]
+    assert found["hexid"] == [digest[i : i + 8] for i in range(0, 40, 8)]
+    assert found["pair"] == ["77"]
+    assert len(found["digit"]) == 28 + 2
+
+
+def test_broken_pack_is_skipped_and_reported(rules_dir: Path, monkeypatch, capsys) -> None:
+    from grpx.cli import main
+
+    (rules_dir / "broken.json").write_text("{bad")
+    (rules_dir / "ipv4.txt").write_text("10.0.0.1\n")
+    monkeypatch.setattr("grpx.rules.RULES_DIR", rules_dir)
+    monkeypatch.setattr("grpx.detectors._registry", None)
+    log = rules_dir.parent / "fw.log"
+    log.write_text("deny 10.0.0.1 to evil.example\n")
+
+    assert main(["--detect", "ipv4", "-f", str(log)]) == 0
+    assert capsys.readouterr() == ("10.0.0.1\nMatches: 1\n", "")
+    assert main(["--detect", "c2", "-f", str(log)]) == 0
+
+    out, err = capsys.readouterr()
+    assert out == "evil.example\nMatches: 1\n"
+    assert "broken.json" in err and "'ipv4' is already in use" in err
+    with pytest.raises(ValueError, match="Skipped: Cannot read rule pack .*broken.json"):
+        resolve_detectors("missing")
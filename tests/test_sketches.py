@@ -0,0 +1,74 @@
+import random
+from collections import Counter
+
+from grpx.sketches import HeavyHitters, HyperLogLog, Reservoir, TDigest
+
+
+def test_heavy_hitters_stays_bounded_and_keeps_frequent_keys() -> None:
+    hitters = HeavyHitters(capacity=10)
+    for round_ in range(50):
+        hitters.update(["hot"] * 5 + [f"rare-{round_}-{i}" for i in range(30)])
+
+    assert len(hitters.counts) <= 20
+    assert hitters.top(1) == [("hot", 250)]
+    assert hitters.error >= 1
+
+
+def test_heavy_hitters_error_bounds_every_shortfall() -> None:
+    rng = random.Random(7)
+    parts = [[f"k{min(int(rng.paretovariate(1.2)), 60)}" for _ in range(3000)] for _ in range(3)]
+    merged = HeavyHitters(capacity=8)
+    for part in parts:
+        hitters = HeavyHitters(capacity=8)
+        for start in range(0, len(part), 50):
+            hitters.update(part[start : start + 50])
+        merged.merge(hitters)
+
+    true_counts = Counter(key for part in parts for key in part)
+    assert all(0 <= true_counts[key] - merged.counts[key] <= merged.error for key in true_counts)
+
+
+def test_hyperloglog_estimates_and_merges() -> None:
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update(str(i) for i in range(60000))
+    right.update(str(i) for i in range(40000, 100000))
+
+    assert abs(left.count() - 60000) < 60000 * 0.05
+    left.merge(right)
+    assert abs(left.count() - 100000) < 100000 * 0.05
+
+    small = HyperLogLog()
+    small.update(["a", "b", "c", "a"])
+    assert small.count() == 3
+
+
+def test_reservoir_is_uniform_across_batches() -> None:
+    hits = [0] * 100
+    data = [str(i) for i in range(100)]
+    for seed in range(2000):
+        sample = Reservoir(size=10, seed=seed)
+        for start in range(0, 100, 7):
+            sample.update(data[start : start + 7])
+        assert sample.seen == 100
+        for item in sample.items:
+            hits[int(item)] += 1
+
+    # Each item is expected 200 times.
+    assert min(hits) > 130
+    assert max(hits) < 270
+
+
+def test_tdigest_quantiles_and_merge() -> None:
+    rng = random.Random(7)
+    values = [rng.expovariate(1.0) for _ in range(50000)]
+    ordered = sorted(values)
+    left, right = TDigest(), TDigest()
+    left.update(values[:20000])
+    right.update(values[20000:])
+    left.merge(right)
+
+    assert left.count == 50000
+    assert len(left.means) <= 100
+    for q in (0.5, 0.9, 0.99):
+        assert abs(left.quantile(q) - ordered[int(q * len(ordered))]) < 0.05 * ordered[int(q * len(ordered))] + 0.01
+    assert (left.min, left.max) == (ordered[0], ordered[-1])
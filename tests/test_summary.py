@@ -0,0 +1,58 @@
+from grpx.summary import LogSummarizer
+
+
+def test_timeline_rolls_up_to_hours_for_long_spans() -> None:
+    summarizer = LogSummarizer(histogram_buckets=24)
+    summarizer.feed(f"2024-05-01 {h:02d}:{m:02d}:00 INFO tick" for h in range(24) for m in range(60))
+
+    timeline = summarizer.result()["timeline"]
+
+    assert timeline["resolution"] == "hour"
+    assert timeline["first"] == "2024-05-01 00"
+    assert timeline["counts"]["2024-05-01 13"] == 60
+    assert timeline["peaks"][0]["bucket"].count(":") == 1
+
+
+def test_sketch_fields_cover_ips_users_and_latencies() -> None:
+    summarizer = LogSummarizer(sample_size=5)
+    summarizer.feed(
+        f"GET /api user={'alice' if i % 2 else 'bob'} src=10.0.{i // 256 % 256}.{i % 256} latency={i % 100}ms"
+        for i in range(20000)
+    )
+
+    summary = summarizer.result()
+
+    assert summary["line_count"] == 20000
+    assert summary["distinct"]["users"] == 2
+    assert abs(summary["distinct"]["ipv4"] - 20000) < 20000 * 0.05
+    latency = summary["numeric_fields"]["latency_ms"]
+    assert latency["count"] == 20000
+    assert (latency["min"], latency["max"]) == (0.0, 99.0)
+    assert 45 <= latency["p50"] <= 55
+    assert summary["sample_lines"] == ["GET /api user=<USER> src=<*> latency=<*>"] * 5
+
+
+
+def test_numeric_fields_count_values_still_buffered() -> None:
+    summarizer = LogSummarizer()
+    summarizer.feed(f"GET /api latency={i}ms" for i in range(10))
+
+    latency = summarizer.result()["numeric_fields"]["latency_ms"]
+
+    assert (latency["count"], latency["min"], latency["max"]) == (10, 0.0, 9.0)
+
+def test_merge_matches_single_pass_counts() -> None:
+    lines = [f"2024-05-0{1 + i // 5000}T10:00:00Z {'WARN' if i % 10 == 0 else 'INFO'} job {i} took {i % 7}s" for i in range(10000)]
+    whole = LogSummarizer()
+    whole.feed(lines)
+    left, right = LogSummarizer(), LogSummarizer(seed=1)
+    left.feed(lines[:3000])
+    right.feed(lines[3000:])
+
+    left.merge(right)
+    merged, expected = left.result(), whole.result()
+
+    for key in ("line_count", "severity", "top_templates", "timeline", "distinct"):
+        assert merged[key] == expected[key]
+    assert merged["numeric_fields"]["took_s"]["count"] == 10000
+    assert len(merged["sample_lines"]) == 20
@@ -1,3 +1,5 @@
+import time
+
 from grpx.threat_intel.service import ThreatIntelService
 
 
@@ -47,3 +49,64 @@ def test_lookup_ip_full(monkeypatch) -> None:
     assert out["virustotal"] == {"full": "vt"}
     assert out["abuseipdb"] == {"full": "abuse"}
     assert out["ipinfo"] == {"full": "ipinfo"}
+
+
+def test_lookup_ip_records_provider_failure(monkeypatch) -> None:
+    def _boom(self, ip):
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setattr("grpx.threat_intel.service.VirusTotalClient.lookup_ip", _boom)
+    monkeypatch.setattr("grpx.threat_intel.service.AbuseIPDBClient.lookup_ip", lambda self, ip: {"full": "abuse"})
+    monkeypatch.setattr("grpx.threat_intel.service.IPinfoClient.lookup_ip", lambda self, ip: {"full": "ipinfo"})
+
+    out = ThreatIntelService(_config()).lookup_ip("1.1.1.1", full=True)
+
+    assert "read timed out" in out["virustotal"]["error"]
+    assert out["abuseipdb"] == {"full": "abuse"}
+    assert out["ipinfo"] == {"full": "ipinfo"}
+
+
+def test_lookup_ip_times_out_slow_provider(monkeypatch) -> None:
+    config = _config()
+    config["threat_intel"]["timeout"] = 0.2
+    monkeypatch.setattr("grpx.threat_intel.service.VirusTotalClient.lookup_ip", lambda self, ip: time.sleep(1) or {})
+    monkeypatch.setattr("grpx.threat_intel.service.AbuseIPDBClient.lookup_ip", lambda self, ip: {"full": "abuse"})
+    monkeypatch.setattr("grpx.threat_intel.service.IPinfoClient.lookup_ip", lambda self, ip: {"full": "ipinfo"})
+
+    out = ThreatIntelService(config).lookup_ip("1.1.1.1", full=True)
+
+    assert out["virustotal"] == {"error": "timed out after 0.2s"}
+    assert out["abuseipdb"] == {"full": "abuse"}
+
+
+def test_close_waits_for_abandoned_lookups(monkeypatch) -> None:
+    finished: list[str] = []
+    config = {"threat_intel": {"virustotal_api_key": "vt", "timeout": 0.1}}
+    monkeypatch.setattr(
+        "grpx.threat_intel.service.VirusTotalClient.lookup_ip", lambda self, ip: time.sleep(0.3) or finished.append(ip)
+    )
+    service = ThreatIntelService(config)
+
+    assert service.lookup_ip("1.1.1.1") == {"virustotal": {"error": "timed out after 0.1s"}}
+    service.close()
+
+    assert finished == ["1.1.1.1"]
+
+
+def test_lookup_many_dedupes_and_keeps_order(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def _vt(self, ip):
+        calls.append(ip)
+        return {"full": ip}
+
+    monkeypatch.setattr("grpx.threat_intel.service.VirusTotalClient.lookup_ip", _vt)
+    config = {"threat_intel": {"virustotal_api_key": "vt", "concurrency": {"virustotal": 2}}}
+    service = ThreatIntelService(config)
+
+    out = list(service.lookup_many(["10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3"], full=True, max_pending=2))
+    service.close()
+
+    assert [ip for ip, _ in out] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert out[1][1] == {"virustotal": {"full": "10.0.0.2"}}
+    assert sorted(calls) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
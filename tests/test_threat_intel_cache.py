@@ -0,0 +1,85 @@
+import io
+import time
+import urllib.error
+from pathlib import Path
+
+from grpx.threat_intel.cache import ThreatIntelCache
+from grpx.threat_intel.ratelimit import RateLimitExceeded
+from grpx.threat_intel.service import ThreatIntelService
+
+
+def test_cache_hit_skips_network(monkeypatch, tmp_path: Path) -> None:
+    calls: list[str] = []
+
+    def _vt(self, ip):
+        calls.append(ip)
+        return {"full": ip}
+
+    monkeypatch.setattr("grpx.threat_intel.service.VirusTotalClient.lookup_ip", _vt)
+    cache = ThreatIntelCache(tmp_path / "cache.sqlite3")
+    config = {"threat_intel": {"virustotal_api_key": "vt"}}
+
+    first = ThreatIntelService(config, cache=cache).lookup_ip("8.8.8.8", full=True)
+    second = ThreatIntelService(config, cache=cache).lookup_ip("8.8.8.8", full=True)
+    ThreatIntelService(config, cache=cache, refresh=True).lookup_ip("8.8.8.8", full=True)
+
+    assert first == second == {"virustotal": {"full": "8.8.8.8"}}
+    assert calls == ["8.8.8.8", "8.8.8.8"]
+    assert cache.stats()["providers"]["virustotal"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_only_definitive_failures_are_cached(monkeypatch, tmp_path: Path) -> None:
+    calls: list[str] = []
+    failures = {
+        "10.0.0.1": urllib.error.HTTPError("u", 404, "Not Found", {}, io.BytesIO(b"no data")),
+        "10.0.0.2": urllib.error.HTTPError("u", 503, "Unavailable", {}, io.BytesIO(b"")),
+        "10.0.0.3": urllib.error.HTTPError("u", 429, "Too Many Requests", {}, io.BytesIO(b"")),
+        "10.0.0.4": urllib.error.URLError(TimeoutError("timed out")),
+        "10.0.0.5": RateLimitExceeded("virustotal daily quota exhausted"),
+    }
+
+    def _vt(self, ip):
+        calls.append(ip)
+        raise failures[ip]
+
+    monkeypatch.setattr("grpx.threat_intel.service.VirusTotalClient.lookup_ip", _vt)
+    cache = ThreatIntelCache(tmp_path / "cache.sqlite3")
+    config = {"threat_intel": {"virustotal_api_key": "vt"}}
+
+    for _ in range(2):
+        service = ThreatIntelService(config, cache=cache)
+        results = [service.lookup_ip(ip)["virustotal"] for ip in failures]
+        service.close()
+        assert all("error" in result for result in results)
+
+    assert calls == [*failures, *list(failures)[1:]]
+    assert cache.get("virustotal", "10.0.0.1").error is not None
+    assert cache.get("virustotal", "10.0.0.2") is None
+
+
+def test_cache_negative_entries_and_expiry(tmp_path: Path) -> None:
+    cache = ThreatIntelCache(tmp_path / "cache.sqlite3", ttl={"ipinfo": 0.05}, negative_ttl=60)
+
+    cache.put("ipinfo", "1.1.1.1", payload={"ip": "1.1.1.1"})
+    cache.put("abuseipdb", "1.1.1.1", error="AbuseIPDB error 422: invalid IP")
+    time.sleep(0.1)
+
+    assert cache.get("ipinfo", "1.1.1.1") is None
+    assert cache.get("abuseipdb", "1.1.1.1").error == "AbuseIPDB error 422: invalid IP"
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ThreatIntelCache(tmp_path / "cache.sqlite3", max_entries=2)
+    for ip in ["10.0.0.1", "10.0.0.2"]:
+        cache.put("ipinfo", ip, payload={})
+        time.sleep(0.01)
+    cache.get("ipinfo", "10.0.0.1")
+    time.sleep(0.01)
+    cache.put("ipinfo", "10.0.0.3", payload={})
+
+    cache.close()
+    reopened = ThreatIntelCache(tmp_path / "cache.sqlite3", max_entries=2)
+
+    assert reopened.get("ipinfo", "10.0.0.2") is None
+    assert reopened.get("ipinfo", "10.0.0.1") is not None
+    assert reopened.stats()["entries"] == 2
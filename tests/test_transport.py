@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from grpx.transport import AsyncHTTPTransport, HTTPTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    peers: set = set()
+    requests: list = []
+
+    def do_GET(self) -> None:
+        self.peers.add(self.client_address)
+        self.requests.append((self.command, self.path))
+        if self.path.endswith("/moved"):
+            self._reply(302, b"", location="/ok")
+            return
+        status = 429 if self.path == "/limited" else 200
+        self._reply(status, b'{"error": "slow down"}' if status == 429 else b'{"ok": true}')
+
+    def do_POST(self) -> None:
+        self.requests.append((self.command, self.path))
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/drop":
+            self.close_connection = True
+            return
+        self._reply(303, b"", location="/ok")
+
+    def do_CONNECT(self) -> None:
+        self.requests.append((self.command, self.path))
+        self.send_error(502)
+
+    def _reply(self, status: int, body: bytes, location: str = "") -> None:
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _serve():
+    _Handler.peers = set()
+    _Handler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_transport_reuses_keep_alive_connection() -> None:
+    server, base = _serve()
+    transport = HTTPTransport(pool_size=2)
+    try:
+        for _ in range(5):
+            assert transport.request("GET", f"{base}/ok", timeout=5) == b'{"ok": true}'
+    finally:
+        transport.close()
+        server.shutdown()
+
+    assert len(_Handler.peers) == 1
+
+
+def test_transport_raises_http_error_with_body() -> None:
+    server, base = _serve()
+    transport = HTTPTransport()
+    try:
+        try:
+            transport.request("GET", f"{base}/limited", timeout=5)
+            raised = None
+        except urllib.error.HTTPError as exc:
+            raised = exc
+        assert raised is not None
+        assert raised.code == 429
+        assert b"slow down" in raised.read()
+        transport.request("GET", f"{base}/ok", timeout=5)
+    finally:
+        transport.close()
+        server.shutdown()
+
+    assert len(_Handler.peers) == 1
+
+
+def test_async_transport_reuses_connection_and_raises_http_error() -> None:
+    server, base = _serve()
+
+    async def run() -> tuple[list[bytes], int]:
+        transport = AsyncHTTPTransport(pool_size=2)
+        try:
+            bodies = [await transport.request("GET", f"{base}/ok", timeout=5) for _ in range(3)]
+            try:
+                await transport.request("GET", f"{base}/limited", timeout=5)
+                code = 0
+            except urllib.error.HTTPError as exc:
+                code = exc.code
+            return bodies, code
+        finally:
+            await transport.aclose()
+
+    try:
+        bodies, code = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert bodies == [b'{"ok": true}'] * 3
+    assert code == 429
+    assert len(_Handler.peers) == 1
+
+
+def test_transport_follows_redirects_like_urlopen() -> None:
+    server, base = _serve()
+    transport = HTTPTransport()
+    try:
+        assert transport.request("GET", f"{base}/moved", timeout=5) == b'{"ok": true}'
+        assert transport.request("POST", f"{base}/form", body=b"a=1", timeout=5) == b'{"ok": true}'
+    finally:
+        transport.close()
+        server.shutdown()
+
+    assert _Handler.requests == [("GET", "/moved"), ("GET", "/ok"), ("POST", "/form"), ("GET", "/ok")]
+
+
+def test_transport_uses_environment_proxies(monkeypatch) -> None:
+    server, base = _serve()
+    monkeypatch.setenv("http_proxy", base)
+    monkeypatch.setenv("https_proxy", base)
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+    transport = HTTPTransport()
+    try:
+        assert transport.request("GET", "http://logs.test/ok", timeout=5) == b'{"ok": true}'
+        with pytest.raises(urllib.error.URLError):
+            transport.request("GET", "https://logs.test/ok", timeout=5)
+        transport.request("GET", f"{base}/ok", timeout=5)
+    finally:
+        transport.close()
+        server.shutdown()
+
+    assert _Handler.requests == [("GET", "http://logs.test/ok"), ("CONNECT", "logs.test:443"), ("GET", "/ok")]
+
+
+def test_async_transport_uses_environment_proxies(monkeypatch) -> None:
+    server, base = _serve()
+    monkeypatch.setenv("http_proxy", base)
+    monkeypatch.setenv("https_proxy", base)
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+
+    async def run() -> bytes:
+        transport = AsyncHTTPTransport()
+        try:
+            body = await transport.request("GET", "http://logs.test/ok", timeout=5)
+            with pytest.raises(urllib.error.URLError):
+                await transport.request("GET", "https://logs.test/ok", timeout=5)
+            await transport.request("GET", f"{base}/ok", timeout=5)
+            return body
+        finally:
+            await transport.aclose()
+
+    try:
+        assert asyncio.run(run()) == b'{"ok": true}'
+    finally:
+        server.shutdown()
+
+    assert _Handler.requests == [("GET", "http://logs.test/ok"), ("CONNECT", "logs.test:443"), ("GET", "/ok")]
+
+
+def test_transport_does_not_resend_post_after_it_was_written() -> None:
+    server, base = _serve()
+    transport = HTTPTransport()
+    try:
+        transport.request("GET", f"{base}/ok", timeout=5)
+        with pytest.raises(urllib.error.URLError):
+            transport.request("POST", f"{base}/drop", body=b"{}", timeout=5)
+    finally:
+        transport.close()
+        server.shutdown()
+
+    assert _Handler.requests == [("GET", "/ok"), ("POST", "/drop")]